@@ -21,6 +21,7 @@ from .route_graph import (
     StageGraph,
     integrated_extinction_along_los,
 )
+from .route_history import RouteCostHistory, RouteCostSampling
 from .scenario import Scenario, ScenarioResult, load_scenario, run_scenario
 from .visibility import VisibilityModel
 from .smoke_speed import (
@@ -36,6 +37,8 @@ __all__ = [
     "ConstantExtinctionField",
     "RerouteConfig",
     "RouteCostConfig",
+    "RouteCostHistory",
+    "RouteCostSampling",
     "SliceFieldSampler",
     "StageGraph",
     "DefaultFedConfig",
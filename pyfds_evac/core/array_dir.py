@@ -0,0 +1,87 @@
+"""Directories of ``.npy`` arrays plus ``meta.json`` shared between runs.
+
+Used by the caches that several runs of an ensemble read at once (the
+edge time tables and the per-sign vismap cache).  Saving never touches
+an existing directory, and loading memory-maps the arrays.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+import numpy as np
+
+_logger = logging.getLogger(__name__)
+
+
+def save_array_dir(
+    directory: str | Path,
+    arrays: dict[str, np.ndarray],
+    payload: dict,
+    *,
+    subdirs: Iterable[str] = (),
+) -> bool:
+    """Write *arrays* as ``<name>.npy`` files and *payload* as ``meta.json``.
+
+    The files (and empty *subdirs*) are written to a temporary directory
+    next to *directory* that is then renamed, so runs sharing a cache
+    never see a partial directory.  An existing *directory* is kept,
+    since other runs may be reading it.  Returns True when this call's
+    copy was put in place.
+    """
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=directory.parent, prefix=directory.name))
+    try:
+        for name, array in arrays.items():
+            np.save(tmp / f"{name}.npy", array, allow_pickle=False)
+        for name in subdirs:
+            (tmp / name).mkdir()
+        (tmp / "meta.json").write_text(json.dumps(payload), encoding="utf-8")
+        try:
+            os.replace(tmp, directory)
+        except OSError as e:
+            if not (directory / "meta.json").exists():
+                _logger.warning("Failed to save %s: %s", directory, e)
+            return False
+        return True
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def load_array_dir(
+    directory: str | Path,
+    names: Iterable[str],
+    accept: Callable[[dict], bool],
+    what: str,
+) -> tuple[dict, dict[str, np.ndarray]] | None:
+    """Memory-map a directory written by ``save_array_dir``.
+
+    Returns ``(payload, arrays)``, or None when the directory is missing,
+    unreadable or *accept* rejects its payload.  *what* names the cache
+    in log messages.
+    """
+    meta_path = Path(directory) / "meta.json"
+    if not meta_path.exists():
+        return None
+    try:
+        payload = json.loads(meta_path.read_text(encoding="utf-8"))
+        if not accept(payload):
+            _logger.info("%s metadata mismatch — recomputing.", what)
+            return None
+        arrays = {
+            name: np.load(
+                meta_path.parent / f"{name}.npy", mmap_mode="r", allow_pickle=False
+            )
+            for name in names
+        }
+    except (OSError, ValueError) as e:
+        _logger.warning("Failed to load %s: %s", what, e)
+        return None
+    return payload, arrays
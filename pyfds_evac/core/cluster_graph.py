@@ -0,0 +1,216 @@
+"""Cluster overlay of a stage graph for hierarchical exit-cost queries."""
+
+from __future__ import annotations
+
+import heapq
+import math
+from collections.abc import Mapping
+
+from .route_graph import ExitCostTables, StageGraph
+
+
+def grid_clusters(graph: StageGraph, cell_m: float) -> dict[str, str]:
+    """Assign every stage to the square grid cell holding its centroid.
+
+    A stand-in for floors or fire compartments when the scenario does not
+    list them: stages within the same *cell_m* square share a cluster.
+    """
+    if cell_m <= 0:
+        raise ValueError(f"cell_m must be positive, got {cell_m}")
+    return {
+        sid: f"{math.floor(node.centroid_x / cell_m)}:"
+        f"{math.floor(node.centroid_y / cell_m)}"
+        for sid, node in graph.nodes.items()
+    }
+
+
+def _reverse_dijkstra(
+    target: int,
+    incoming: Mapping[int, list[tuple[int, int]]],
+    weights: list[float],
+) -> tuple[dict[int, float], dict[int, int]]:
+    """Reverse Dijkstra over ``incoming[v] = [(u, slot), ...]`` arcs."""
+    dist: dict[int, float] = {target: 0.0}
+    nxt: dict[int, int] = {target: -1}
+    heap: list[tuple[float, int]] = [(0.0, target)]
+    while heap:
+        d, v = heapq.heappop(heap)
+        if d > dist[v]:
+            continue
+        for u, slot in incoming.get(v, ()):
+            alt = d + weights[slot]
+            if alt < dist.get(u, math.inf):
+                dist[u] = alt
+                nxt[u] = v
+                heapq.heappush(heap, (alt, u))
+    return dist, nxt
+
+
+class ClusterOverlay:
+    """Clusters of a stage graph joined by a small overlay graph.
+
+    Stages are partitioned into clusters (floors, fire compartments).  A
+    stage with an edge into or out of another cluster, and every exit,
+    is a *boundary* stage.  For each cluster the overlay keeps the
+    cheapest in-cluster cost and next hop from each of its stages to each
+    of its boundary stages.  Exit costs are then found by a reverse
+    Dijkstra over the boundary stages only, whose arcs are the
+    cross-cluster edges plus one in-cluster shortcut per boundary pair.
+
+    The per-cluster tables are recomputed only for clusters whose edge
+    weights changed since the previous query, so a pass in which smoke
+    has reached a few compartments redoes only those.  Results match
+    ``StageGraph.exit_cost_tables`` up to the order in which equal-cost
+    paths are preferred.  Build a new overlay if the graph changes.
+    """
+
+    def __init__(self, graph: StageGraph, clusters: Mapping[str, str]):
+        """Partition *graph* by *clusters* (stage ID -> cluster label).
+
+        Stages missing from *clusters* form a cluster of their own.
+        """
+        compiled = graph.compiled()
+        self._compiled = compiled
+        labels = [clusters.get(sid, sid) for sid in compiled.node_ids]
+        label_index = {label: i for i, label in enumerate(sorted(set(labels)))}
+        self.cluster_labels: tuple[str, ...] = tuple(sorted(label_index))
+        self.cluster_of: list[int] = [label_index[label] for label in labels]
+
+        n_clusters = len(self.cluster_labels)
+        members: list[list[int]] = [[] for _ in range(n_clusters)]
+        for u, c in enumerate(self.cluster_of):
+            members[c].append(u)
+        is_boundary = [False] * len(compiled.node_ids)
+        for e in compiled.exit_indices:
+            is_boundary[e] = True
+
+        sources = compiled.source_list
+        targets = compiled.target_list
+        self._internal_slots: list[list[int]] = [[] for _ in range(n_clusters)]
+        self._internal_in: list[dict[int, list[tuple[int, int]]]] = [
+            {} for _ in range(n_clusters)
+        ]
+        self._cross_slots: list[int] = []
+        for slot, (u, v) in enumerate(zip(sources, targets)):
+            c = self.cluster_of[u]
+            if c == self.cluster_of[v]:
+                self._internal_slots[c].append(slot)
+                self._internal_in[c].setdefault(v, []).append((u, slot))
+            else:
+                self._cross_slots.append(slot)
+                is_boundary[u] = is_boundary[v] = True
+
+        self.members: tuple[tuple[int, ...], ...] = tuple(map(tuple, members))
+        self.boundary: tuple[tuple[int, ...], ...] = tuple(
+            tuple(u for u in nodes if is_boundary[u]) for nodes in members
+        )
+        self._interior: tuple[tuple[int, ...], ...] = tuple(
+            tuple(u for u in nodes if not is_boundary[u]) for nodes in members
+        )
+        # Per cluster: boundary stage -> (cost, next hop) of every member
+        # that reaches it inside the cluster.
+        self._to_boundary: list[dict[int, tuple[dict, dict]]] = [
+            {} for _ in range(n_clusters)
+        ]
+        self._cluster_weights: list[tuple[float, ...] | None] = [None] * n_clusters
+        self.cluster_updates = 0
+
+    @classmethod
+    def from_grid(cls, graph: StageGraph, cell_m: float) -> ClusterOverlay:
+        """Cluster *graph* by ``grid_clusters(graph, cell_m)``."""
+        return cls(graph, grid_clusters(graph, cell_m))
+
+    @property
+    def overlay_size(self) -> int:
+        """Return the number of boundary stages in the overlay graph."""
+        return sum(len(b) for b in self.boundary)
+
+    def update(self, weights: list[float]) -> int:
+        """Recompute the clusters whose edge weights changed.
+
+        *weights* is indexed by edge slot of ``graph.compiled()``.
+        Returns the number of clusters recomputed.
+        """
+        updated = 0
+        for c, slots in enumerate(self._internal_slots):
+            cluster_weights = tuple(weights[slot] for slot in slots)
+            if cluster_weights == self._cluster_weights[c]:
+                continue
+            self._cluster_weights[c] = cluster_weights
+            self._to_boundary[c] = {
+                b: _reverse_dijkstra(b, self._internal_in[c], weights)
+                for b in self.boundary[c]
+            }
+            updated += 1
+        self.cluster_updates += updated
+        return updated
+
+    def exit_cost_tables(
+        self,
+        dynamic_weights: dict[tuple[str, str], float] | None = None,
+    ) -> ExitCostTables:
+        """Return the same tables as ``StageGraph.exit_cost_tables``.
+
+        Only the clusters whose weights changed are recomputed first.
+        """
+        compiled = self._compiled
+        weights = compiled.weights_for(dynamic_weights)
+        self.update(weights)
+
+        # Overlay arcs into each boundary stage: (source, cost, next hop).
+        overlay_in: dict[int, list[tuple[int, float, int]]] = {}
+        sources = compiled.source_list
+        targets = compiled.target_list
+        for slot in self._cross_slots:
+            v = targets[slot]
+            overlay_in.setdefault(v, []).append((sources[slot], weights[slot], v))
+        for c, tables in enumerate(self._to_boundary):
+            for b2, (dist, nxt) in tables.items():
+                for b1 in self.boundary[c]:
+                    if b1 != b2 and b1 in dist:
+                        overlay_in.setdefault(b2, []).append((b1, dist[b1], nxt[b1]))
+
+        node_ids = compiled.node_ids
+        cost_to_exit: dict[str, dict[str, float]] = {}
+        next_hop: dict[str, dict[str, str | None]] = {}
+        for e in compiled.exit_indices:
+            dist, hop = self._overlay_search(e, overlay_in)
+            # Interior stages leave their cluster through the boundary
+            # stage that is cheapest overall.
+            for c, tables in enumerate(self._to_boundary):
+                for u in self._interior[c]:
+                    best = math.inf
+                    for b, (inner, inner_nxt) in tables.items():
+                        if b in dist and u in inner:
+                            alt = inner[u] + dist[b]
+                            if alt < best:
+                                best = alt
+                                hop[u] = inner_nxt[u]
+                    if math.isfinite(best):
+                        dist[u] = best
+            exit_id = node_ids[e]
+            cost_to_exit[exit_id] = {node_ids[u]: d for u, d in dist.items()}
+            next_hop[exit_id] = {
+                node_ids[u]: (node_ids[v] if v != -1 else None) for u, v in hop.items()
+            }
+        return ExitCostTables(cost_to_exit=cost_to_exit, next_hop=next_hop)
+
+    @staticmethod
+    def _overlay_search(
+        target: int, overlay_in: dict[int, list[tuple[int, float, int]]]
+    ) -> tuple[dict[int, float], dict[int, int]]:
+        """Reverse Dijkstra towards *target* over the boundary stages."""
+        dist: dict[int, float] = {target: 0.0}
+        hop: dict[int, int] = {target: -1}
+        heap: list[tuple[float, int]] = [(0.0, target)]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            for u, cost, first in overlay_in.get(v, ()):
+                alt = d + cost
+                if alt < dist.get(u, math.inf):
+                    dist[u] = alt
+                    hop[u] = first
+                    heapq.heappush(heap, (alt, u))
+        return dist, hop
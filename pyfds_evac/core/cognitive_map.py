@@ -2,21 +2,229 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable, Sequence
 from dataclasses import dataclass, field
 
+import numpy as np
 
-@dataclass
+
+class KnowledgeIndex:
+    """Bit positions of node ids and ``(source, target)`` edges.
+
+    A position is handed out the first time a node or edge is seen and
+    is never reused, so masks built at different times or by different
+    agents over one index stay comparable.  Each stage graph has its own
+    index (see ``_graph_bits``); masks move between indices by name.
+    """
+
+    def __init__(self) -> None:
+        self.node_bits: dict[str, int] = {}
+        self.edge_bits: dict[tuple[str, str], int] = {}
+        self.node_ids: list[str] = []
+        self.edge_keys: list[tuple[str, str]] = []
+
+    def node(self, node_id: str) -> int:
+        """Return the single-bit mask of *node_id*."""
+        bit = self.node_bits.get(node_id)
+        if bit is None:
+            bit = self.node_bits[node_id] = 1 << len(self.node_ids)
+            self.node_ids.append(node_id)
+        return bit
+
+    def edge(self, source: str, target: str) -> int:
+        """Return the single-bit mask of the edge *source* -> *target*."""
+        key = (source, target)
+        bit = self.edge_bits.get(key)
+        if bit is None:
+            bit = self.edge_bits[key] = 1 << len(self.edge_keys)
+            self.edge_keys.append(key)
+        return bit
+
+    def node_mask(self, node_ids: Iterable[str]) -> int:
+        mask = 0
+        for node_id in node_ids:
+            mask |= self.node(node_id)
+        return mask
+
+    def edge_mask(self, keys: Iterable[tuple[str, str]]) -> int:
+        mask = 0
+        for source, target in keys:
+            mask |= self.edge(source, target)
+        return mask
+
+    def nodes_of(self, mask: int) -> frozenset[str]:
+        return frozenset(self.node_ids[i] for i in _set_bits(mask))
+
+    def edges_of(self, mask: int) -> frozenset[tuple[str, str]]:
+        return frozenset(self.edge_keys[i] for i in _set_bits(mask))
+
+
+def _set_bits(mask: int) -> Iterable[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# Fallback index of maps built from plain sets, before they are first
+# used with a graph.
+_INDEX = KnowledgeIndex()
+
+
+@dataclass(init=False)
 class AgentCognitiveMap:
     """Knowledge state of one agent about the stage graph.
 
     familiarity='full'      — agent knows the complete graph (trained staff).
     familiarity='discovery' — agent starts with spawn + visible neighbors
                               and expands as they move and see signs.
+
+    Known nodes and edges are kept as integer bitsets over the positions
+    of ``index``: the graph's own index for maps made by
+    ``init_cognitive_map``, a fallback index for maps built from sets.
+    A map is moved to a graph's index the first time it is used with
+    that graph.  Ints are immutable: expanding a map rebinds its own
+    masks, so maps may start from the same masks (``copy``) without one
+    agent's discoveries leaking to another.
     """
 
     familiarity: str  # "full" | "discovery"
-    known_nodes: set[str] = field(default_factory=set)
-    known_edges: set[tuple[str, str]] = field(default_factory=set)
+    node_bits: int
+    edge_bits: int
+    index: KnowledgeIndex = field(repr=False)
+    # signature() of the masks it was computed for.
+    _signature: tuple[KnowledgeIndex, int, int] | None = field(
+        repr=False, compare=False
+    )
+
+    def __init__(
+        self,
+        familiarity: str,
+        known_nodes: Iterable[str] = (),
+        known_edges: Iterable[tuple[str, str]] = (),
+        *,
+        node_bits: int = 0,
+        edge_bits: int = 0,
+        index: KnowledgeIndex | None = None,
+    ) -> None:
+        self.familiarity = familiarity
+        self.index = index = _INDEX if index is None else index
+        self.node_bits = node_bits | index.node_mask(known_nodes)
+        self.edge_bits = edge_bits | index.edge_mask(known_edges)
+        self._signature = None
+
+    @property
+    def known_nodes(self) -> frozenset[str]:
+        """Known node ids (decoded from ``node_bits``)."""
+        return self.index.nodes_of(self.node_bits)
+
+    @property
+    def known_edges(self) -> frozenset[tuple[str, str]]:
+        """Known ``(source, target)`` edges (decoded from ``edge_bits``)."""
+        return self.index.edges_of(self.edge_bits)
+
+    def knows_node(self, node_id: str) -> bool:
+        bit = self.index.node_bits.get(node_id)
+        return bit is not None and self.node_bits & bit != 0
+
+    def knows_edge(self, source: str, target: str) -> bool:
+        bit = self.index.edge_bits.get((source, target))
+        return bit is not None and self.edge_bits & bit != 0
+
+    def use_index(self, index: KnowledgeIndex) -> None:
+        """Re-encode the masks over *index* (no-op if already there)."""
+        if index is self.index:
+            return
+        self.node_bits = index.node_mask(self.known_nodes)
+        self.edge_bits = index.edge_mask(self.known_edges)
+        self.index = index
+        self._signature = None
+
+    def learn(self, node_bits: int, edge_bits: int) -> None:
+        """OR the given masks into the map."""
+        nodes = self.node_bits | node_bits
+        if nodes != self.node_bits:
+            self.node_bits = nodes
+        edges = self.edge_bits | edge_bits
+        if edges != self.edge_bits:
+            self.edge_bits = edges
+
+    def copy(self) -> AgentCognitiveMap:
+        """Return a map sharing this one's masks (copy-on-write)."""
+        return AgentCognitiveMap(
+            self.familiarity,
+            node_bits=self.node_bits,
+            edge_bits=self.edge_bits,
+            index=self.index,
+        )
+
+    @property
+    def version(self) -> tuple[int, int]:
+        """Return a key that changes whenever the knowledge state grows.
+
+        Knowledge is only ever added, so the number of known nodes and
+        edges changes exactly when ``expand_on_arrival`` or
+        ``expand_from_visibility`` learn something new.
+        """
+        return self.node_bits.bit_count(), self.edge_bits.bit_count()
+
+    def signature(self) -> tuple[KnowledgeIndex, int, int] | None:
+        """Return a hashable key of the knowledge state.
+
+        Agents with equal signatures route on the same subgraph.  Full
+        familiarity returns None (the whole graph).  The key is the index
+        and the pair of masks; the same tuple is returned until the map
+        grows or moves to another index.
+        """
+        if self.familiarity == "full":
+            return None
+        sig = self._signature
+        if sig is None or sig[1] is not self.node_bits or sig[2] is not self.edge_bits:
+            sig = self._signature = (self.index, self.node_bits, self.edge_bits)
+        return sig
+
+
+@dataclass
+class _GraphBits:
+    """Knowledge masks of one stage graph, built once per compiled form."""
+
+    # Positions in compiled node and edge order.
+    index: KnowledgeIndex
+    all_nodes: int
+    all_edges: int
+    # node -> [(target, target bit, edge bit)] in edge order.
+    out: dict[str, list[tuple[str, int, int]]]
+    # node -> (node bits, edge bits) learnt on arrival.
+    arrival: dict[str, tuple[int, int]]
+
+
+def _graph_bits(graph) -> _GraphBits:
+    # compiled() drops stale masks when the graph has changed.
+    compiled = graph.compiled()
+    bits = graph._knowledge_bits
+    if bits is not None:
+        return bits
+    index = KnowledgeIndex()
+    index.node_mask(compiled.node_ids)
+    index.edge_mask(compiled.edge_keys)
+    out: dict[str, list[tuple[str, int, int]]] = {}
+    arrival: dict[str, tuple[int, int]] = {}
+    all_edges = 0
+    for src, edges in graph.edges.items():
+        entries = [
+            (e.target, index.node(e.target), index.edge(src, e.target)) for e in edges
+        ]
+        out[src] = entries
+        node_bits = index.node(src)
+        edge_bits = 0
+        for _tgt, tbit, ebit in entries:
+            node_bits |= tbit
+            edge_bits |= ebit
+        arrival[src] = (node_bits, edge_bits)
+        all_edges |= edge_bits
+    bits = _GraphBits(index, index.node_mask(graph.nodes), all_edges, out, arrival)
+    graph._knowledge_bits = bits
+    return bits
 
 
 def init_cognitive_map(
@@ -32,17 +240,18 @@ def init_cognitive_map(
     'discovery' → knows spawn node + any adjacent nodes whose sign is
                   visible from the spawn centroid at t=*time_s*.
     """
+    bits = _graph_bits(graph)
     if familiarity == "full":
-        all_edges = {
-            (e.source, e.target) for edges in graph.edges.values() for e in edges
-        }
         return AgentCognitiveMap(
             familiarity="full",
-            known_nodes=set(graph.nodes),
-            known_edges=all_edges,
+            node_bits=bits.all_nodes,
+            edge_bits=bits.all_edges,
+            index=bits.index,
         )
 
-    cmap = AgentCognitiveMap(familiarity="discovery", known_nodes={spawn_node})
+    cmap = AgentCognitiveMap(
+        familiarity="discovery", node_bits=bits.index.node(spawn_node), index=bits.index
+    )
     node = graph.nodes.get(spawn_node)
     if node is not None:
         _expand_visible(
@@ -62,10 +271,13 @@ def expand_on_arrival(
     """
     if cmap.familiarity == "full":
         return
-    cmap.known_nodes.add(arrived_node)
-    for edge in graph.edges.get(arrived_node, []):
-        cmap.known_nodes.add(edge.target)
-        cmap.known_edges.add((edge.source, edge.target))
+    bits = _graph_bits(graph)
+    cmap.use_index(bits.index)
+    learnt = bits.arrival.get(arrived_node)
+    if learnt is None:
+        cmap.learn(bits.index.node(arrived_node), 0)
+    else:
+        cmap.learn(*learnt)
 
 
 def expand_from_visibility(
@@ -87,6 +299,64 @@ def expand_from_visibility(
     _expand_visible(cmap, current_node, graph, vis_model, time_s, ax, ay)
 
 
+def expand_from_visibility_many(
+    cmaps: Sequence[AgentCognitiveMap],
+    current_nodes: Sequence[str],
+    graph,
+    vis_model,
+    time_s: float,
+    positions: Sequence[tuple[float, float]],
+) -> None:
+    """Apply ``expand_from_visibility`` to several agents at once.
+
+    Neighbours an agent already knows are skipped, and the sign
+    visibility of all remaining (agent, neighbour) pairs is answered by
+    one ``vis_model.node_is_visible_many`` call.  Models without it are
+    asked per pair.
+    """
+    graph_bits = _graph_bits(graph)
+    out = graph_bits.out
+    owners: list[int] = []
+    targets: list[str] = []
+    xs: list[float] = []
+    ys: list[float] = []
+    bits: list[tuple[int, int]] = []
+    for k, (cmap, node_id, (ax, ay)) in enumerate(
+        zip(cmaps, current_nodes, positions, strict=True)
+    ):
+        if cmap.familiarity == "full":
+            continue
+        cmap.use_index(graph_bits.index)
+        for tgt, tbit, ebit in out.get(node_id, ()):
+            if cmap.node_bits & tbit and cmap.edge_bits & ebit:
+                continue
+            owners.append(k)
+            targets.append(tgt)
+            xs.append(ax)
+            ys.append(ay)
+            bits.append((tbit, ebit))
+    if not owners:
+        return
+    if vis_model is None:
+        visible = [True] * len(owners)
+    else:
+        many = getattr(vis_model, "node_is_visible_many", None)
+        if many is not None:
+            visible = many(time_s, np.asarray(xs), np.asarray(ys), targets)
+        else:
+            visible = [
+                vis_model.node_is_visible(time_s, x, y, tgt)
+                for x, y, tgt in zip(xs, ys, targets, strict=True)
+            ]
+    learnt: dict[int, tuple[int, int]] = {}
+    for k, seen, (tbit, ebit) in zip(owners, visible, bits, strict=True):
+        if seen:
+            node_bits, edge_bits = learnt.get(k, (0, 0))
+            learnt[k] = (node_bits | tbit, edge_bits | ebit)
+    for k, (node_bits, edge_bits) in learnt.items():
+        cmaps[k].learn(node_bits, edge_bits)
+
+
 def _expand_visible(
     cmap: AgentCognitiveMap,
     node_id: str,
@@ -96,31 +366,61 @@ def _expand_visible(
     ax: float,
     ay: float,
 ) -> None:
-    for edge in graph.edges.get(node_id, []):
-        tgt = edge.target
+    bits = _graph_bits(graph)
+    cmap.use_index(bits.index)
+    node_bits = 0
+    edge_bits = 0
+    for tgt, tbit, ebit in bits.out.get(node_id, ()):
         if vis_model is None or vis_model.node_is_visible(time_s, ax, ay, tgt):
-            cmap.known_nodes.add(tgt)
-            cmap.known_edges.add((edge.source, edge.target))
+            node_bits |= tbit
+            edge_bits |= ebit
+    cmap.learn(node_bits, edge_bits)
+
+
+# Restricted views kept per base graph (least recently used evicted).
+_MAX_VIEWS = 256
 
 
 def cognitive_subgraph(cmap: AgentCognitiveMap, graph):
     """Return a StageGraph restricted to the agent's known nodes and edges.
 
-    For 'full' agents returns the original graph unchanged.
+    For 'full' agents returns the original graph unchanged.  Views are
+    cached on *graph* by ``cmap.signature()``, so agents with the same
+    knowledge share one view (and its compiled form and sample tables)
+    and a view is only rebuilt after the map has grown.  Views are
+    shared: do not modify them.
     """
     if cmap.familiarity == "full":
         return graph
 
+    # _graph_bits() drops stale views and masks when the graph has changed.
+    bits = _graph_bits(graph)
+    cmap.use_index(bits.index)
+    views = graph._views
+    key = cmap.signature()
+    sub = views.get(key)
+    if sub is not None:
+        views.move_to_end(key)
+        return sub
+
     from .route_graph import StageGraph
 
+    # Base-graph order, so the view does not depend on bit order.
+    node_bits = cmap.node_bits
+    edge_bits = cmap.edge_bits
     sub = StageGraph()
-    for node_id in cmap.known_nodes:
-        if node_id in graph.nodes:
-            sub.nodes[node_id] = graph.nodes[node_id]
-    for src, tgt in cmap.known_edges:
-        if src in sub.nodes and tgt in sub.nodes:
-            for edge in graph.edges.get(src, []):
-                if edge.target == tgt:
-                    sub.edges.setdefault(src, []).append(edge)
-                    break
+    for node_id, node in graph.nodes.items():
+        if node_bits & bits.index.node_bits[node_id]:
+            sub.nodes[node_id] = node
+    for src, edges in graph.edges.items():
+        if src not in sub.nodes:
+            continue
+        kept = set()
+        for edge, (tgt, _tbit, ebit) in zip(edges, bits.out[src], strict=True):
+            if edge_bits & ebit and tgt in sub.nodes and tgt not in kept:
+                kept.add(tgt)
+                sub.edges.setdefault(src, []).append(edge)
+    views[key] = sub
+    if len(views) > _MAX_VIEWS:
+        views.popitem(last=False)
     return sub
@@ -0,0 +1,408 @@
+"""Integer-indexed CSR form of a ``StageGraph`` for shortest-path queries."""
+
+from __future__ import annotations
+
+import heapq
+import math
+from collections.abc import Callable, Iterator, Sequence
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .route_graph import StageGraph
+
+
+class CompiledStageGraph:
+    """Compressed sparse row (CSR) view of a stage graph.
+
+    Node IDs are interned as integers in sorted order, so integer heap
+    ties break exactly like the string IDs they replace.  Outgoing edges
+    of node ``i`` occupy slots ``offsets[i]:offsets[i + 1]`` of
+    ``sources``/``targets``/``weights``/``edge_keys``/``edge_waypoints``;
+    the same slot numbering indexes per-slot weight lists passed to
+    ``dijkstra``.
+
+    The Dijkstra work buffers are allocated once and reused by every
+    query.  They are plain lists because element access from the heap
+    loop is markedly faster than indexing NumPy scalars.
+    """
+
+    def __init__(self, graph: StageGraph):
+        """Intern node IDs and pack the edges of *graph* into CSR arrays."""
+        self.node_ids: tuple[str, ...] = tuple(sorted(graph.nodes))
+        self.index: dict[str, int] = {sid: i for i, sid in enumerate(self.node_ids)}
+        self.exit_indices: tuple[int, ...] = tuple(
+            self.index[sid] for sid in graph.exit_nodes()
+        )
+
+        outgoing: list[list] = [[] for _ in self.node_ids]
+        ordered = []
+        for source, edges in graph.edges.items():
+            u = self.index.get(source)
+            if u is None:
+                continue
+            for edge in edges:
+                if edge.target not in self.index:
+                    continue
+                outgoing[u].append(edge)
+                ordered.append((u, len(outgoing[u]) - 1))
+
+        counts = [len(edges) for edges in outgoing]
+        offsets = [0]
+        for count in counts:
+            offsets.append(offsets[-1] + count)
+        flat = [edge for edges in outgoing for edge in edges]
+
+        self.offsets = np.array(offsets, dtype=np.intp)
+        self.sources = np.repeat(np.arange(len(self.node_ids), dtype=np.intp), counts)
+        self.targets = np.array([self.index[e.target] for e in flat], dtype=np.intp)
+        self.weights = np.array([e.weight for e in flat], dtype=float)
+        self.edge_keys: tuple[tuple[str, str], ...] = tuple(
+            (e.source, e.target) for e in flat
+        )
+        self.edge_waypoints: tuple[np.ndarray, ...] = tuple(
+            np.asarray(e.waypoints, dtype=float).reshape(-1, 2) for e in flat
+        )
+
+        # Reverse CSR (incoming edges per node) in the graph's edge order.
+        incoming: list[list[int]] = [[] for _ in self.node_ids]
+        for u, position in ordered:
+            slot = offsets[u] + position
+            incoming[int(self.targets[slot])].append(slot)
+        rev_offsets = [0]
+        for slots in incoming:
+            rev_offsets.append(rev_offsets[-1] + len(slots))
+        self.rev_offsets = np.array(rev_offsets, dtype=np.intp)
+        self.rev_slots = np.array(
+            [slot for slots in incoming for slot in slots], dtype=np.intp
+        )
+
+        # Stage centroids and the straight-line length of every edge slot,
+        # for the A* heuristic.
+        self.centroids = np.array(
+            [
+                (graph.nodes[sid].centroid_x, graph.nodes[sid].centroid_y)
+                for sid in self.node_ids
+            ],
+            dtype=float,
+        ).reshape(-1, 2)
+        self.chords = np.hypot(
+            *(self.centroids[self.targets] - self.centroids[self.sources]).T
+        )
+        self._static_scale = _heuristic_scale(self.weights, self.chords)
+        self._xs = self.centroids[:, 0].tolist()
+        self._ys = self.centroids[:, 1].tolist()
+
+        self.shape = (len(graph.nodes), sum(len(e) for e in graph.edges.values()))
+
+        # List mirrors for the pure-Python heap loops.
+        self._offsets = offsets
+        self._targets = self.targets.tolist()
+        self._sources = [u for u, count in enumerate(counts) for _ in range(count)]
+        self._weights = self.weights.tolist()
+        self._rev_offsets = rev_offsets
+        self._rev_slots = self.rev_slots.tolist()
+        n = len(self.node_ids)
+        self._inf = [math.inf] * n
+        self._none = [-1] * n
+        self._dist = [math.inf] * n
+        self._prev = [-1] * n
+        self._elapsed = [math.inf] * n
+
+    def weights_for(
+        self, dynamic_weights: dict[tuple[str, str], float] | None
+    ) -> list[float]:
+        """Return per-slot weights, overriding static ones from the dict."""
+        if dynamic_weights is None:
+            return self._weights
+        return [
+            dynamic_weights.get(key, weight)
+            for key, weight in zip(self.edge_keys, self._weights)
+        ]
+
+    @property
+    def source_list(self) -> list[int]:
+        """``sources`` as a list, for pure-Python loops (do not modify)."""
+        return self._sources
+
+    @property
+    def target_list(self) -> list[int]:
+        """``targets`` as a list, for pure-Python loops (do not modify)."""
+        return self._targets
+
+    def slots(self, node: int) -> range:
+        """Return the edge slots of the outgoing edges of node index *node*."""
+        return range(self._offsets[node], self._offsets[node + 1])
+
+    def dijkstra(
+        self,
+        source: int,
+        weights: list[float] | None = None,
+        *,
+        settle: Callable[[int], None] | None = None,
+        stop_at: tuple[int, ...] | None = None,
+    ) -> tuple[list[float], list[int]]:
+        """Run Dijkstra from node index *source*.
+
+        Returns the shared ``(dist, prev)`` buffers, indexed by node;
+        ``prev`` is -1 for the source and unreached nodes.  The buffers
+        are overwritten by the next query, so copy anything to keep.
+
+        *settle* is called with each node as it is settled, before its
+        outgoing edges are relaxed, so callers can fill that node's slots
+        of *weights* on demand.  With *stop_at*, the search ends once all
+        of those nodes are settled; entries of other nodes may then be
+        incomplete.
+        """
+        if weights is None:
+            weights = self._weights
+        dist = self._dist
+        prev = self._prev
+        dist[:] = self._inf
+        prev[:] = self._none
+        offsets = self._offsets
+        targets = self._targets
+        pending = set(stop_at) if stop_at is not None else None
+        dist[source] = 0.0
+        heap: list[tuple[float, int]] = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if pending is not None:
+                pending.discard(u)
+                if not pending:
+                    break
+            if settle is not None:
+                settle(u)
+            for slot in range(offsets[u], offsets[u + 1]):
+                v = targets[slot]
+                alt = d + weights[slot]
+                if alt < dist[v]:
+                    dist[v] = alt
+                    prev[v] = u
+                    heapq.heappush(heap, (alt, v))
+        return dist, prev
+
+    def time_dependent_dijkstra(
+        self,
+        source: int,
+        frame_of: Callable[[float], int],
+        weights: Sequence[Sequence[float]],
+        travel_times: Sequence[Sequence[float]],
+    ) -> tuple[list[float], list[int], list[float]]:
+        """Run Dijkstra whose edge costs depend on the time they are entered.
+
+        The outgoing edges of a settled node are costed with row
+        ``frame_of(t)`` of *weights*, where ``t`` is the elapsed travel
+        time on the node's best path (from row-matched *travel_times*).
+        Returns the shared ``(dist, prev, elapsed)`` buffers, overwritten
+        by the next query.
+        """
+        dist = self._dist
+        prev = self._prev
+        elapsed = self._elapsed
+        dist[:] = self._inf
+        prev[:] = self._none
+        elapsed[:] = self._inf
+        offsets = self._offsets
+        targets = self._targets
+        dist[source] = 0.0
+        elapsed[source] = 0.0
+        heap: list[tuple[float, int]] = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            t = elapsed[u]
+            frame = frame_of(t)
+            row = weights[frame]
+            travel = travel_times[frame]
+            for slot in range(offsets[u], offsets[u + 1]):
+                v = targets[slot]
+                alt = d + row[slot]
+                if alt < dist[v]:
+                    dist[v] = alt
+                    prev[v] = u
+                    elapsed[v] = t + travel[slot]
+                    heapq.heappush(heap, (alt, v))
+        return dist, prev, elapsed
+
+    def reverse_dijkstra(
+        self, target: int, weights: list[float] | None = None
+    ) -> tuple[dict[int, float], dict[int, int]]:
+        """Run Dijkstra towards node index *target* over incoming edges.
+
+        Returns ``(cost_to_target, next_hop)`` for every node that can
+        reach *target*; ``next_hop[target]`` is -1.
+        """
+        if weights is None:
+            weights = self._weights
+        rev_offsets = self._rev_offsets
+        rev_slots = self._rev_slots
+        sources = self._sources
+        dist: dict[int, float] = {target: 0.0}
+        nxt: dict[int, int] = {target: -1}
+        heap: list[tuple[float, int]] = [(0.0, target)]
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            for k in range(rev_offsets[v], rev_offsets[v + 1]):
+                slot = rev_slots[k]
+                u = sources[slot]
+                alt = d + weights[slot]
+                if alt < dist.get(u, math.inf):
+                    dist[u] = alt
+                    nxt[u] = v
+                    heapq.heappush(heap, (alt, u))
+        return dist, nxt
+
+    def astar(
+        self,
+        source: int,
+        targets: tuple[int, ...],
+        weights: list[float] | None = None,
+    ) -> tuple[float, list[int]] | None:
+        """Return ``(cost, path)`` to the nearest of *targets* by A*.
+
+        The heuristic is the straight-line distance to the closest
+        target, scaled by the smallest ratio of static weight to
+        straight-line length over all edges (at most 1).  It is
+        admissible and consistent for any *weights* no lower than the
+        static ones, which holds for smoke-adjusted weights.  Returns
+        None if no target is reachable.
+        """
+        if weights is None:
+            weights = self._weights
+        goal_set = set(targets)
+        if not goal_set:
+            return None
+        xs = self._xs
+        ys = self._ys
+        goals = [(xs[t], ys[t]) for t in goal_set]
+        scale = self._static_scale
+        # Heuristic per node, computed when the node is first reached
+        # (kept in the elapsed buffer, unused by this search).
+        h = self._elapsed
+        h[:] = self._inf
+        dist = self._dist
+        prev = self._prev
+        dist[:] = self._inf
+        prev[:] = self._none
+        offsets = self._offsets
+        edge_targets = self._targets
+        dist[source] = 0.0
+        heap: list[tuple[float, float, int]] = [(0.0, 0.0, source)]
+        while heap:
+            _f, d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if u in goal_set:
+                return d, self._index_path(prev, source, u)
+            for slot in range(offsets[u], offsets[u + 1]):
+                v = edge_targets[slot]
+                alt = d + weights[slot]
+                if alt < dist[v]:
+                    dist[v] = alt
+                    prev[v] = u
+                    hv = h[v]
+                    if hv == math.inf:
+                        x, y = xs[v], ys[v]
+                        hv = h[v] = scale * min(
+                            math.hypot(x - gx, y - gy) for gx, gy in goals
+                        )
+                    heapq.heappush(heap, (alt + hv, alt, v))
+        return None
+
+    def k_shortest_paths(
+        self, source: int, target: int, weights: list[float] | None = None
+    ) -> Iterator[tuple[float, list[int]]]:
+        """Yield loopless paths from *source* to *target* in cost order.
+
+        Yen's algorithm: each further path branches off a previously
+        yielded one at a spur node, with the edges already used from
+        that prefix and the prefix's own nodes blocked.  Paths are
+        produced lazily, so a consumer that stops after the first few
+        pays only for those.  Paths are node-index lists; equal costs
+        yield in ascending node-index order.
+        """
+        if weights is None:
+            weights = self._weights
+        dist, prev = self.dijkstra(source, weights, stop_at=(target,))
+        if not math.isfinite(dist[target]):
+            return
+        best = self._index_path(prev, source, target)
+        accepted = [best]
+        yield dist[target], best
+        offsets = self._offsets
+        targets = self._targets
+        seen = {tuple(best)}
+        candidates: list[tuple[float, tuple[int, ...]]] = []
+        while True:
+            last = accepted[-1]
+            root_cost = 0.0
+            for i in range(len(last) - 1):
+                spur = last[i]
+                root = last[: i + 1]
+                blocked = list(weights)
+                for path in accepted:
+                    if path[: i + 1] == root:
+                        for slot in range(offsets[spur], offsets[spur + 1]):
+                            if targets[slot] == path[i + 1]:
+                                blocked[slot] = math.inf
+                for node in root[:-1]:
+                    for slot in range(offsets[node], offsets[node + 1]):
+                        blocked[slot] = math.inf
+                dist, prev = self.dijkstra(spur, blocked, stop_at=(target,))
+                if math.isfinite(dist[target]):
+                    nodes = tuple(root[:-1] + self._index_path(prev, spur, target))
+                    if nodes not in seen:
+                        seen.add(nodes)
+                        heapq.heappush(candidates, (root_cost + dist[target], nodes))
+                root_cost += self._edge_cost(spur, last[i + 1], weights)
+            if not candidates:
+                return
+            cost, nodes = heapq.heappop(candidates)
+            accepted.append(list(nodes))
+            yield cost, list(nodes)
+
+    def _edge_cost(self, u: int, v: int, weights: list[float]) -> float:
+        """Return the cheapest weight of an edge from *u* to *v*."""
+        return min(
+            weights[slot]
+            for slot in range(self._offsets[u], self._offsets[u + 1])
+            if self._targets[slot] == v
+        )
+
+    def _index_path(self, prev: list[int], source: int, target: int) -> list[int]:
+        """Reconstruct the node-index path from *source* to *target*."""
+        path = [target]
+        while path[-1] != source:
+            path.append(prev[path[-1]])
+        path.reverse()
+        return path
+
+    def path(self, prev: list[int], source: int, target: int) -> list[str]:
+        """Reconstruct the stage-ID path from *source* to *target*."""
+        path: list[str] = []
+        cur = target
+        while cur != -1:
+            path.append(self.node_ids[cur])
+            if cur == source:
+                break
+            cur = prev[cur]
+        path.reverse()
+        return path
+
+
+def _heuristic_scale(weights: np.ndarray, chords: np.ndarray) -> float:
+    """Return the largest factor ``s <= 1`` with ``weights >= s * chords``."""
+    mask = chords > 0
+    if not mask.any():
+        return 1.0
+    ratio = float(np.min(weights[mask] / chords[mask]))
+    if math.isnan(ratio):
+        return 0.0
+    return min(1.0, max(0.0, ratio))
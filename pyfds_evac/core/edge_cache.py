@@ -0,0 +1,104 @@
+"""On-disk cache of RoutingEngine edge polylines for stage-graph builds."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+_logger = logging.getLogger(__name__)
+
+_CACHE_VERSION = 1
+
+Point = tuple[float, float]
+
+
+def walkable_hash(walkable_polygon) -> str:
+    """Return a stable hash of the walkable area geometry."""
+    return hashlib.sha256(walkable_polygon.wkt.encode("utf-8")).hexdigest()
+
+
+class EdgePolylineCache:
+    """JSON cache of edge waypoints keyed by walkable area and endpoints.
+
+    Entries are looked up by their start and end points, so an edge is
+    recomputed only when one of its stage centroids moved.  The whole
+    file is ignored when the walkable area changed.  The format is plain
+    JSON (no pickle) and saving replaces the file atomically, so parallel
+    runs of an ensemble can share one cache.
+    """
+
+    def __init__(self, path: str | Path, geometry_hash: str):
+        """Load *path* if it exists and matches *geometry_hash*."""
+        self.path = Path(path)
+        self.geometry_hash = geometry_hash
+        self._entries: dict[tuple[float, float, float, float], list[Point]] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        """Read the cache file; start empty on mismatch or read error."""
+        if not self.path.exists():
+            return
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            _logger.warning("Failed to load edge polyline cache: %s", e)
+            return
+        if (
+            payload.get("version") != _CACHE_VERSION
+            or payload.get("walkable_hash") != self.geometry_hash
+        ):
+            _logger.info("Edge polyline cache geometry mismatch — recomputing.")
+            return
+        for entry in payload.get("edges", []):
+            key = (*entry["from"], *entry["to"])
+            self._entries[key] = [tuple(point) for point in entry["waypoints"]]
+
+    def get(self, start: Point, end: Point) -> list[Point] | None:
+        """Return cached waypoints from *start* to *end*, or None."""
+        waypoints = self._entries.get((*start, *end))
+        if waypoints is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(waypoints)
+
+    def put(self, start: Point, end: Point, waypoints: list[Point]) -> None:
+        """Store the waypoints computed from *start* to *end*."""
+        self._entries[(*start, *end)] = [(float(x), float(y)) for x, y in waypoints]
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache if entries were added since loading."""
+        if not self._dirty:
+            return
+        payload = {
+            "version": _CACHE_VERSION,
+            "walkable_hash": self.geometry_hash,
+            "edges": [
+                {
+                    "from": [key[0], key[1]],
+                    "to": [key[2], key[3]],
+                    "waypoints": [list(point) for point in waypoints],
+                }
+                for key, waypoints in self._entries.items()
+            ],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            dir=self.path.parent, prefix=self.path.name, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(payload, handle)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        self._dirty = False
@@ -0,0 +1,376 @@
+"""Per-edge, per-frame segment costs for time-dependent routing."""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import math
+from dataclasses import dataclass, field
+from itertools import pairwise
+from pathlib import Path
+
+import numpy as np
+
+from .array_dir import load_array_dir, save_array_dir
+from .route_cache import sampler_frame_key
+from .route_graph import (
+    ExtinctionSampler,
+    FedRateSampler,
+    RouteCostConfig,
+    SegmentCost,
+    StageGraph,
+    _edge_weight,
+    evaluate_segments,
+)
+
+_TABLE_VERSION = 1
+
+# Array fields written as one .npy file each.
+_ARRAYS = (
+    "lengths",
+    "k_avg",
+    "speed_factor",
+    "travel_time",
+    "fed_growth",
+    "visible",
+    "weight",
+)
+
+
+class _FrameRows:
+    """Rows of a ``(frames, slots)`` array as lists, converted on first use.
+
+    The heap loop of ``time_dependent_dijkstra`` indexes plain lists much
+    faster than array rows, but a query touches only the few frames its
+    paths reach; converting just those keeps memory-mapped tables paged
+    out instead of copying every frame when the table is created.
+    """
+
+    __slots__ = ("_array", "_rows")
+
+    def __init__(self, array: np.ndarray) -> None:
+        self._array = array
+        self._rows: dict[int, list[float]] = {}
+
+    def __len__(self) -> int:
+        return self._array.shape[0]
+
+    def __getitem__(self, frame: int) -> list[float]:
+        row = self._rows.get(frame)
+        if row is None:
+            row = self._rows[frame] = self._array[frame].tolist()
+        return row
+
+
+@dataclass(frozen=True)
+class EdgeTimeTable:
+    """Segment costs of every edge at the frames of a uniform time grid.
+
+    Row ``f`` holds the costs at ``start_s + f * step_s`` and applies
+    until the next frame starts; times past the last frame use the last
+    row.  Columns are the edge slots of ``graph.compiled()``.  The table
+    is built once per run, so routing looks up the cost of an edge at
+    the time an agent is expected to enter it instead of resampling the
+    fields.  The smoke and FED terms do not depend on the agents, so
+    ``cached_edge_time_table`` shares one table between the runs of an
+    ensemble.
+
+    Attributes
+    ----------
+    start_s, step_s:
+        Time of frame 0 and the frame spacing [s].
+    keys:
+        ``(source, target)`` per edge slot.
+    lengths:
+        Edge length per slot [m].
+    k_avg, speed_factor, travel_time, fed_growth, visible:
+        ``(frames, slots)`` arrays matching the ``SegmentCost`` fields.
+    weight:
+        ``(frames, slots)`` Dijkstra weights, as ``compute_dynamic_weights``.
+    """
+
+    start_s: float
+    step_s: float
+    keys: tuple[tuple[str, str], ...]
+    lengths: np.ndarray
+    k_avg: np.ndarray
+    speed_factor: np.ndarray
+    travel_time: np.ndarray
+    fed_growth: np.ndarray
+    visible: np.ndarray
+    weight: np.ndarray
+    # Per-frame list rows for the heap loop, the slot of each edge key
+    # and the ``segments_at`` dicts, all filled on first use.
+    _weight_rows: _FrameRows = field(init=False, repr=False, compare=False)
+    _travel_rows: _FrameRows = field(init=False, repr=False, compare=False)
+    _slot_of: dict[tuple[str, str], int] = field(init=False, repr=False, compare=False)
+    _segments: dict[int, dict[tuple[str, str], SegmentCost]] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        """Set up the lazy row views used by ``paths_to_exits``."""
+        slot_of: dict[tuple[str, str], int] = {}
+        for slot, key in enumerate(self.keys):
+            slot_of.setdefault(key, slot)
+        object.__setattr__(self, "_weight_rows", _FrameRows(self.weight))
+        object.__setattr__(self, "_travel_rows", _FrameRows(self.travel_time))
+        object.__setattr__(self, "_slot_of", slot_of)
+        object.__setattr__(self, "_segments", {})
+
+    @classmethod
+    def build(
+        cls,
+        graph: StageGraph,
+        start_s: float,
+        stop_s: float,
+        step_s: float,
+        extinction_sampler: ExtinctionSampler,
+        fed_rate_sampler: FedRateSampler | None,
+        config: RouteCostConfig,
+    ) -> EdgeTimeTable:
+        """Evaluate every edge at each frame from *start_s* to *stop_s*.
+
+        Each frame is one ``evaluate_segments`` call.  A frame whose
+        samplers report the same ``frame_key`` as the previous one copies
+        that row instead.
+        """
+        if step_s <= 0:
+            raise ValueError(f"step_s must be positive, got {step_s}")
+        compiled = graph.compiled()
+        keys = compiled.edge_keys
+        n_frames = max(1, math.floor((stop_s - start_s) / step_s) + 1)
+        shape = (n_frames, len(keys))
+        k_avg = np.zeros(shape)
+        speed_factor = np.ones(shape)
+        travel_time = np.zeros(shape)
+        fed_growth = np.zeros(shape)
+        visible = np.ones(shape, dtype=bool)
+        weight = np.zeros(shape)
+        lengths = np.zeros(len(keys))
+
+        previous_key = None
+        for frame in range(n_frames):
+            time_s = start_s + frame * step_s
+            frame_key = sampler_frame_key(time_s, extinction_sampler, fed_rate_sampler)
+            if frame and frame_key is not None and frame_key == previous_key:
+                for array in (k_avg, speed_factor, travel_time, fed_growth, visible):
+                    array[frame] = array[frame - 1]
+                weight[frame] = weight[frame - 1]
+                continue
+            previous_key = frame_key
+            segments = evaluate_segments(
+                graph, time_s, extinction_sampler, fed_rate_sampler, config
+            )
+            for slot, key in enumerate(keys):
+                seg = segments[key]
+                lengths[slot] = seg.length_m
+                k_avg[frame, slot] = seg.k_avg
+                speed_factor[frame, slot] = seg.speed_factor
+                travel_time[frame, slot] = seg.travel_time_s
+                fed_growth[frame, slot] = seg.fed_growth
+                visible[frame, slot] = seg.visible
+                weight[frame, slot] = _edge_weight(seg, config)
+
+        return cls(
+            start_s=float(start_s),
+            step_s=float(step_s),
+            keys=keys,
+            lengths=lengths,
+            k_avg=k_avg,
+            speed_factor=speed_factor,
+            travel_time=travel_time,
+            fed_growth=fed_growth,
+            visible=visible,
+            weight=weight,
+        )
+
+    @property
+    def n_frames(self) -> int:
+        """Return the number of frames."""
+        return self.weight.shape[0]
+
+    def frame(self, time_s: float) -> int:
+        """Return the frame in effect at *time_s* (clamped to the grid)."""
+        index = math.floor((time_s - self.start_s) / self.step_s)
+        return min(max(index, 0), self.n_frames - 1)
+
+    def segment(self, slot: int, frame: int) -> SegmentCost:
+        """Return the ``SegmentCost`` of edge *slot* in *frame*."""
+        source, target = self.keys[slot]
+        return SegmentCost(
+            source=source,
+            target=target,
+            length_m=float(self.lengths[slot]),
+            k_avg=float(self.k_avg[frame, slot]),
+            speed_factor=float(self.speed_factor[frame, slot]),
+            travel_time_s=float(self.travel_time[frame, slot]),
+            fed_growth=float(self.fed_growth[frame, slot]),
+            visible=bool(self.visible[frame, slot]),
+        )
+
+    def segments_at(self, time_s: float) -> dict[tuple[str, str], SegmentCost]:
+        """Return the segment costs of every edge in the frame at *time_s*.
+
+        Same form as ``evaluate_segments``, read from the table.  The dict
+        is built once per frame and shared between calls, so callers must
+        not modify it.
+        """
+        frame = self.frame(time_s)
+        segments = self._segments.get(frame)
+        if segments is None:
+            segments = {
+                key: self.segment(slot, frame) for slot, key in enumerate(self.keys)
+            }
+            self._segments[frame] = segments
+        return segments
+
+    def save(self, directory: str | Path, meta: dict) -> None:
+        """Write the table to *directory* as ``.npy`` files plus ``meta.json``.
+
+        Uses ``save_array_dir``: if another run saved the table first,
+        its copy is kept.
+        """
+        payload = {
+            "version": _TABLE_VERSION,
+            "meta": meta,
+            "start_s": self.start_s,
+            "step_s": self.step_s,
+            "edges": [list(key) for key in self.keys],
+        }
+        save_array_dir(
+            directory, {name: getattr(self, name) for name in _ARRAYS}, payload
+        )
+
+    @classmethod
+    def load(cls, directory: str | Path, expected_meta: dict) -> EdgeTimeTable | None:
+        """Memory-map a table saved by ``save``.
+
+        Returns None when the directory is missing, unreadable or was
+        saved with different metadata.
+        """
+        loaded = load_array_dir(
+            directory,
+            _ARRAYS,
+            lambda payload: (
+                payload.get("version") == _TABLE_VERSION
+                and payload.get("meta") == expected_meta
+            ),
+            "edge time table",
+        )
+        if loaded is None:
+            return None
+        payload, arrays = loaded
+        return cls(
+            start_s=float(payload["start_s"]),
+            step_s=float(payload["step_s"]),
+            keys=tuple(tuple(key) for key in payload["edges"]),
+            **arrays,
+        )
+
+    def paths_to_exits(
+        self, graph: StageGraph, source: str, time_s: float
+    ) -> dict[str, tuple[float, list[str], dict[tuple[str, str], SegmentCost]]]:
+        """Time-dependent Dijkstra from *source*, departing at *time_s*.
+
+        Each edge is costed at the frame in effect when the agent is
+        expected to enter it, following the travel times of the best
+        path so far.  Returns exit_id -> ``(cost, path, segments)``,
+        where *segments* holds the segment costs used along *path*.
+        """
+        compiled = graph.compiled()
+        u = compiled.index.get(source)
+        if u is None:
+            return {}
+        dist, prev, elapsed = compiled.time_dependent_dijkstra(
+            u,
+            lambda elapsed_s: self.frame(time_s + elapsed_s),
+            self._weight_rows,
+            self._travel_rows,
+        )
+        slot_of = self._slot_of
+        results = {}
+        for e in compiled.exit_indices:
+            if not math.isfinite(dist[e]):
+                continue
+            path = compiled.path(prev, u, e)
+            segments = {}
+            for a, b in pairwise(path):
+                entered = elapsed[compiled.index[a]]
+                segments[(a, b)] = self.segment(
+                    slot_of[(a, b)], self.frame(time_s + entered)
+                )
+            results[compiled.node_ids[e]] = (dist[e], path, segments)
+        return results
+
+
+def graph_hash(graph: StageGraph) -> str:
+    """Return a stable hash of the stage graph's nodes, edges and geometry."""
+    compiled = graph.compiled()
+    digest = hashlib.sha256()
+    nodes = [
+        [sid, node.centroid_x, node.centroid_y, node.stage_type]
+        for sid, node in ((sid, graph.nodes[sid]) for sid in compiled.node_ids)
+    ]
+    digest.update(json.dumps([nodes, compiled.edge_keys]).encode("utf-8"))
+    digest.update(np.ascontiguousarray(compiled.weights).tobytes())
+    for waypoints in compiled.edge_waypoints:
+        digest.update(np.ascontiguousarray(waypoints, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def table_meta(
+    graph: StageGraph,
+    case_id: str,
+    start_s: float,
+    stop_s: float,
+    step_s: float,
+    config: RouteCostConfig,
+) -> dict:
+    """Build the metadata that identifies a saved ``EdgeTimeTable``.
+
+    *case_id* names the fire case the samplers read (e.g. the resolved
+    FDS directory); tables are reused only when it, the graph, the time
+    grid and the cost settings all match.
+    """
+    return {
+        "case": case_id,
+        "graph": graph_hash(graph),
+        "start_s": float(start_s),
+        "stop_s": float(stop_s),
+        "step_s": float(step_s),
+        "config": dataclasses.asdict(config),
+    }
+
+
+def cached_edge_time_table(
+    cache_dir: str | Path,
+    case_id: str,
+    graph: StageGraph,
+    start_s: float,
+    stop_s: float,
+    step_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+) -> EdgeTimeTable:
+    """Load the table for this case and graph from *cache_dir*, or build it.
+
+    Each table lives in a subdirectory named after the hash of its
+    ``table_meta``, so the runs of an ensemble (and different cases)
+    can share one cache directory.  A freshly built table is saved there
+    unless the directory already exists (another run's copy, or one that
+    cannot be read, which is left for others that may be using it).
+    """
+    meta = table_meta(graph, case_id, start_s, stop_s, step_s, config)
+    name = hashlib.sha256(json.dumps(meta, sort_keys=True).encode("utf-8"))
+    directory = Path(cache_dir) / name.hexdigest()[:16]
+    table = EdgeTimeTable.load(directory, meta)
+    if table is not None:
+        return table
+    table = EdgeTimeTable.build(
+        graph, start_s, stop_s, step_s, extinction_sampler, fed_rate_sampler, config
+    )
+    table.save(directory, meta)
+    return table
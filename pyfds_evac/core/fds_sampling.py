@@ -7,6 +7,8 @@ FED model (gas concentrations).
 
 from __future__ import annotations
 
+import numpy as np
+
 try:
     from fdsreader import Simulation
 except ModuleNotFoundError:
@@ -23,6 +25,8 @@ class SliceFieldSampler:
         self._last_subslice = None
         self._cached_time_s: float | None = None
         self._cached_t_index: int = 0
+        # Located grid cells for read-only point arrays, keyed by id(xs).
+        self._located: dict[int, tuple] = {}
 
     def _find_subslice(self, x: float, y: float):
         """Return the subslice covering the requested x/y point."""
@@ -51,6 +55,79 @@ class SliceFieldSampler:
         index = round((value - center) / dx)
         return max(0, min(count - 1, int(index)))
 
+    @staticmethod
+    def _nearest_indices(
+        start: float, end: float, count: int, values: np.ndarray
+    ) -> np.ndarray:
+        """Vectorised ``_nearest_index`` over an array of coordinates."""
+        if count <= 1 or end <= start:
+            return np.zeros(values.shape, dtype=np.intp)
+        dx = (end - start) / count
+        center = start + 0.5 * dx
+        index = np.round((values - center) / dx)
+        return np.clip(index, 0, count - 1).astype(np.intp)
+
+    def _time_index(self, time_s: float) -> int:
+        """Return the nearest slice timestep, cached for repeated queries."""
+        ts = float(time_s)
+        if ts != self._cached_time_s:
+            self._cached_time_s = ts
+            self._cached_t_index = int(self._slice.get_nearest_timestep(ts))
+        return self._cached_t_index
+
+    def frame_key(self, time_s: float) -> int:
+        """Return the slice timestep sampled at *time_s*."""
+        return self._time_index(time_s)
+
+    def _locate_many(
+        self, xs: np.ndarray, ys: np.ndarray
+    ) -> list[tuple[object, np.ndarray, np.ndarray, np.ndarray]]:
+        """Return ``(subslice, point_indices, i_index, j_index)`` groups.
+
+        Each point is assigned to the first subslice whose extent covers
+        it.  Results for read-only arrays are cached, so fixed sample
+        geometry is located once and reused on every later call.
+        """
+        cacheable = not xs.flags.writeable and not ys.flags.writeable
+        if cacheable:
+            cached = self._located.get(id(xs))
+            if cached is not None and cached[0] is xs and cached[1] is ys:
+                return cached[2]
+
+        unassigned = np.ones(xs.shape, dtype=bool)
+        groups = []
+        for subslice in self._subslices:
+            ext = subslice.extent
+            inside = (
+                unassigned
+                & (ext.x_start <= xs)
+                & (xs <= ext.x_end)
+                & (ext.y_start <= ys)
+                & (ys <= ext.y_end)
+            )
+            if not inside.any():
+                continue
+            unassigned &= ~inside
+            points = np.flatnonzero(inside)
+            groups.append(
+                (
+                    subslice,
+                    points,
+                    self._nearest_indices(
+                        ext.x_start, ext.x_end, subslice.shape[0], xs[points]
+                    ),
+                    self._nearest_indices(
+                        ext.y_start, ext.y_end, subslice.shape[1], ys[points]
+                    ),
+                )
+            )
+
+        if cacheable:
+            if len(self._located) >= 8:
+                self._located.pop(next(iter(self._located)))
+            self._located[id(xs)] = (xs, ys, groups)
+        return groups
+
     def sample(self, time_s: float, x: float, y: float) -> float:
         """Return the sampled scalar value at one time and x/y point."""
         subslice = self._find_subslice(float(x), float(y))
@@ -59,11 +136,7 @@ class SliceFieldSampler:
                 f"Point ({x}, {y}) is outside the sampled FDS slice domain"
             )
 
-        ts = float(time_s)
-        if ts != self._cached_time_s:
-            self._cached_time_s = ts
-            self._cached_t_index = int(self._slice.get_nearest_timestep(ts))
-        t_index = self._cached_t_index
+        t_index = self._time_index(time_s)
         i_index = self._nearest_index(
             subslice.extent.x_start, subslice.extent.x_end, subslice.shape[0], float(x)
         )
@@ -72,6 +145,63 @@ class SliceFieldSampler:
         )
         return float(subslice.data[t_index, i_index, j_index])
 
+    def sample_many(self, time_s: float, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Return sampled values for arrays of x/y points at one time.
+
+        Points outside every subslice are returned as NaN instead of
+        raising.  Pass read-only arrays to reuse the located grid cells
+        across calls.
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        values = np.full(xs.shape, np.nan)
+        if xs.size == 0:
+            return values
+        t_index = self._time_index(time_s)
+        for subslice, points, i_index, j_index in self._locate_many(xs, ys):
+            values[points] = subslice.data[t_index, i_index, j_index]
+        return values
+
+    def changed_many(
+        self,
+        time_a: float,
+        time_b: float,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        *,
+        tolerance: float = 0.0,
+    ) -> np.ndarray:
+        """Return a mask of points whose cell value differs between two times.
+
+        A point is changed when the values of its grid cell in the frames
+        sampled at *time_a* and *time_b* differ by more than *tolerance*.
+        Points outside the slice domain never change.
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        changed = np.zeros(xs.shape, dtype=bool)
+        t_a = int(self._slice.get_nearest_timestep(float(time_a)))
+        t_b = int(self._slice.get_nearest_timestep(float(time_b)))
+        if t_a == t_b or xs.size == 0:
+            return changed
+        for subslice, points, i_index, j_index in self._locate_many(xs, ys):
+            delta = np.abs(
+                subslice.data[t_b, i_index, j_index]
+                - subslice.data[t_a, i_index, j_index]
+            )
+            changed[points] = ~(delta <= tolerance)
+        return changed
+
+    def contains_many(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Return a boolean mask of the points covered by the slice domain."""
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        inside = np.zeros(xs.shape, dtype=bool)
+        if xs.size:
+            for _, points, _, _ in self._locate_many(xs, ys):
+                inside[points] = True
+        return inside
+
 
 def load_slice_sampler(
     fds_dir: str,
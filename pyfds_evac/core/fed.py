@@ -3,6 +3,8 @@
 import math
 from dataclasses import dataclass
 
+import numpy as np
+
 from .fds_sampling import SliceFieldSampler
 
 _SECONDS_PER_MINUTE = 60.0
@@ -273,6 +275,39 @@ class FdsFedField:
             **optional,
         )
 
+    def frame_key(self, time_s: float) -> tuple[int | None, ...]:
+        """Return the output frame of every gas slice sampled at *time_s*."""
+        samplers = [self._co, self._co2, self._o2]
+        samplers.extend(getattr(self, attr) for attr, _ in self._OPTIONAL_SPECIES)
+        return tuple(
+            sampler.frame_key(time_s) if sampler is not None else None
+            for sampler in samplers
+        )
+
+    def changed_many(
+        self,
+        time_a: float,
+        time_b: float,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        *,
+        tolerance: float = 0.0,
+    ) -> np.ndarray:
+        """Return a mask of points where any gas slice changed between two times.
+
+        *tolerance* is compared against the raw slice values (volume
+        fractions).
+        """
+        samplers = [self._co, self._co2, self._o2]
+        samplers.extend(getattr(self, attr) for attr, _ in self._OPTIONAL_SPECIES)
+        changed = np.zeros(np.shape(xs), dtype=bool)
+        for sampler in samplers:
+            if sampler is not None:
+                changed |= sampler.changed_many(
+                    time_a, time_b, xs, ys, tolerance=tolerance
+                )
+        return changed
+
     def _sample_optional_ppm(
         self, sampler: SliceFieldSampler | None, time_s: float, x: float, y: float
     ) -> float:
@@ -309,6 +344,53 @@ class FdsFedField:
             ),
         )
 
+    def _sample_optional_ppm_many(
+        self,
+        sampler: SliceFieldSampler | None,
+        time_s: float,
+        xs: np.ndarray,
+        ys: np.ndarray,
+    ) -> list[float]:
+        """Vectorised ``_sample_optional_ppm`` over point arrays."""
+        if sampler is None:
+            return [0.0] * len(xs)
+        ppm = 1e6 * sampler.sample_many(time_s, xs, ys)
+        ppm[~sampler.contains_many(xs, ys)] = 0.0
+        return ppm.tolist()
+
+    def sample_inputs_many(
+        self, time_s: float, xs: np.ndarray, ys: np.ndarray
+    ) -> list[DefaultFedInputs]:
+        """Return FED gas inputs for arrays of x/y points at one time."""
+        inside = (
+            self._co.contains_many(xs, ys)
+            & self._co2.contains_many(xs, ys)
+            & self._o2.contains_many(xs, ys)
+        ).tolist()
+        co_pct = (100.0 * self._co.sample_many(time_s, xs, ys)).tolist()
+        co2_pct = (100.0 * self._co2.sample_many(time_s, xs, ys)).tolist()
+        o2_pct = (100.0 * self._o2.sample_many(time_s, xs, ys)).tolist()
+        optional = {
+            f"{attr.lstrip('_')}_ppm": self._sample_optional_ppm_many(
+                getattr(self, attr), time_s, xs, ys
+            )
+            for attr, _ in self._OPTIONAL_SPECIES
+        }
+        inputs = []
+        for n, ok in enumerate(inside):
+            if not ok:
+                inputs.append(DefaultFedInputs())
+                continue
+            inputs.append(
+                DefaultFedInputs(
+                    co_volume_fraction_percent=co_pct[n],
+                    co2_volume_fraction_percent=co2_pct[n],
+                    o2_volume_fraction_percent=o2_pct[n],
+                    **{name: values[n] for name, values in optional.items()},
+                )
+            )
+        return inputs
+
 
 class DefaultFedModel:
     """Combine sampled gas fields with the default FDS+Evac FED equations."""
@@ -318,6 +400,18 @@ class DefaultFedModel:
         self.field = field
         self.config = config
 
+    def frame_key(self, time_s: float):
+        """Return the field's output frame at *time_s*, or None if unknown."""
+        frame_key = getattr(self.field, "frame_key", None)
+        return frame_key(time_s) if frame_key is not None else None
+
+    def changed_many(
+        self, time_a: float, time_b: float, xs: np.ndarray, ys: np.ndarray
+    ) -> np.ndarray | None:
+        """Return the field's change mask, or None if it cannot tell."""
+        changed_many = getattr(self.field, "changed_many", None)
+        return changed_many(time_a, time_b, xs, ys) if changed_many else None
+
     def sample_inputs(self, time_s: float, x: float, y: float) -> DefaultFedInputs:
         """Return the FED gas inputs at one time and x/y point."""
         return self.field.sample_inputs(time_s, x, y)
@@ -329,6 +423,22 @@ class DefaultFedModel:
         inputs = self.sample_inputs(time_s, x, y)
         return inputs, default_fed_rate_per_minute(inputs)
 
+    def sample_rates_many(
+        self, time_s: float, xs: np.ndarray, ys: np.ndarray
+    ) -> np.ndarray:
+        """Return FED rates in 1/min for arrays of x/y points at one time."""
+        many = getattr(self.field, "sample_inputs_many", None)
+        if many is not None:
+            inputs = many(time_s, xs, ys)
+        else:
+            inputs = [
+                self.field.sample_inputs(time_s, x, y)
+                for x, y in zip(np.asarray(xs).tolist(), np.asarray(ys).tolist())
+            ]
+        return np.array(
+            [default_fed_rate_per_minute(item) for item in inputs], dtype=float
+        )
+
     def advance(
         self,
         time_s: float,
@@ -0,0 +1,171 @@
+"""Caches that let agents share route evaluation work within a run."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class RouteRankingCache:
+    """Pass-scoped memo of ``rank_routes`` candidates.
+
+    Entries are keyed by ``(source, cognitive-map signature, exit_counts
+    version)``.  Only the agent-independent part of a ranking is stored;
+    ``rank_routes`` applies each agent's accumulated FED and visibility
+    checks on top.  Call ``clear()`` at the start of every reroute pass,
+    because the cached costs belong to one time step.
+
+    The exit_counts version is bumped, and all entries dropped, whenever
+    the counts seen by ``key()`` differ from the previous call.
+
+    ``weights()`` also keeps the pass's dynamic edge weights per
+    cognitive-map signature, for searches beyond the cached candidates.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[Hashable, list[Any]] = {}
+        self._weights: dict[Hashable, dict] = {}
+        self._exit_counts: tuple | None = None
+        self.exit_counts_version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        """Drop all entries (start of a new pass); statistics are kept."""
+        self._entries.clear()
+        self._weights.clear()
+
+    def key(
+        self,
+        source: str,
+        cognitive_map,
+        exit_counts: dict[str, int] | None,
+    ) -> Hashable:
+        """Return the cache key for one ranking request."""
+        counts = tuple(exit_counts.items()) if exit_counts is not None else None
+        if counts != self._exit_counts:
+            self._entries.clear()
+            self._exit_counts = counts
+            self.exit_counts_version += 1
+        signature = cognitive_map.signature() if cognitive_map is not None else None
+        return (
+            source,
+            signature,
+            self.exit_counts_version if counts is not None else None,
+        )
+
+    def get(self, key: Hashable) -> list[Any] | None:
+        """Return cached candidates for *key*, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, candidates: list[Any]) -> None:
+        """Store the candidates computed for *key*."""
+        self._entries[key] = candidates
+
+    def weights(self, cognitive_map, compute: Callable[[], dict]) -> dict:
+        """Return the dynamic weights of *cognitive_map*'s subgraph.
+
+        *compute* is called on the first request per signature in a pass.
+        """
+        signature = cognitive_map.signature() if cognitive_map is not None else None
+        weights = self._weights.get(signature)
+        if weights is None:
+            weights = self._weights[signature] = compute()
+        return weights
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def sampler_frame_key(time_s: float, *samplers) -> Hashable | None:
+    """Return the combined data-frame key of *samplers* at *time_s*.
+
+    Samplers that only change between discrete output frames expose
+    ``frame_key(time_s)``; two times with the same key sample identical
+    values.  ``None`` samplers are skipped.  Returns None when any other
+    sampler has no ``frame_key`` (or it returns None), meaning results
+    must not be reused across times.
+    """
+    keys = []
+    for sampler in samplers:
+        if sampler is None:
+            keys.append(None)
+            continue
+        frame_key = getattr(sampler, "frame_key", None)
+        key = frame_key(time_s) if frame_key is not None else None
+        if key is None:
+            return None
+        keys.append(key)
+    return tuple(keys)
+
+
+class SegmentCostCache:
+    """Segment costs keyed by FDS frame, shared across reroute passes.
+
+    Segment costs only change when the sampled fields move to another
+    output frame, so passes that fall between two FDS outputs reuse the
+    dict of the current frame instead of resampling.  At most
+    *max_frames* frame dicts are kept (least recently used evicted).
+
+    ``latest`` holds the most recently refreshed frame and the time each
+    of its edges was evaluated, so a new frame can reuse the edges the
+    smoke front has not reached (see ``route_graph.refresh_segments``).
+    """
+
+    def __init__(self, max_frames: int = 4) -> None:
+        if max_frames < 1:
+            raise ValueError(f"max_frames must be >= 1, got {max_frames}")
+        self.max_frames = max_frames
+        self._frames: OrderedDict[Hashable, dict[tuple[str, str], Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Most recently refreshed frame: (segments, evaluation time per edge).
+        self.latest: (
+            tuple[dict[tuple[str, str], Any], dict[tuple[str, str], float]] | None
+        ) = None
+        self.edges_evaluated = 0
+        self.edges_reused = 0
+
+    def record(
+        self,
+        segments: dict[tuple[str, str], Any],
+        evaluated_at: dict[tuple[str, str], float],
+        time_s: float,
+    ) -> None:
+        """Remember a freshly refreshed frame as the reference for the next."""
+        self.latest = (segments, evaluated_at)
+        evaluated = sum(1 for t in evaluated_at.values() if t == time_s)
+        self.edges_evaluated += evaluated
+        self.edges_reused += len(evaluated_at) - evaluated
+
+    def segments_for(self, frame_key: Hashable | None) -> dict[tuple[str, str], Any]:
+        """Return the mutable segment dict for *frame_key*.
+
+        A None key (time-continuous samplers) always yields a fresh dict.
+        """
+        if frame_key is None:
+            self.misses += 1
+            return {}
+        segments = self._frames.get(frame_key)
+        if segments is not None:
+            self._frames.move_to_end(frame_key)
+            self.hits += 1
+            return segments
+        self.misses += 1
+        segments = {}
+        self._frames[frame_key] = segments
+        if len(self._frames) > self.max_frames:
+            self._frames.popitem(last=False)
+        return segments
+
+    def __len__(self) -> int:
+        return len(self._frames)
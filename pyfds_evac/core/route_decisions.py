@@ -0,0 +1,549 @@
+"""Batched route decisions for all agents due in one reroute pass."""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .route_graph import (
+    AgentRouteState,
+    ExitCostTables,
+    ExtinctionSampler,
+    FedRateSampler,
+    RerouteConfig,
+    RouteCost,
+    RouteSwitch,
+    SegmentCost,
+    StageGraph,
+    _route_candidates,
+    reroute_agent,
+)
+
+if TYPE_CHECKING:
+    from .edge_time_table import EdgeTimeTable
+
+
+@dataclass(frozen=True)
+class RouteDecisions:
+    """Outcome of ``decide_routes``; every field is aligned with its inputs.
+
+    Attributes
+    ----------
+    ranked:
+        False for agents without a source in the graph or a reachable
+        exit; the other fields carry no decision for them.
+    switch:
+        True where the best exit differs from the agent's current exit.
+    new_exit, new_path:
+        Best exit and stage path (None where not ranked).
+    new_cost:
+        Composite cost of the best route (NaN where not ranked).
+    old_cost:
+        Composite cost of the current exit's route, NaN when that exit
+        was not among the ranked routes.
+    fallback:
+        True where every route was rejected and the least-bad one was
+        taken anyway.
+    """
+
+    ranked: np.ndarray
+    switch: np.ndarray
+    new_exit: list[str | None]
+    new_path: list[list[str] | None]
+    new_cost: np.ndarray
+    old_cost: np.ndarray
+    fallback: np.ndarray
+
+
+def decide_routes(
+    graph: StageGraph,
+    sources: Sequence[str | None],
+    current_exits: Sequence[str | None],
+    current_fed: Sequence[float],
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RerouteConfig,
+    *,
+    positions: Sequence[tuple[float, float] | None] | None = None,
+    cached_segments: dict[tuple[str, str], SegmentCost] | None = None,
+    exit_counts: dict[str, int] | None = None,
+    vis_model=None,
+    cognitive_maps: Sequence | None = None,
+    exit_tables: ExitCostTables | None = None,
+    first_legs: Sequence[dict[str, SegmentCost] | None] | None = None,
+    time_table: EdgeTimeTable | None = None,
+) -> RouteDecisions:
+    """Rank routes for many agents at once and pick each agent's best exit.
+
+    Applies the same costs, rejections and tie-breaking as
+    ``rank_routes`` followed by ``evaluate_and_reroute``.  The difference
+    is that every agent sees the same *exit_counts* snapshot instead of the
+    counts left by the agents before it.  Agents sharing a source and a
+    cognitive map signature share one set of candidate routes.  Their
+    FED shift, rejections and best-route choice are then computed as
+    ``(agents, routes)`` arrays.  Agents with an entry in *first_legs*
+    (from ``first_leg_segments``) get candidates of their own, unless a
+    *time_table* is given (see ``rank_routes``).
+
+    Nothing is mutated; pass the result to ``apply_route_decisions``.
+    """
+    n = len(sources)
+    ranked = np.zeros(n, dtype=bool)
+    switch = np.zeros(n, dtype=bool)
+    fallback = np.zeros(n, dtype=bool)
+    new_cost = np.full(n, math.nan)
+    old_cost = np.full(n, math.nan)
+    new_exit: list[str | None] = [None] * n
+    new_path: list[list[str] | None] = [None] * n
+
+    counts = exit_counts if config.cost_config.w_queue > 0 else None
+    for members, candidates, cost, rejected in _ranked_groups(
+        graph,
+        sources,
+        current_fed,
+        time_s,
+        extinction_sampler,
+        fed_rate_sampler,
+        config,
+        positions=positions,
+        cached_segments=cached_segments,
+        exit_counts=counts,
+        vis_model=vis_model,
+        cognitive_maps=cognitive_maps,
+        exit_tables=exit_tables,
+        first_legs=first_legs,
+        time_table=time_table,
+    ):
+        best = _best_columns(candidates, cost, rejected)
+        all_rejected = rejected.all(axis=1)
+        exit_column = {rc.exit_id: col for col, rc in enumerate(candidates)}
+        for row, agent in enumerate(members):
+            chosen = candidates[best[row]]
+            ranked[agent] = True
+            fallback[agent] = all_rejected[row]
+            new_exit[agent] = chosen.exit_id
+            new_path[agent] = chosen.path
+            new_cost[agent] = cost[row, best[row]]
+            old = current_exits[agent]
+            switch[agent] = old != chosen.exit_id
+            if old in exit_column:
+                old_cost[agent] = cost[row, exit_column[old]]
+
+    return RouteDecisions(
+        ranked=ranked,
+        switch=switch,
+        new_exit=new_exit,
+        new_path=new_path,
+        new_cost=new_cost,
+        old_cost=old_cost,
+        fallback=fallback,
+    )
+
+
+def assign_routes(
+    graph: StageGraph,
+    sources: Sequence[str | None],
+    current_exits: Sequence[str | None],
+    current_fed: Sequence[float],
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RerouteConfig,
+    *,
+    positions: Sequence[tuple[float, float] | None] | None = None,
+    cached_segments: dict[tuple[str, str], SegmentCost] | None = None,
+    exit_counts: dict[str, int] | None = None,
+    vis_model=None,
+    cognitive_maps: Sequence | None = None,
+    exit_tables: ExitCostTables | None = None,
+    first_legs: Sequence[dict[str, SegmentCost] | None] | None = None,
+    time_table: EdgeTimeTable | None = None,
+) -> RouteDecisions:
+    """Assign exits to all agents together by a min-cost flow solve.
+
+    Takes the same inputs as ``decide_routes``.  Each agent may use its
+    non-rejected routes, or only its fallback route when all of them
+    are rejected.  Route costs exclude the queue term.  Instead, the
+    k-th due agent sent to an exit pays ``w_queue * base_speed * (b + k
+    - 1) / capacity``.  Here ``b`` is the exit's count in *exit_counts*
+    minus the due agents currently heading there.  The solve minimises
+    the total over all agents.  It is deterministic, one solve per pass,
+    and independent of agent order.  Ties go to the lower exit ID and
+    agent index.
+
+    ``new_cost``/``old_cost`` include the queue term at the final exit
+    loads.
+    """
+    n = len(sources)
+    cost_config = config.cost_config
+    groups = list(
+        _ranked_groups(
+            graph,
+            sources,
+            current_fed,
+            time_s,
+            extinction_sampler,
+            fed_rate_sampler,
+            config,
+            positions=positions,
+            cached_segments=cached_segments,
+            exit_counts=None,
+            vis_model=vis_model,
+            cognitive_maps=cognitive_maps,
+            exit_tables=exit_tables,
+            first_legs=first_legs,
+            time_table=time_table,
+        )
+    )
+    exits = sorted({rc.exit_id for _, candidates, _, _ in groups for rc in candidates})
+    column = {exit_id: col for col, exit_id in enumerate(exits)}
+
+    # One row per ranked agent: composite cost per exit, inf if not allowed.
+    agents: list[int] = []
+    costs: list[np.ndarray] = []
+    paths: list[dict[str, list[str]]] = []
+    fallback = np.zeros(n, dtype=bool)
+    for members, candidates, cost, rejected in groups:
+        best = _best_columns(candidates, cost, rejected)
+        cols = np.array([column[rc.exit_id] for rc in candidates], dtype=np.intp)
+        for row, agent in enumerate(members):
+            allowed = ~rejected[row]
+            if not allowed.any():
+                fallback[agent] = True
+                allowed = np.zeros_like(allowed)
+                allowed[best[row]] = True
+            full = np.full(len(exits), math.inf)
+            full[cols[allowed]] = cost[row, allowed]
+            agents.append(agent)
+            costs.append(full)
+            paths.append({rc.exit_id: rc.path for rc in candidates})
+
+    queue_coef = np.zeros(len(exits))
+    base_load = np.zeros(len(exits))
+    if exit_counts is not None and cost_config.w_queue > 0:
+        for col, exit_id in enumerate(exits):
+            node = graph.nodes.get(exit_id)
+            capacity = (
+                node.capacity_agents_per_s
+                if node is not None and node.capacity_agents_per_s is not None
+                else cost_config.default_exit_capacity
+            )
+            if capacity > 0:
+                queue_coef[col] = (
+                    cost_config.w_queue * cost_config.base_speed_m_per_s / capacity
+                )
+            base_load[col] = exit_counts.get(exit_id, 0)
+        for agent in agents:
+            col = column.get(current_exits[agent])
+            if col is not None:
+                base_load[col] -= 1
+        np.maximum(base_load, 0.0, out=base_load)
+
+    matrix = np.array(costs).reshape(len(agents), len(exits))
+    assigned, load = _min_cost_assignment(matrix, queue_coef, base_load)
+
+    ranked = np.zeros(n, dtype=bool)
+    switch = np.zeros(n, dtype=bool)
+    new_cost = np.full(n, math.nan)
+    old_cost = np.full(n, math.nan)
+    new_exit: list[str | None] = [None] * n
+    new_path: list[list[str] | None] = [None] * n
+    queue_cost = queue_coef * np.maximum(base_load + load - 1.0, 0.0)
+    for row, agent in enumerate(agents):
+        col = assigned[row]
+        if col < 0:
+            continue
+        exit_id = exits[col]
+        ranked[agent] = True
+        new_exit[agent] = exit_id
+        new_path[agent] = paths[row][exit_id]
+        new_cost[agent] = matrix[row, col] + queue_cost[col]
+        old = current_exits[agent]
+        switch[agent] = old != exit_id
+        old_col = column.get(old)
+        if old_col is not None and math.isfinite(matrix[row, old_col]):
+            old_cost[agent] = matrix[row, old_col] + queue_cost[old_col]
+
+    return RouteDecisions(
+        ranked=ranked,
+        switch=switch,
+        new_exit=new_exit,
+        new_path=new_path,
+        new_cost=new_cost,
+        old_cost=old_cost,
+        fallback=fallback,
+    )
+
+
+def _min_cost_assignment(
+    cost: np.ndarray, queue_coef: np.ndarray, base_load: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Assign each row (agent) to one column (exit) at minimum total cost.
+
+    Successive shortest paths on the flow network ``source -> agent ->
+    exit -> sink``.  The k-th unit into exit ``e`` costs ``queue_coef[e]
+    * (base_load[e] + k - 1)``, which is convex, so the result is
+    optimal.  Paths are searched over the exits only: moving an assigned
+    agent from ``e`` to ``e'`` is an arc weighted by its cost difference.
+    Bellman-Ford handles these possibly negative arcs, and the residual
+    network has no negative cycles.
+
+    Returns ``(column per row or -1, units per column)``.
+    """
+    n_rows, n_cols = cost.shape
+    assigned = np.full(n_rows, -1, dtype=np.intp)
+    load = np.zeros(n_cols)
+    if n_cols == 0:
+        return assigned, load
+    rows = np.arange(n_rows)
+    for _ in range(n_rows):
+        free = np.flatnonzero(assigned < 0)
+        if free.size == 0:
+            break
+        free_cost = cost[free]
+        start_row = free[np.argmin(free_cost, axis=0)]
+        dist = free_cost.min(axis=0)
+
+        # Exchange arcs e -> e' through the cheapest agent to move.
+        hop = np.full((n_cols, n_cols), math.inf)
+        via = np.full((n_cols, n_cols), -1, dtype=np.intp)
+        held = assigned >= 0
+        if held.any():
+            held_rows = rows[held]
+            delta = cost[held_rows] - cost[held_rows, assigned[held_rows]][:, None]
+            for col in range(n_cols):
+                at_col = assigned[held_rows] == col
+                if at_col.any():
+                    cand = delta[at_col]
+                    pick = np.argmin(cand, axis=0)
+                    hop[col] = cand[pick, np.arange(n_cols)]
+                    via[col] = held_rows[at_col][pick]
+            np.fill_diagonal(hop, math.inf)
+
+        pred = np.full(n_cols, -1, dtype=np.intp)
+        for _ in range(n_cols - 1):
+            relaxed = dist[:, None] + hop
+            best_from = np.argmin(relaxed, axis=0)
+            best = relaxed[best_from, np.arange(n_cols)]
+            improve = best < dist
+            if not improve.any():
+                break
+            dist = np.where(improve, best, dist)
+            pred = np.where(improve, best_from, pred)
+
+        total = dist + queue_coef * (base_load + load)
+        end = int(np.argmin(total))
+        if not math.isfinite(total[end]):
+            break
+        # Walk back from the end exit and shift agents along the chain.
+        col = end
+        for _ in range(n_cols):
+            if pred[col] < 0:
+                break
+            prev = pred[col]
+            assigned[via[prev, col]] = col
+            col = prev
+        assigned[start_row[col]] = col
+        load[end] += 1.0
+    return assigned, load
+
+
+def _ranked_groups(
+    graph: StageGraph,
+    sources: Sequence[str | None],
+    current_fed: Sequence[float],
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RerouteConfig,
+    *,
+    positions,
+    cached_segments,
+    exit_counts,
+    vis_model,
+    cognitive_maps,
+    exit_tables,
+    first_legs=None,
+    time_table=None,
+):
+    """Yield ``(members, candidates, cost, rejected)`` per ranking group.
+
+    Agents sharing a source and a cognitive map signature form a group,
+    except that agents with first legs form one group each.
+    ``cost`` and ``rejected`` are ``(len(members), len(candidates))``
+    arrays with the agents' FED shift and visibility checks applied.
+    """
+    n = len(sources)
+    cost_config = config.cost_config
+    fed_now = np.asarray(current_fed, dtype=float).reshape(n)
+    groups: dict[tuple, list[int]] = {}
+    for i, source in enumerate(sources):
+        if source is None or source not in graph.nodes:
+            continue
+        cmap = cognitive_maps[i] if cognitive_maps is not None else None
+        signature = cmap.signature() if cmap is not None else None
+        own = (
+            time_table is None and first_legs is not None and first_legs[i] is not None
+        )
+        groups.setdefault((source, signature, i if own else None), []).append(i)
+
+    for (source, _signature, own), members in groups.items():
+        candidates = _route_candidates(
+            graph,
+            source,
+            time_s,
+            extinction_sampler,
+            fed_rate_sampler,
+            cost_config,
+            cached_segments=cached_segments,
+            exit_counts=exit_counts,
+            cognitive_map=(
+                cognitive_maps[members[0]] if cognitive_maps is not None else None
+            ),
+            exit_tables=exit_tables,
+            lazy_edges=config.lazy_edge_evaluation,
+            first_legs=first_legs[own] if own is not None else None,
+            time_table=time_table,
+        )
+        if not candidates:
+            continue
+        rows = np.array(members, dtype=np.intp)
+        cost, rejected = _shifted_costs(candidates, fed_now[rows], cost_config)
+        rejected |= _visibility_rejections(
+            graph,
+            source,
+            candidates,
+            rows,
+            rejected,
+            time_s,
+            positions,
+            vis_model,
+        )
+        yield members, candidates, cost, rejected
+
+
+def _best_columns(
+    candidates: list[RouteCost], cost: np.ndarray, rejected: np.ndarray
+) -> np.ndarray:
+    """Return each row's best candidate column, ranked like ``rank_routes``."""
+    # rank_routes sorts by (rejected, cost, path length); np.lexsort is
+    # stable, so full ties keep candidate order like list.sort().
+    path_len = np.broadcast_to(
+        np.array([len(rc.path) for rc in candidates]), cost.shape
+    )
+    return np.lexsort((path_len, cost, rejected), axis=-1)[:, 0]
+
+
+def _shifted_costs(
+    candidates: list[RouteCost], current_fed: np.ndarray, config
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(composite_cost, fed_rejected)`` per (agent, route).
+
+    Vectorised ``_with_current_fed``: the same operations in the same
+    order as ``_composite_cost``, so costs match the scalar path exactly.
+    """
+    length = np.array([rc.path_length_m for rc in candidates])
+    k_ave = np.array([rc.k_ave_route for rc in candidates])
+    fed_route = np.array([rc.fed_max_route for rc in candidates])
+    queue = np.array([rc.queue_time_s for rc in candidates])
+    fed_max = current_fed[:, np.newaxis] + fed_route
+    cost = length * (1.0 + config.w_smoke * k_ave) + config.w_fed * fed_max
+    queue_term = np.where(
+        queue > 0.0, config.w_queue * (config.base_speed_m_per_s * queue), 0.0
+    )
+    cost = np.where(queue > 0.0, cost + queue_term, cost)
+    return cost, fed_max > config.fed_rejection_threshold
+
+
+def _visibility_rejections(
+    graph: StageGraph,
+    source: str,
+    candidates: list[RouteCost],
+    rows: np.ndarray,
+    rejected: np.ndarray,
+    time_s: float,
+    positions,
+    vis_model,
+) -> np.ndarray:
+    """Return the extra visibility rejections ``rank_routes`` would apply."""
+    if vis_model is None:
+        # K_vis fallback: drop all-dark routes if some route has visibility.
+        lit = np.array([any(s.visible for s in rc.segments) for rc in candidates])
+        open_routes = ~rejected
+        any_visible = (open_routes & lit).any(axis=1)
+        return any_visible[:, np.newaxis] & open_routes & ~lit
+
+    src_node = graph.nodes.get(source)
+    next_nodes = [rc.path[1] if len(rc.path) > 1 else rc.exit_id for rc in candidates]
+    hidden = np.zeros_like(rejected)
+    for row, agent in enumerate(rows):
+        position = positions[agent] if positions is not None else None
+        if position is not None:
+            ax, ay = position
+        else:
+            ax = src_node.centroid_x if src_node is not None else 0.0
+            ay = src_node.centroid_y if src_node is not None else 0.0
+        for col, next_node in enumerate(next_nodes):
+            if not rejected[row, col] and not vis_model.node_is_visible(
+                time_s, ax, ay, next_node
+            ):
+                hidden[row, col] = True
+    return hidden
+
+
+def apply_route_decisions(
+    decisions: RouteDecisions,
+    agent_ids: Sequence[int],
+    wait_infos: Sequence[dict],
+    route_states: Sequence[AgentRouteState],
+    time_s: float,
+    exit_counts: dict[str, int] | None = None,
+) -> list[RouteSwitch]:
+    """Apply *decisions* through ``reroute_agent`` and return the switches.
+
+    Updates each ranked agent's ``AgentRouteState`` like
+    ``evaluate_and_reroute``.  Then *exit_counts* is adjusted once for all
+    switches: the old exit is decremented and the new exit incremented.
+    """
+    switches: list[RouteSwitch] = []
+    for i in np.flatnonzero(decisions.ranked):
+        state = route_states[i]
+        state.last_eval_time_s = time_s
+        path = decisions.new_path[i]
+        if not decisions.switch[i]:
+            state.current_path = path
+            continue
+        wait_info = wait_infos[i]
+        if not reroute_agent(wait_info, path, wait_info.get("stage_configs", {})):
+            continue
+        old_exit = state.current_exit
+        reason = "initial" if old_exit is None else "smoke_reroute"
+        if decisions.fallback[i]:
+            reason = "fallback"
+        state.current_exit = decisions.new_exit[i]
+        state.current_path = path
+        old_cost = decisions.old_cost[i]
+        switches.append(
+            RouteSwitch(
+                time_s=time_s,
+                agent_id=agent_ids[i],
+                old_exit=old_exit,
+                new_exit=decisions.new_exit[i],
+                old_cost=None if math.isnan(old_cost) else float(old_cost),
+                new_cost=float(decisions.new_cost[i]),
+                reason=reason,
+            )
+        )
+
+    if exit_counts is not None:
+        for switch in switches:
+            if switch.old_exit and switch.old_exit in exit_counts:
+                exit_counts[switch.old_exit] = max(0, exit_counts[switch.old_exit] - 1)
+            if switch.new_exit in exit_counts:
+                exit_counts[switch.new_exit] += 1
+    return switches
@@ -4,12 +4,27 @@ from __future__ import annotations
 
 import heapq
 import math
+from collections import ChainMap, OrderedDict
+from collections.abc import Callable, Hashable, Iterator
 from dataclasses import dataclass, field, replace
-from typing import Protocol
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol
 
+import numpy as np
+import shapely
 from shapely.geometry import Polygon
 
-from .smoke_speed import speed_factor_from_extinction
+from .compiled_graph import CompiledStageGraph
+from .edge_cache import EdgePolylineCache, walkable_hash
+from .smoke_speed import (
+    speed_factor_from_extinction,
+    speed_factor_from_extinction_many,
+)
+
+if TYPE_CHECKING:
+    from .cluster_graph import ClusterOverlay
+    from .cognitive_map import _GraphBits
+    from .edge_time_table import EdgeTimeTable
 
 _SECONDS_PER_MINUTE = 60.0
 
@@ -46,6 +61,23 @@ class StageGraph:
 
     nodes: dict[str, StageNode] = field(default_factory=dict)
     edges: dict[str, list[StageEdge]] = field(default_factory=dict)
+    _edge_index: dict[tuple[str, str], StageEdge] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _sample_tables: dict[float, EdgeSampleTable] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _compiled: CompiledStageGraph | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    # Restricted views by knowledge signature (cognitive_subgraph).
+    _views: OrderedDict[Hashable, StageGraph] = field(
+        default_factory=OrderedDict, init=False, repr=False, compare=False
+    )
+    # Cognitive-map masks of nodes and edges (cognitive_map._graph_bits).
+    _knowledge_bits: _GraphBits | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @classmethod
     def from_scenario(
@@ -54,6 +86,8 @@ class StageGraph:
         transitions: list[dict],
         distributions: dict | None = None,
         walkable_polygon=None,
+        edge_cache_path: str | Path | None = None,
+        workers: int = 1,
     ) -> StageGraph:
         """Build the stage graph from scenario data.
 
@@ -72,15 +106,22 @@ class StageGraph:
             Optional Shapely Polygon of the walkable area.  When provided,
             a JuPedSim RoutingEngine computes polyline waypoints for each
             edge; otherwise a straight centroid-to-centroid ray is used.
+        edge_cache_path:
+            Optional JSON file caching the RoutingEngine polylines across
+            runs (see ``EdgePolylineCache``).  Only edges whose endpoints
+            are not in the cache are computed; the engine itself is only
+            built when at least one edge is missing.
+        workers:
+            Number of processes computing RoutingEngine polylines.  Each
+            worker builds its own engine; with 1 (the default) they are
+            computed in this process.  Edge order and waypoints do not
+            depend on the worker count.
         """
         graph = cls()
 
-        routing_engine = None
-        if walkable_polygon is not None:
-            import jupedsim as jps  # lazy import; jupedsim not always required
-
-            routing_engine = jps.RoutingEngine(walkable_polygon)
-
+        # Collect node polygons first so centroids are computed in one
+        # vectorised call.
+        pending: list[tuple[str, Polygon, str, float | None]] = []
         # Add distribution nodes (not in direct_steering_info).
         if distributions:
             for dist_id, dist_info in distributions.items():
@@ -91,39 +132,42 @@ class StageGraph:
                     polygon = Polygon(coords)
                 if polygon is None:
                     continue
-                cx, cy = polygon.centroid.x, polygon.centroid.y
-                graph.nodes[dist_id] = StageNode(
-                    stage_id=dist_id,
-                    centroid_x=cx,
-                    centroid_y=cy,
-                    stage_type="distribution",
-                )
+                pending.append((dist_id, polygon, "distribution", None))
 
         # Add stage nodes from direct_steering_info.
         for stage_id, info in direct_steering_info.items():
             polygon = info.get("polygon")
             if polygon is None:
                 continue
-            cx, cy = polygon.centroid.x, polygon.centroid.y
-            stage_type = info.get("stage_type", "checkpoint")
-            graph.nodes[stage_id] = StageNode(
-                stage_id=stage_id,
-                centroid_x=cx,
-                centroid_y=cy,
-                stage_type=stage_type,
-                capacity_agents_per_s=info.get("capacity_agents_per_s"),
+            pending.append(
+                (
+                    stage_id,
+                    polygon,
+                    info.get("stage_type", "checkpoint"),
+                    info.get("capacity_agents_per_s"),
+                )
             )
 
-        # Add edges from transitions.
-        for tr in transitions:
-            src = tr.get("from", "")
-            tgt = tr.get("to", "")
-            if src not in graph.nodes or tgt not in graph.nodes:
-                continue
-            src_node = graph.nodes[src]
-            tgt_node = graph.nodes[tgt]
-            edge = _make_edge(src_node, tgt_node, routing_engine)
-            graph.edges.setdefault(src, []).append(edge)
+        if pending:
+            polygons = np.array([polygon for _, polygon, _, _ in pending], dtype=object)
+            centroids = shapely.get_coordinates(shapely.centroid(polygons))
+            for (node_id, _, stage_type, capacity), (cx, cy) in zip(
+                pending, centroids.tolist()
+            ):
+                graph.nodes[node_id] = StageNode(
+                    stage_id=node_id,
+                    centroid_x=cx,
+                    centroid_y=cy,
+                    stage_type=stage_type,
+                    capacity_agents_per_s=capacity,
+                )
+
+        # Edges from transitions, in transition order.
+        pairs: list[tuple[str, str]] = [
+            (tr.get("from", ""), tr.get("to", ""))
+            for tr in transitions
+            if tr.get("from", "") in graph.nodes and tr.get("to", "") in graph.nodes
+        ]
 
         # When no transitions are defined and the graph contains only
         # distributions and exits, auto-connect every distribution to every
@@ -135,15 +179,70 @@ class StageGraph:
                 nid for nid, n in graph.nodes.items() if n.stage_type == "distribution"
             ]
             exit_ids = [nid for nid, n in graph.nodes.items() if n.stage_type == "exit"]
-            for src_id in dist_ids:
-                for tgt_id in exit_ids:
-                    edge = _make_edge(
-                        graph.nodes[src_id], graph.nodes[tgt_id], routing_engine
-                    )
-                    graph.edges.setdefault(src_id, []).append(edge)
+            pairs = [(src_id, tgt_id) for src_id in dist_ids for tgt_id in exit_ids]
+
+        compute_waypoints = None
+        if walkable_polygon is not None and pairs:
+            edge_cache = None
+            if edge_cache_path is not None:
+                edge_cache = EdgePolylineCache(
+                    edge_cache_path, walkable_hash(walkable_polygon)
+                )
+            waypoints = _edge_waypoints(
+                walkable_polygon,
+                [
+                    (_centroid(graph.nodes[src]), _centroid(graph.nodes[tgt]))
+                    for src, tgt in pairs
+                ],
+                edge_cache,
+                workers,
+            )
+            if edge_cache is not None:
+                edge_cache.save()
 
+            def compute_waypoints(start, end):
+                return list(waypoints[(start, end)])
+
+        for src, tgt in pairs:
+            edge = _make_edge(graph.nodes[src], graph.nodes[tgt], compute_waypoints)
+            graph.edges.setdefault(src, []).append(edge)
         return graph
 
+    def invalidate(self) -> None:
+        """Drop every cache derived from ``nodes`` and ``edges``.
+
+        Call after changing the graph in place without changing its node
+        or edge count (replacing or re-weighting an edge, moving a node).
+        Count changes are detected by ``compiled``, which then calls this.
+        """
+        self._edge_index = None
+        self._sample_tables.clear()
+        self._compiled = None
+        self._views.clear()
+        self._knowledge_bits = None
+
+    def edge(self, source: str, target: str) -> StageEdge | None:
+        """Return the first edge from *source* to *target*, or None."""
+        if self._edge_index is None:
+            index: dict[tuple[str, str], StageEdge] = {}
+            for edges in self.edges.values():
+                for edge in edges:
+                    index.setdefault((edge.source, edge.target), edge)
+            self._edge_index = index
+        return self._edge_index.get((source, target))
+
+    def edge_sample_table(self, step_m: float) -> EdgeSampleTable:
+        """Return the precomputed extinction sample geometry for every edge.
+
+        Edge geometry is fixed once the graph is built, so the table is
+        computed on first use for each *step_m* and cached on the graph.
+        """
+        table = self._sample_tables.get(step_m)
+        if table is None:
+            table = EdgeSampleTable.build(self, step_m)
+            self._sample_tables[step_m] = table
+        return table
+
     def exit_nodes(self) -> list[str]:
         """Return IDs of all exit stages."""
         return [sid for sid, node in self.nodes.items() if node.stage_type == "exit"]
@@ -167,85 +266,244 @@ class StageGraph:
         When *dynamic_weights* is provided, edge costs are looked up from
         the dict instead of using static Euclidean weights.
         """
-        dist, prev = self._dijkstra(source, dynamic_weights=dynamic_weights)
+        compiled = self.compiled()
+        u = compiled.index.get(source)
+        if u is None:
+            return {}
+        dist, prev = compiled.dijkstra(u, compiled.weights_for(dynamic_weights))
         results: dict[str, tuple[float, list[str]]] = {}
-        for exit_id in self.exit_nodes():
-            if exit_id in dist and math.isfinite(dist[exit_id]):
-                path = self._reconstruct(prev, source, exit_id)
-                results[exit_id] = (dist[exit_id], path)
+        for e in compiled.exit_indices:
+            if math.isfinite(dist[e]):
+                path = compiled.path(prev, u, e)
+                results[compiled.node_ids[e]] = (dist[e], path)
         return results
 
-    def shortest_exit(self, source: str) -> tuple[str, float, list[str]] | None:
-        """Return (exit_id, cost, path) for the nearest exit from *source*.
+    def k_shortest_paths(
+        self,
+        source: str,
+        target: str,
+        dynamic_weights: dict[tuple[str, str], float] | None = None,
+    ) -> Iterator[tuple[float, list[str]]]:
+        """Yield loopless ``(cost, path)`` from *source* to *target*, cheapest first.
 
-        Returns None if no exit is reachable.
+        Paths are generated lazily (Yen's algorithm), so stop iterating
+        once a usable one is found.  *dynamic_weights* as in
+        ``shortest_paths_to_exits``.
         """
-        candidates = self.shortest_paths_to_exits(source)
-        if not candidates:
+        compiled = self.compiled()
+        u = compiled.index.get(source)
+        v = compiled.index.get(target)
+        if u is None or v is None:
+            return
+        for cost, nodes in compiled.k_shortest_paths(
+            u, v, compiled.weights_for(dynamic_weights)
+        ):
+            yield cost, [compiled.node_ids[i] for i in nodes]
+
+    def shortest_path(
+        self,
+        source: str,
+        target: str,
+        dynamic_weights: dict[tuple[str, str], float] | None = None,
+    ) -> tuple[float, list[str]] | None:
+        """Return ``(cost, path)`` from *source* to *target*, or None.
+
+        Uses A* with the straight-line distance to *target*, so only the
+        part of the graph towards the target is explored.
+        *dynamic_weights* as in ``shortest_paths_to_exits``.
+        """
+        compiled = self.compiled()
+        u = compiled.index.get(source)
+        v = compiled.index.get(target)
+        if u is None or v is None:
+            return None
+        found = compiled.astar(u, (v,), compiled.weights_for(dynamic_weights))
+        if found is None:
             return None
-        best_exit = min(candidates, key=lambda eid: candidates[eid][0])
-        cost, path = candidates[best_exit]
-        return best_exit, cost, path
+        cost, nodes = found
+        return cost, [compiled.node_ids[i] for i in nodes]
 
-    def _dijkstra(
+    def shortest_exit(
         self,
         source: str,
         dynamic_weights: dict[tuple[str, str], float] | None = None,
-    ) -> tuple[dict[str, float], dict[str, str | None]]:
-        """Run Dijkstra from *source*.  Returns (dist, prev) dicts.
+    ) -> tuple[str, float, list[str]] | None:
+        """Return (exit_id, cost, path) for the nearest exit from *source*.
+
+        One A* search towards the closest exit; it stops at the first
+        exit settled.  Returns None if no exit is reachable.
+        """
+        compiled = self.compiled()
+        u = compiled.index.get(source)
+        if u is None:
+            return None
+        found = compiled.astar(
+            u, compiled.exit_indices, compiled.weights_for(dynamic_weights)
+        )
+        if found is None:
+            return None
+        cost, nodes = found
+        path = [compiled.node_ids[i] for i in nodes]
+        return path[-1], cost, path
 
-        When *dynamic_weights* is provided, edge cost is looked up from
-        the dict instead of using the static edge weight.  Keys are
-        ``(source_id, target_id)`` tuples.
+    def compiled(self) -> CompiledStageGraph:
+        """Return the integer-indexed CSR form used by the path queries.
+
+        Built on first use and rebuilt after ``invalidate`` or when the
+        node or edge count has changed since; a count change also drops
+        the other derived caches.
         """
-        if source not in self.nodes:
-            return {}, {}
-        dist: dict[str, float] = {sid: math.inf for sid in self.nodes}
-        prev: dict[str, str | None] = {sid: None for sid in self.nodes}
-        dist[source] = 0.0
-        heap: list[tuple[float, str]] = [(0.0, source)]
-
-        while heap:
-            d, u = heapq.heappop(heap)
-            if d > dist[u]:
+        shape = (len(self.nodes), sum(len(e) for e in self.edges.values()))
+        if self._compiled is not None and self._compiled.shape != shape:
+            self.invalidate()
+        if self._compiled is None:
+            self._compiled = CompiledStageGraph(self)
+        return self._compiled
+
+    def exit_cost_tables(
+        self,
+        dynamic_weights: dict[tuple[str, str], float] | None = None,
+    ) -> ExitCostTables:
+        """Run one reverse Dijkstra per exit over the (dynamic) edge weights.
+
+        The result holds, for every exit, the cost-to-exit and the next hop
+        of every node that can reach it.  All agents routed on this graph
+        during one reroute pass can share the tables; per-agent shortest
+        paths then become table lookups (see ``ExitCostTables.paths_from``).
+        """
+        compiled = self.compiled()
+        weights = compiled.weights_for(dynamic_weights)
+        node_ids = compiled.node_ids
+        cost_to_exit: dict[str, dict[str, float]] = {}
+        next_hop: dict[str, dict[str, str | None]] = {}
+        for e in compiled.exit_indices:
+            dist, nxt = compiled.reverse_dijkstra(e, weights)
+            exit_id = node_ids[e]
+            cost_to_exit[exit_id] = {node_ids[u]: d for u, d in dist.items()}
+            next_hop[exit_id] = {
+                node_ids[u]: (node_ids[v] if v != -1 else None) for u, v in nxt.items()
+            }
+        return ExitCostTables(cost_to_exit=cost_to_exit, next_hop=next_hop)
+
+
+@dataclass(frozen=True)
+class ExitCostTables:
+    """Cost-to-exit and next-hop tables shared by all agents in one pass.
+
+    ``cost_to_exit[exit_id][node_id]`` is the cheapest cost from *node_id*
+    to *exit_id*; ``next_hop[exit_id][node_id]`` is the following stage on
+    that path (None at the exit itself).  Nodes that cannot reach an exit
+    are absent from its tables.
+    """
+
+    cost_to_exit: dict[str, dict[str, float]]
+    next_hop: dict[str, dict[str, str | None]]
+
+    def paths_from(self, source: str) -> dict[str, tuple[float, list[str]]]:
+        """Return exit_id -> (cost, path), like ``shortest_paths_to_exits``."""
+        results: dict[str, tuple[float, list[str]]] = {}
+        for exit_id, dist in self.cost_to_exit.items():
+            cost = dist.get(source)
+            if cost is None or not math.isfinite(cost):
                 continue
-            for edge in self.edges.get(u, []):
-                if dynamic_weights is not None:
-                    w = dynamic_weights.get((edge.source, edge.target), edge.weight)
-                else:
-                    w = edge.weight
-                alt = d + w
-                if alt < dist[edge.target]:
-                    dist[edge.target] = alt
-                    prev[edge.target] = u
-                    heapq.heappush(heap, (alt, edge.target))
-
-        return dist, prev
-
-    @staticmethod
-    def _reconstruct(
-        prev: dict[str, str | None], source: str, target: str
-    ) -> list[str]:
-        """Reconstruct path from prev pointers."""
-        path: list[str] = []
-        cur: str | None = target
-        while cur is not None:
+            results[exit_id] = (cost, self.path(source, exit_id))
+        return results
+
+    def path(self, source: str, exit_id: str) -> list[str]:
+        """Return the stage path from *source* to *exit_id* (must be reachable)."""
+        nxt = self.next_hop[exit_id]
+        path = [source]
+        cur = source
+        while cur != exit_id:
+            cur = nxt[cur]
             path.append(cur)
-            if cur == source:
-                break
-            cur = prev.get(cur)
-        path.reverse()
         return path
 
 
-def _make_edge(src_node: StageNode, tgt_node: StageNode, routing_engine) -> StageEdge:
-    """Build a StageEdge between two nodes using polyline or straight-line geometry."""
-    if routing_engine is not None:
-        waypoints = list(
-            routing_engine.compute_waypoints(
-                (src_node.centroid_x, src_node.centroid_y),
-                (tgt_node.centroid_x, tgt_node.centroid_y),
+# RoutingEngine of a polyline worker process (see _edge_waypoints).
+_WORKER_ENGINE = None
+
+
+def _init_waypoint_worker(walkable_polygon) -> None:
+    """Build the RoutingEngine of one worker process."""
+    global _WORKER_ENGINE
+    import jupedsim as jps  # lazy import; jupedsim not always required
+
+    _WORKER_ENGINE = jps.RoutingEngine(walkable_polygon)
+
+
+def _worker_waypoints(endpoints: tuple[tuple[float, float], tuple[float, float]]):
+    """Compute one edge polyline in a worker process."""
+    return list(_WORKER_ENGINE.compute_waypoints(*endpoints))
+
+
+def _centroid(node: StageNode) -> tuple[float, float]:
+    return node.centroid_x, node.centroid_y
+
+
+def _edge_waypoints(
+    walkable_polygon,
+    endpoints: list[tuple[tuple[float, float], tuple[float, float]]],
+    edge_cache: EdgePolylineCache | None,
+    workers: int = 1,
+) -> dict[tuple[tuple[float, float], tuple[float, float]], list]:
+    """Return RoutingEngine waypoints for each (start, end) pair.
+
+    Pairs found in *edge_cache* are not recomputed, and the engine is
+    only built when at least one pair is missing.  With *workers* > 1
+    the missing pairs are split over a process pool whose workers each
+    build their own engine; results are collected in input order.
+    """
+    waypoints: dict = {}
+    missing = []
+    for pair in dict.fromkeys(endpoints):
+        cached = edge_cache.get(*pair) if edge_cache is not None else None
+        if cached is not None:
+            waypoints[pair] = cached
+        else:
+            missing.append(pair)
+    if not missing:
+        return waypoints
+
+    if workers > 1 and len(missing) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        n_workers = min(workers, len(missing))
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_waypoint_worker,
+            initargs=(walkable_polygon,),
+        ) as pool:
+            computed = list(
+                pool.map(
+                    _worker_waypoints,
+                    missing,
+                    chunksize=max(1, len(missing) // (4 * n_workers)),
+                )
             )
+    else:
+        import jupedsim as jps  # lazy import; jupedsim not always required
+
+        routing_engine = jps.RoutingEngine(walkable_polygon)
+        computed = [
+            list(routing_engine.compute_waypoints(start, end)) for start, end in missing
+        ]
+
+    for pair, points in zip(missing, computed):
+        waypoints[pair] = points
+        if edge_cache is not None:
+            edge_cache.put(*pair, points)
+    return waypoints
+
+
+def _make_edge(
+    src_node: StageNode, tgt_node: StageNode, compute_waypoints=None
+) -> StageEdge:
+    """Build a StageEdge between two nodes using polyline or straight-line geometry."""
+    if compute_waypoints is not None:
+        waypoints = compute_waypoints(
+            (src_node.centroid_x, src_node.centroid_y),
+            (tgt_node.centroid_x, tgt_node.centroid_y),
         )
     else:
         waypoints = [
@@ -328,18 +586,14 @@ def integrated_extinction_along_los(
     """
     if step_m <= 0:
         raise ValueError(f"step_m must be positive, got {step_m}")
-    length = _euclidean(x_from, y_from, x_to, y_to)
-    if length < 1e-9:
+    points = _los_sample_points(x_from, y_from, x_to, y_to, step_m)
+    if len(points) == 1:
         return extinction_sampler.sample_extinction(time_s, x_from, y_from)
 
-    n_samples = max(2, int(math.ceil(length / step_m)) + 1)
     total = 0.0
-    for i in range(n_samples):
-        t = i / (n_samples - 1)
-        x = x_from + t * (x_to - x_from)
-        y = y_from + t * (y_to - y_from)
+    for x, y in points:
         total += extinction_sampler.sample_extinction(time_s, x, y)
-    return total / n_samples
+    return total / len(points)
 
 
 def integrated_extinction_along_polyline(
@@ -364,23 +618,41 @@ def integrated_extinction_along_polyline(
 
     total_k = 0.0
     total_samples = 0
+    for x, y in _polyline_sample_points(waypoints, step_m):
+        total_k += extinction_sampler.sample_extinction(time_s, x, y)
+        total_samples += 1
+
+    return total_k / total_samples if total_samples > 0 else 0.0
+
+
+def _los_sample_points(
+    x_from: float, y_from: float, x_to: float, y_to: float, step_m: float
+) -> list[tuple[float, float]]:
+    """Return the uniform sample points along one straight ray.
+
+    A degenerate ray (shorter than 1e-9 m) yields only its start point.
+    """
+    length = _euclidean(x_from, y_from, x_to, y_to)
+    if length < 1e-9:
+        return [(x_from, y_from)]
+    n_samples = max(2, int(math.ceil(length / step_m)) + 1)
+    points = []
+    for i in range(n_samples):
+        t = i / (n_samples - 1)
+        points.append((x_from + t * (x_to - x_from), y_from + t * (y_to - y_from)))
+    return points
+
+
+def _polyline_sample_points(
+    waypoints: list[tuple[float, float]], step_m: float
+) -> list[tuple[float, float]]:
+    """Return the sample points of every polyline segment, in order."""
+    points = []
     for i in range(len(waypoints) - 1):
         x0, y0 = waypoints[i]
         x1, y1 = waypoints[i + 1]
-        seg_len = _euclidean(x0, y0, x1, y1)
-        if seg_len < 1e-9:
-            total_k += extinction_sampler.sample_extinction(time_s, x0, y0)
-            total_samples += 1
-            continue
-        n_samples = max(2, int(math.ceil(seg_len / step_m)) + 1)
-        for j in range(n_samples):
-            t = j / (n_samples - 1)
-            x = x0 + t * (x1 - x0)
-            y = y0 + t * (y1 - y0)
-            total_k += extinction_sampler.sample_extinction(time_s, x, y)
-            total_samples += 1
-
-    return total_k / total_samples if total_samples > 0 else 0.0
+        points.extend(_los_sample_points(x0, y0, x1, y1, step_m))
+    return points
 
 
 def _polyline_midpoint(
@@ -414,6 +686,150 @@ def _polyline_midpoint(
     return waypoints[-1]
 
 
+@dataclass(frozen=True)
+class EdgeSampleTable:
+    """Fixed extinction sample geometry for every edge of a stage graph.
+
+    Sample points reproduce the sequence used by ``evaluate_segment``
+    (polyline waypoints, or the centroid-to-centroid ray when an edge has
+    fewer than two waypoints), concatenated over all edges in ``keys``
+    order.  Tables built once per graph (``build``) have read-only
+    arrays, which lets field samplers cache the grid cells they map to.
+    Per-call tables (``for_edges``, ``subset``, first legs) stay writable
+    so they do not evict those cached locations.
+
+    Attributes
+    ----------
+    keys:
+        ``(source, target)`` per row.
+    lengths:
+        Edge length in metres per row.
+    offsets:
+        Start index of each row's samples in ``xs``/``ys``; the final
+        entry is the total sample count.
+    xs, ys:
+        Concatenated sample coordinates.
+    mid_xs, mid_ys:
+        Midpoint per row, where the FED rate is sampled.
+    gather:
+        ``(rows, max_samples)`` indices into ``xs`` for summing each
+        row's samples in order; padded slots are masked by ``mask``.
+    """
+
+    keys: tuple[tuple[str, str], ...]
+    lengths: np.ndarray
+    offsets: np.ndarray
+    xs: np.ndarray
+    ys: np.ndarray
+    mid_xs: np.ndarray
+    mid_ys: np.ndarray
+    gather: np.ndarray
+    mask: np.ndarray
+
+    @classmethod
+    def build(cls, graph: StageGraph, step_m: float) -> EdgeSampleTable:
+        """Compute the sample geometry for every distinct edge of *graph*."""
+        if step_m <= 0:
+            raise ValueError(f"step_m must be positive, got {step_m}")
+        rows = []
+        seen: set[tuple[str, str]] = set()
+        for edges in graph.edges.values():
+            for edge in edges:
+                key = (edge.source, edge.target)
+                if key not in seen:
+                    seen.add(key)
+                    rows.append((key, *_edge_sample_geometry(graph, edge, step_m)))
+        return cls._from_rows(rows, cache=True)
+
+    @classmethod
+    def for_edges(
+        cls, graph: StageGraph, edges: list[StageEdge], step_m: float
+    ) -> EdgeSampleTable:
+        """Compute the sample geometry of *edges* only, in the given order."""
+        return cls._from_rows(
+            [
+                (
+                    (edge.source, edge.target),
+                    *_edge_sample_geometry(graph, edge, step_m),
+                )
+                for edge in edges
+            ]
+        )
+
+    @classmethod
+    def _from_rows(cls, rows: list, *, cache: bool = False) -> EdgeSampleTable:
+        """Assemble a table from ``(key, length, points, midpoint)`` rows.
+
+        With *cache* the arrays are made read-only, so samplers cache the
+        located grid cells of the table's points.
+        """
+        counts = [len(points) for _, _, points, _ in rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.intp)
+        np.cumsum(counts, out=offsets[1:])
+        coords = [point for _, _, points, _ in rows for point in points]
+        xs = np.array([p[0] for p in coords], dtype=float)
+        ys = np.array([p[1] for p in coords], dtype=float)
+        width = max(counts, default=0)
+        columns = np.arange(width, dtype=np.intp)
+        mask = columns[np.newaxis, :] < np.array(counts, dtype=np.intp)[:, np.newaxis]
+        gather = np.where(mask, offsets[:-1, np.newaxis] + columns, 0)
+        arrays = {
+            "lengths": np.array([row[1] for row in rows], dtype=float),
+            "offsets": offsets,
+            "xs": xs,
+            "ys": ys,
+            "mid_xs": np.array([row[3][0] for row in rows], dtype=float),
+            "mid_ys": np.array([row[3][1] for row in rows], dtype=float),
+            "gather": gather,
+            "mask": mask,
+        }
+        if cache:
+            for array in arrays.values():
+                array.flags.writeable = False
+        return cls(keys=tuple(row[0] for row in rows), **arrays)
+
+    def subset(self, keys: list[tuple[str, str]]) -> EdgeSampleTable:
+        """Return a table restricted to *keys*, in the given order."""
+        index = {key: row for row, key in enumerate(self.keys)}
+        rows = []
+        for key in keys:
+            row = index[key]
+            start, stop = self.offsets[row], self.offsets[row + 1]
+            rows.append(
+                (
+                    key,
+                    float(self.lengths[row]),
+                    list(
+                        zip(self.xs[start:stop].tolist(), self.ys[start:stop].tolist())
+                    ),
+                    (float(self.mid_xs[row]), float(self.mid_ys[row])),
+                )
+            )
+        return self._from_rows(rows)
+
+
+def _edge_sample_geometry(
+    graph: StageGraph, edge: StageEdge, step_m: float
+) -> tuple[float, list[tuple[float, float]], tuple[float, float]]:
+    """Return ``(length, sample_points, midpoint)`` for one edge."""
+    waypoints = edge.waypoints
+    if waypoints and len(waypoints) >= 2:
+        return (
+            _polyline_length(waypoints),
+            _polyline_sample_points(waypoints, step_m),
+            _polyline_midpoint(waypoints),
+        )
+    src_node = graph.nodes[edge.source]
+    tgt_node = graph.nodes[edge.target]
+    x0, y0 = src_node.centroid_x, src_node.centroid_y
+    x1, y1 = tgt_node.centroid_x, tgt_node.centroid_y
+    return (
+        _euclidean(x0, y0, x1, y1),
+        _los_sample_points(x0, y0, x1, y1, step_m),
+        ((x0 + x1) / 2, (y0 + y1) / 2),
+    )
+
+
 class FedRateSampler(Protocol):
     """Anything that can return a FED rate in 1/min at a point and time."""
 
@@ -523,12 +939,8 @@ def evaluate_segment(
     src_node = graph.nodes[source]
     tgt_node = graph.nodes[target]
 
-    # Look up edge waypoints.
-    waypoints = None
-    for edge in graph.edges.get(source, []):
-        if edge.target == target:
-            waypoints = edge.waypoints
-            break
+    edge = graph.edge(source, target)
+    waypoints = edge.waypoints if edge is not None else None
 
     length, k_avg = _sample_segment_extinction(
         src_node,
@@ -571,6 +983,239 @@ def evaluate_segment(
     )
 
 
+def evaluate_segments(
+    graph: StageGraph,
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+    *,
+    keys: list[tuple[str, str]] | None = None,
+) -> dict[tuple[str, str], SegmentCost]:
+    """Evaluate many edges at once; results match ``evaluate_segment``.
+
+    Samples the whole ``graph.edge_sample_table`` (or the rows for
+    *keys*) with one batched call per field when the samplers provide
+    ``sample_extinction_many`` / ``sample_fed_rate_many``, and falls back
+    to per-point calls otherwise.
+    """
+    table = graph.edge_sample_table(config.sampling_step_m)
+    if keys is not None and list(keys) != list(table.keys):
+        table = table.subset(keys)
+    return _evaluate_table(table, time_s, extinction_sampler, fed_rate_sampler, config)
+
+
+def _evaluate_table(
+    table: EdgeSampleTable,
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+) -> dict[tuple[str, str], SegmentCost]:
+    """Evaluate every row of *table*; the body of ``evaluate_segments``."""
+    if not table.keys:
+        return {}
+
+    k_samples = _sample_extinction_many(extinction_sampler, time_s, table.xs, table.ys)
+    # Sum each row's samples column by column so the floating-point
+    # accumulation order matches the scalar integrators exactly.
+    padded = np.where(table.mask, k_samples[table.gather], 0.0)
+    k_total = np.zeros(len(table.keys))
+    for column in range(padded.shape[1]):
+        k_total += padded[:, column]
+    k_avg = k_total / np.diff(table.offsets)
+
+    sf = speed_factor_from_extinction_many(
+        k_avg,
+        alpha=config.alpha,
+        beta=config.beta,
+        min_speed_factor=config.min_speed_factor,
+    )
+    effective_speed = config.base_speed_m_per_s * sf
+    with np.errstate(divide="ignore", invalid="ignore"):
+        travel_time = np.where(
+            effective_speed > 1e-9, table.lengths / effective_speed, math.inf
+        )
+    if fed_rate_sampler is not None:
+        fed_rate = _sample_fed_rate_many(
+            fed_rate_sampler, time_s, table.mid_xs, table.mid_ys
+        )
+        with np.errstate(invalid="ignore"):
+            fed_growth = fed_rate * travel_time / _SECONDS_PER_MINUTE
+    else:
+        fed_growth = np.zeros(len(table.keys))
+    visible = k_avg < config.visibility_extinction_threshold
+
+    return {
+        key: SegmentCost(
+            source=key[0],
+            target=key[1],
+            length_m=length,
+            k_avg=k,
+            speed_factor=factor,
+            travel_time_s=travel,
+            fed_growth=growth,
+            visible=vis,
+        )
+        for key, length, k, factor, travel, growth, vis in zip(
+            table.keys,
+            table.lengths.tolist(),
+            k_avg.tolist(),
+            sf.tolist(),
+            travel_time.tolist(),
+            fed_growth.tolist(),
+            visible.tolist(),
+        )
+    }
+
+
+def refresh_segments(
+    graph: StageGraph,
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+    previous: dict[tuple[str, str], SegmentCost] | None = None,
+    evaluated_at: dict[tuple[str, str], float] | None = None,
+    *,
+    extinction_tolerance: float = 0.0,
+) -> tuple[dict[tuple[str, str], SegmentCost], dict[tuple[str, str], float]]:
+    """Evaluate every edge at *time_s*, reusing unchanged edges of *previous*.
+
+    An edge keeps its previous cost when, since the time it was evaluated
+    (``evaluated_at``), none of its extinction sample cells changed by
+    more than *extinction_tolerance* and the gas cells at its FED
+    midpoint did not change.  This needs ``changed_many`` on both
+    samplers; otherwise every edge is evaluated.  With the default
+    tolerance of 0 the result equals ``evaluate_segments``.
+
+    Returns ``(segments, evaluated_at)`` for the next refresh.
+    """
+    table = graph.edge_sample_table(config.sampling_step_m)
+    dirty = _dirty_edge_rows(
+        table,
+        time_s,
+        extinction_sampler,
+        fed_rate_sampler,
+        previous,
+        evaluated_at,
+        extinction_tolerance,
+    )
+    if dirty is None:
+        segments = evaluate_segments(
+            graph, time_s, extinction_sampler, fed_rate_sampler, config
+        )
+        return segments, dict.fromkeys(segments, time_s)
+
+    dirty_keys = [key for key, is_dirty in zip(table.keys, dirty.tolist()) if is_dirty]
+    fresh = (
+        evaluate_segments(
+            graph,
+            time_s,
+            extinction_sampler,
+            fed_rate_sampler,
+            config,
+            keys=dirty_keys,
+        )
+        if dirty_keys
+        else {}
+    )
+    segments: dict[tuple[str, str], SegmentCost] = {}
+    times: dict[tuple[str, str], float] = {}
+    for key in table.keys:
+        if key in fresh:
+            segments[key] = fresh[key]
+            times[key] = time_s
+        else:
+            segments[key] = previous[key]
+            times[key] = evaluated_at[key]
+    return segments, times
+
+
+def _dirty_edge_rows(
+    table: EdgeSampleTable,
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    previous: dict[tuple[str, str], SegmentCost] | None,
+    evaluated_at: dict[tuple[str, str], float] | None,
+    extinction_tolerance: float,
+) -> np.ndarray | None:
+    """Return a per-row mask of edges to re-evaluate, or None for all."""
+    if not previous or evaluated_at is None or not table.keys:
+        return None
+    extinction_changed = getattr(extinction_sampler, "changed_many", None)
+    fed_changed = (
+        getattr(fed_rate_sampler, "changed_many", None)
+        if fed_rate_sampler is not None
+        else None
+    )
+    if extinction_changed is None or (
+        fed_rate_sampler is not None and fed_changed is None
+    ):
+        return None
+
+    origin = np.array(
+        [
+            evaluated_at.get(key, math.nan) if key in previous else math.nan
+            for key in table.keys
+        ]
+    )
+    dirty = np.isnan(origin)
+    for origin_time in np.unique(origin[~dirty]).tolist():
+        changed = extinction_changed(
+            origin_time,
+            time_s,
+            table.xs,
+            table.ys,
+            tolerance=extinction_tolerance,
+        )
+        if changed is None:
+            return None
+        row_changed = np.logical_or.reduceat(changed, table.offsets[:-1])
+        if fed_changed is not None:
+            midpoint_changed = fed_changed(
+                origin_time, time_s, table.mid_xs, table.mid_ys
+            )
+            if midpoint_changed is None:
+                return None
+            row_changed |= midpoint_changed
+        dirty |= (origin == origin_time) & row_changed
+    return dirty
+
+
+def _sample_extinction_many(
+    sampler: ExtinctionSampler, time_s: float, xs: np.ndarray, ys: np.ndarray
+) -> np.ndarray:
+    """Sample extinction at many points, batched when the sampler supports it."""
+    many = getattr(sampler, "sample_extinction_many", None)
+    if many is not None:
+        return np.asarray(many(time_s, xs, ys), dtype=float)
+    return np.array(
+        [
+            sampler.sample_extinction(time_s, x, y)
+            for x, y in zip(xs.tolist(), ys.tolist())
+        ],
+        dtype=float,
+    )
+
+
+def _sample_fed_rate_many(
+    sampler: FedRateSampler, time_s: float, xs: np.ndarray, ys: np.ndarray
+) -> np.ndarray:
+    """Sample FED rates at many points, batched when the sampler supports it."""
+    many = getattr(sampler, "sample_fed_rate_many", None)
+    if many is not None:
+        return np.asarray(many(time_s, xs, ys), dtype=float)
+    return np.array(
+        [
+            sampler.sample_fed_rate(time_s, x, y)
+            for x, y in zip(xs.tolist(), ys.tolist())
+        ],
+        dtype=float,
+    )
+
+
 def evaluate_route(
     graph: StageGraph,
     path: list[str],
@@ -610,10 +1255,6 @@ def evaluate_route(
     fed_growth = sum(s.fed_growth for s in segments)
     fed_max = current_fed + fed_growth
 
-    # Composite cost: path_length * (1 + w_smoke * K_ave) + w_fed * FED_max
-    composite = path_length * (1.0 + config.w_smoke * k_ave) + config.w_fed * fed_max
-
-    # Queue cost: convert queue delay to distance-equivalent units.
     queue_time = 0.0
     if exit_counts is not None and config.w_queue > 0 and path:
         _exit_id = path[-1]
@@ -626,15 +1267,8 @@ def evaluate_route(
         )
         if capacity > 0:
             queue_time = n_exit / capacity
-            queue_distance = config.base_speed_m_per_s * queue_time
-            composite += config.w_queue * queue_distance
-
-    rejected = False
-    reason = None
-    if fed_max > config.fed_rejection_threshold:
-        rejected = True
-        reason = f"FED_max {fed_max:.3f} > {config.fed_rejection_threshold}"
 
+    reason = _fed_rejection_reason(fed_max, config)
     return RouteCost(
         exit_id=path[-1] if path else "",
         path=path,
@@ -642,14 +1276,249 @@ def evaluate_route(
         k_ave_route=k_ave,
         travel_time_s=travel_time,
         fed_max_route=fed_max,
-        composite_cost=composite,
+        composite_cost=_composite_cost(path_length, k_ave, fed_max, queue_time, config),
         segments=segments,
-        rejected=rejected,
+        rejected=reason is not None,
         rejection_reason=reason,
         queue_time_s=queue_time,
     )
 
 
+def _composite_cost(
+    path_length: float,
+    k_ave: float,
+    fed_max: float,
+    queue_time_s: float,
+    config: RouteCostConfig,
+) -> float:
+    """Return the composite route cost used for ranking."""
+    # Composite cost: path_length * (1 + w_smoke * K_ave) + w_fed * FED_max
+    composite = path_length * (1.0 + config.w_smoke * k_ave) + config.w_fed * fed_max
+    if queue_time_s > 0.0:
+        # Queue cost: convert queue delay to distance-equivalent units.
+        queue_distance = config.base_speed_m_per_s * queue_time_s
+        composite += config.w_queue * queue_distance
+    return composite
+
+
+def _fed_rejection_reason(fed_max: float, config: RouteCostConfig) -> str | None:
+    """Return the FED rejection reason, or None if the route is acceptable."""
+    if fed_max > config.fed_rejection_threshold:
+        return f"FED_max {fed_max:.3f} > {config.fed_rejection_threshold}"
+    return None
+
+
+def _with_current_fed(
+    rc: RouteCost, current_fed: float, config: RouteCostConfig
+) -> RouteCost:
+    """Shift a route evaluated at ``current_fed=0`` to the agent's own FED."""
+    if current_fed == 0.0:
+        return rc
+    fed_max = current_fed + rc.fed_max_route
+    reason = _fed_rejection_reason(fed_max, config)
+    return replace(
+        rc,
+        fed_max_route=fed_max,
+        composite_cost=_composite_cost(
+            rc.path_length_m, rc.k_ave_route, fed_max, rc.queue_time_s, config
+        ),
+        rejected=reason is not None,
+        rejection_reason=reason,
+    )
+
+
+def compute_dynamic_weights(
+    graph: StageGraph,
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+    *,
+    cached_segments: dict[tuple[str, str], SegmentCost] | None = None,
+) -> dict[tuple[str, str], float]:
+    """Evaluate every edge and return its smoke/FED-adjusted Dijkstra weight.
+
+    Edges missing from *cached_segments* are evaluated in one batch via
+    ``evaluate_segments``.
+    """
+    segments = cached_segments if cached_segments is not None else {}
+    missing = list(
+        dict.fromkeys(
+            (edge.source, edge.target)
+            for edges in graph.edges.values()
+            for edge in edges
+            if (edge.source, edge.target) not in segments
+        )
+    )
+    if missing:
+        segments.update(
+            evaluate_segments(
+                graph,
+                time_s,
+                extinction_sampler,
+                fed_rate_sampler,
+                config,
+                keys=missing,
+            )
+        )
+
+    dynamic_weights: dict[tuple[str, str], float] = {}
+    for edges in graph.edges.values():
+        for edge in edges:
+            cache_key = (edge.source, edge.target)
+            dynamic_weights[cache_key] = _edge_weight(segments[cache_key], config)
+    return dynamic_weights
+
+
+def _edge_weight(seg: SegmentCost, config: RouteCostConfig) -> float:
+    """Return the smoke/FED-adjusted Dijkstra weight of one segment."""
+    # Per-edge cost: additive decomposition of the composite formula.
+    # current_fed is constant across routes for one agent, so omitting
+    # it from edge costs does not affect ranking.
+    return (
+        seg.length_m * (1.0 + config.w_smoke * seg.k_avg)
+        + config.w_fed * seg.fed_growth
+    )
+
+
+def lazy_shortest_paths_to_exits(
+    graph: StageGraph,
+    source: str,
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+    *,
+    cached_segments: dict[tuple[str, str], SegmentCost] | None = None,
+) -> dict[str, tuple[float, list[str]]]:
+    """Dijkstra over dynamic weights that costs edges only when reached.
+
+    Returns the same as ``graph.shortest_paths_to_exits`` with the
+    weights of ``compute_dynamic_weights``, but evaluates only the
+    outgoing edges of nodes the search settles (one batch per node) and
+    stops once every exit is settled.  New segments are added to
+    *cached_segments*.
+    """
+    compiled = graph.compiled()
+    u = compiled.index.get(source)
+    if u is None:
+        return {}
+    segments = cached_segments if cached_segments is not None else {}
+    edge_keys = compiled.edge_keys
+    weights = [math.nan] * len(edge_keys)
+
+    def settle(node: int) -> None:
+        slots = compiled.slots(node)
+        missing = list(
+            dict.fromkeys(
+                edge_keys[slot] for slot in slots if edge_keys[slot] not in segments
+            )
+        )
+        if missing:
+            table = EdgeSampleTable.for_edges(
+                graph, [graph.edge(*key) for key in missing], config.sampling_step_m
+            )
+            segments.update(
+                _evaluate_table(
+                    table, time_s, extinction_sampler, fed_rate_sampler, config
+                )
+            )
+        for slot in slots:
+            weights[slot] = _edge_weight(segments[edge_keys[slot]], config)
+
+    dist, prev = compiled.dijkstra(
+        u, weights, settle=settle, stop_at=compiled.exit_indices
+    )
+    results: dict[str, tuple[float, list[str]]] = {}
+    for e in compiled.exit_indices:
+        if math.isfinite(dist[e]):
+            results[compiled.node_ids[e]] = (dist[e], compiled.path(prev, u, e))
+    return results
+
+
+def build_exit_cost_tables(
+    graph: StageGraph,
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+    *,
+    cached_segments: dict[tuple[str, str], SegmentCost] | None = None,
+    overlay: ClusterOverlay | None = None,
+) -> ExitCostTables:
+    """Compute the per-pass cost-to-exit tables for *graph* at *time_s*.
+
+    Every agent with full knowledge of *graph* sees the same dynamic
+    weights during one reroute pass, so one reverse Dijkstra per exit
+    replaces one forward Dijkstra per agent.  Pass the result to
+    ``rank_routes(exit_tables=...)`` together with the same
+    *cached_segments* dict.  With a cluster *overlay* of *graph*, the
+    searches run over its boundary stages and only clusters whose
+    weights changed are recomputed.
+    """
+    dynamic_weights = compute_dynamic_weights(
+        graph,
+        time_s,
+        extinction_sampler,
+        fed_rate_sampler,
+        config,
+        cached_segments=cached_segments,
+    )
+    if overlay is not None:
+        return overlay.exit_cost_tables(dynamic_weights)
+    return graph.exit_cost_tables(dynamic_weights)
+
+
+def first_leg_segments(
+    graph: StageGraph,
+    sources: list[str | None],
+    positions: list[tuple[float, float] | None],
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+) -> list[dict[str, SegmentCost] | None]:
+    """Cost the legs from each agent's position to its source's successors.
+
+    Every leg is the straight ray from ``positions[i]`` to the centroid
+    of a stage that ``sources[i]`` has an edge to.  The legs of all
+    agents are sampled with one batched call per field, like
+    ``evaluate_segments``.  Returns, per agent, target -> ``SegmentCost``
+    (sources set to the agent's source), or None where the agent has no
+    source in *graph* or no position.  Pass an agent's entry to
+    ``rank_routes(first_legs=...)``.
+    """
+    step_m = config.sampling_step_m
+    legs: list[dict[str, SegmentCost] | None] = [None] * len(sources)
+    rows = []
+    for i, (source, position) in enumerate(zip(sources, positions)):
+        if source is None or position is None or source not in graph.nodes:
+            continue
+        legs[i] = {}
+        x0, y0 = position
+        for target in dict.fromkeys(e.target for e in graph.edges.get(source, [])):
+            node = graph.nodes.get(target)
+            if node is None:
+                continue
+            x1, y1 = node.centroid_x, node.centroid_y
+            rows.append(
+                (
+                    (i, target),
+                    _euclidean(x0, y0, x1, y1),
+                    _los_sample_points(x0, y0, x1, y1, step_m),
+                    ((x0 + x1) / 2, (y0 + y1) / 2),
+                )
+            )
+    if rows:
+        table = EdgeSampleTable._from_rows(rows)
+        evaluated = _evaluate_table(
+            table, time_s, extinction_sampler, fed_rate_sampler, config
+        )
+        for (i, target), seg in evaluated.items():
+            legs[i][target] = replace(seg, source=sources[i])
+    return legs
+
+
 def rank_routes(
     graph: StageGraph,
     source: str,
@@ -664,6 +1533,12 @@ def rank_routes(
     vis_model=None,
     cognitive_map=None,
     agent_position: tuple[float, float] | None = None,
+    exit_tables: ExitCostTables | None = None,
+    ranking_cache=None,
+    lazy_edges: bool = False,
+    first_legs: dict[str, SegmentCost] | None = None,
+    time_table: EdgeTimeTable | None = None,
+    alternatives: int = 0,
 ) -> list[RouteCost]:
     """Evaluate and rank all routes from *source* to reachable exits.
 
@@ -672,55 +1547,78 @@ def rank_routes(
     cheapest path under current conditions (not just the geometrically
     shortest).
 
+    When *exit_tables* from ``build_exit_cost_tables`` are given, paths
+    are looked up from them instead.  They are ignored for agents whose
+    *cognitive_map* restricts the graph.
+
+    *ranking_cache* (a ``RouteRankingCache``) memoises the agent-independent
+    part of the ranking for one pass, so agents sharing a source and a
+    knowledge state only pay for the per-agent FED and visibility checks.
+
+    With *lazy_edges*, edges are costed only when Dijkstra reaches them
+    (see ``lazy_shortest_paths_to_exits``) instead of all up front.  The
+    ranking is the same.
+
+    *first_legs* (this agent's entry of ``first_leg_segments``) replaces
+    the first edge of each route by the leg from the agent's position, so
+    agents in different parts of a large stage can rank exits
+    differently.  It needs *exit_tables*: each exit is reached through
+    the successor minimising leg weight plus table cost.  Rankings with
+    first legs are not cached.
+
+    With a *time_table* (an ``EdgeTimeTable``), agents with full
+    knowledge cost each edge at the frame in which they are expected to
+    enter it rather than at *time_s*.  It takes precedence over
+    *exit_tables* and *first_legs*.
+
+    With *alternatives* > 0, an exit whose route is rejected is offered
+    up to that many further paths, taken lazily in cost order from
+    ``StageGraph.k_shortest_paths``.  The first one that passes the
+    same checks replaces the rejected route.
+
     Returns routes sorted by composite cost (lowest first).
     Rejected routes are sorted to the end.
     If all routes are rejected, the least-bad route is un-rejected
     as a fallback.
     """
-    # Restrict graph to agent's known subgraph (discovery mode).
-    if cognitive_map is not None:
-        from .cognitive_map import cognitive_subgraph
-
-        graph = cognitive_subgraph(cognitive_map, graph)
-
-    # Phase 1: evaluate all edges to get dynamic costs.
-    dynamic_weights: dict[tuple[str, str], float] = {}
-    for src_id, edges in graph.edges.items():
-        for edge in edges:
-            cache_key = (edge.source, edge.target)
-            if cached_segments is not None and cache_key in cached_segments:
-                seg = cached_segments[cache_key]
-            else:
-                seg = evaluate_segment(
-                    graph,
-                    edge.source,
-                    edge.target,
-                    time_s,
-                    extinction_sampler,
-                    fed_rate_sampler,
-                    config,
-                )
-                if cached_segments is not None:
-                    cached_segments[cache_key] = seg
-            # Per-edge cost: additive decomposition of the composite formula.
-            # current_fed is constant across routes for one agent, so omitting
-            # it from edge costs does not affect ranking.
-            dynamic_weights[cache_key] = (
-                seg.length_m * (1.0 + config.w_smoke * seg.k_avg)
-                + config.w_fed * seg.fed_growth
-            )
-
-    # Phase 2: Dijkstra with dynamic weights.
-    all_paths = graph.shortest_paths_to_exits(source, dynamic_weights=dynamic_weights)
-    if not all_paths:
+    if exit_counts is not None and config.w_queue <= 0:
+        exit_counts = None  # queue term disabled; keep cache keys independent
+    candidates = None
+    cache_key = None
+    pass_cache = ranking_cache
+    if first_legs is not None and time_table is None:
+        ranking_cache = None  # agent-specific candidates
+    if ranking_cache is not None:
+        cache_key = ranking_cache.key(source, cognitive_map, exit_counts)
+        candidates = ranking_cache.get(cache_key)
+    if candidates is None:
+        candidates = _route_candidates(
+            graph,
+            source,
+            time_s,
+            extinction_sampler,
+            fed_rate_sampler,
+            config,
+            cached_segments=cached_segments,
+            exit_counts=exit_counts,
+            cognitive_map=cognitive_map,
+            exit_tables=exit_tables,
+            lazy_edges=lazy_edges,
+            first_legs=first_legs,
+            time_table=time_table,
+        )
+        if ranking_cache is not None:
+            ranking_cache.put(cache_key, candidates)
+    if not candidates:
         return []
-
-    # Phase 3: evaluate full routes (reusing cached segments).
-    costs: list[RouteCost] = []
-    for exit_id, (_dist, path) in all_paths.items():
-        rc = evaluate_route(
+    costs = [_with_current_fed(rc, current_fed, config) for rc in candidates]
+    costs = _apply_rejections(graph, source, costs, time_s, vis_model, agent_position)
+    if alternatives > 0 and any(rc.rejected for rc in costs):
+        costs = _with_alternatives(
             graph,
-            path,
+            source,
+            costs,
+            alternatives,
             time_s,
             current_fed,
             extinction_sampler,
@@ -728,9 +1626,45 @@ def rank_routes(
             config,
             cached_segments=cached_segments,
             exit_counts=exit_counts,
+            vis_model=vis_model,
+            cognitive_map=cognitive_map,
+            agent_position=agent_position,
+            ranking_cache=pass_cache,
         )
-        costs.append(rc)
 
+    # Sort: non-rejected first by cost, then rejected by cost.
+    # Break ties by fewer intermediate stages.
+    def sort_key(rc: RouteCost) -> tuple[int, float, int]:
+        return (1 if rc.rejected else 0, rc.composite_cost, len(rc.path))
+
+    costs.sort(key=sort_key)
+
+    # Fallback: if all rejected, un-reject the least-bad.
+    if costs and all(rc.rejected for rc in costs):
+        best = costs[0]
+        costs[0] = replace(
+            best,
+            rejected=False,
+            rejection_reason=f"fallback: {best.rejection_reason}",
+        )
+
+    return costs
+
+
+def _apply_rejections(
+    graph: StageGraph,
+    source: str,
+    costs: list[RouteCost],
+    time_s: float,
+    vis_model,
+    agent_position: tuple[float, float] | None,
+    any_visible: bool | None = None,
+) -> list[RouteCost]:
+    """Reject routes by sign visibility (or the K_vis fallback).
+
+    *any_visible* overrides whether some other route has a visible
+    segment, for checking routes outside the ranked set.
+    """
     # Check visibility rejection.
     if vis_model is not None:
         # Reject any route whose first hop node sign is not visible from the
@@ -754,42 +1688,282 @@ def rank_routes(
                         rejection_reason="next_node_not_visible",
                     )
             updated.append(rc)
-        costs = updated
-    else:
-        # K_vis fallback: reject routes where all segments are non-visible,
-        # but only if at least one other route has visibility.
+        return updated
+    # K_vis fallback: reject routes where all segments are non-visible,
+    # but only if at least one other route has visibility.
+    if any_visible is None:
         any_visible = any(
             any(s.visible for s in rc.segments) for rc in costs if not rc.rejected
         )
-        if any_visible:
-            updated = []
-            for rc in costs:
-                if not rc.rejected and not any(s.visible for s in rc.segments):
-                    rc = replace(
-                        rc,
-                        rejected=True,
-                        rejection_reason="all segments non-visible",
-                    )
-                updated.append(rc)
-            costs = updated
+    if not any_visible:
+        return costs
+    updated = []
+    for rc in costs:
+        if not rc.rejected and not any(s.visible for s in rc.segments):
+            rc = replace(
+                rc,
+                rejected=True,
+                rejection_reason="all segments non-visible",
+            )
+        updated.append(rc)
+    return updated
 
-    # Sort: non-rejected first by cost, then rejected by cost.
-    # Break ties by fewer intermediate stages.
-    def sort_key(rc: RouteCost) -> tuple[int, float, int]:
-        return (1 if rc.rejected else 0, rc.composite_cost, len(rc.path))
 
-    costs.sort(key=sort_key)
+def _with_alternatives(
+    graph: StageGraph,
+    source: str,
+    costs: list[RouteCost],
+    alternatives: int,
+    time_s: float,
+    current_fed: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+    *,
+    cached_segments: dict[tuple[str, str], SegmentCost] | None,
+    exit_counts: dict[str, int] | None,
+    vis_model,
+    cognitive_map,
+    agent_position: tuple[float, float] | None,
+    ranking_cache=None,
+) -> list[RouteCost]:
+    """Replace rejected routes by the next acceptable path to the same exit.
 
-    # Fallback: if all rejected, un-reject the least-bad.
-    if costs and all(rc.rejected for rc in costs):
-        best = costs[0]
-        costs[0] = replace(
-            best,
-            rejected=False,
-            rejection_reason=f"fallback: {best.rejection_reason}",
+    A path's Dijkstra cost never exceeds its composite cost, so an exit
+    stops offering paths once its next one costs at least as much as the
+    best accepted route.  The dynamic weights are taken from
+    *ranking_cache* when given, so they are computed once per pass.
+    """
+    if cognitive_map is not None:
+        from .cognitive_map import cognitive_subgraph
+
+        graph = cognitive_subgraph(cognitive_map, graph)
+
+    def compute() -> dict[tuple[str, str], float]:
+        return compute_dynamic_weights(
+            graph,
+            time_s,
+            extinction_sampler,
+            fed_rate_sampler,
+            config,
+            cached_segments=cached_segments,
         )
 
-    return costs
+    if ranking_cache is not None:
+        dynamic_weights = ranking_cache.weights(cognitive_map, compute)
+    else:
+        dynamic_weights = compute()
+    any_visible = any(
+        any(s.visible for s in rc.segments) for rc in costs if not rc.rejected
+    )
+    best_accepted = min(
+        (rc.composite_cost for rc in costs if not rc.rejected), default=math.inf
+    )
+    # Cost terms outside the edge weights, common to every path.
+    offset = max(config.w_fed * current_fed, 0.0)
+    updated = list(costs)
+    rejected = sorted(
+        (i for i, rc in enumerate(costs) if rc.rejected),
+        key=lambda i: costs[i].composite_cost,
+    )
+    for i in rejected:
+        rc = costs[i]
+        tried = 0
+        for cost, path in graph.k_shortest_paths(source, rc.exit_id, dynamic_weights):
+            if path == rc.path:
+                continue
+            if cost + offset >= best_accepted:
+                break
+            alt = evaluate_route(
+                graph,
+                path,
+                time_s,
+                current_fed,
+                extinction_sampler,
+                fed_rate_sampler,
+                config,
+                cached_segments=cached_segments,
+                exit_counts=exit_counts,
+            )
+            [alt] = _apply_rejections(
+                graph, source, [alt], time_s, vis_model, agent_position, any_visible
+            )
+            if not alt.rejected:
+                updated[i] = alt
+                best_accepted = min(best_accepted, alt.composite_cost)
+                break
+            tried += 1
+            if tried >= alternatives:
+                break
+    return updated
+
+
+def _route_candidates(
+    graph: StageGraph,
+    source: str,
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+    *,
+    cached_segments: dict[tuple[str, str], SegmentCost] | None,
+    exit_counts: dict[str, int] | None,
+    cognitive_map,
+    exit_tables: ExitCostTables | None,
+    lazy_edges: bool = False,
+    first_legs: dict[str, SegmentCost] | None = None,
+    time_table: EdgeTimeTable | None = None,
+) -> list[RouteCost]:
+    """Return one evaluated route per reachable exit, at ``current_fed=0``.
+
+    Without *first_legs* this is the agent-independent part of
+    ``rank_routes``: it depends only on the source, the agent's knowledge
+    and the exit loads.
+    """
+    # Restrict graph to agent's known subgraph (discovery mode).
+    full_knowledge = cognitive_map is None or cognitive_map.familiarity == "full"
+    if cognitive_map is not None:
+        from .cognitive_map import cognitive_subgraph
+
+        graph = cognitive_subgraph(cognitive_map, graph)
+
+    if time_table is not None and full_knowledge:
+        # Edges costed at their expected entry frames.
+        return [
+            evaluate_route(
+                graph,
+                path,
+                time_s,
+                0.0,
+                extinction_sampler,
+                fed_rate_sampler,
+                config,
+                cached_segments=path_segments,
+                exit_counts=exit_counts,
+            )
+            for _dist, path, path_segments in time_table.paths_to_exits(
+                graph, source, time_s
+            ).values()
+        ]
+    if exit_tables is not None and full_knowledge and first_legs is not None:
+        # Phases 1-2 were done once for the whole pass; only the legs
+        # from the agent's position differ between agents.
+        return _first_leg_routes(
+            graph,
+            source,
+            first_legs,
+            exit_tables,
+            time_s,
+            extinction_sampler,
+            fed_rate_sampler,
+            config,
+            cached_segments=cached_segments,
+            exit_counts=exit_counts,
+        )
+    if exit_tables is not None and full_knowledge:
+        # Phases 1-2 were done once for the whole pass.
+        all_paths = exit_tables.paths_from(source)
+    elif lazy_edges:
+        # Phases 1-2 interleaved: cost edges as Dijkstra reaches them.
+        all_paths = lazy_shortest_paths_to_exits(
+            graph,
+            source,
+            time_s,
+            extinction_sampler,
+            fed_rate_sampler,
+            config,
+            cached_segments=cached_segments,
+        )
+    else:
+        # Phase 1: evaluate all edges to get dynamic costs.
+        dynamic_weights = compute_dynamic_weights(
+            graph,
+            time_s,
+            extinction_sampler,
+            fed_rate_sampler,
+            config,
+            cached_segments=cached_segments,
+        )
+        # Phase 2: Dijkstra with dynamic weights.
+        all_paths = graph.shortest_paths_to_exits(
+            source, dynamic_weights=dynamic_weights
+        )
+
+    # Phase 3: evaluate full routes (reusing cached segments).
+    return [
+        evaluate_route(
+            graph,
+            path,
+            time_s,
+            0.0,
+            extinction_sampler,
+            fed_rate_sampler,
+            config,
+            cached_segments=cached_segments,
+            exit_counts=exit_counts,
+        )
+        for _dist, path in all_paths.values()
+    ]
+
+
+def _first_leg_routes(
+    graph: StageGraph,
+    source: str,
+    first_legs: dict[str, SegmentCost],
+    exit_tables: ExitCostTables,
+    time_s: float,
+    extinction_sampler: ExtinctionSampler,
+    fed_rate_sampler: FedRateSampler | None,
+    config: RouteCostConfig,
+    *,
+    cached_segments: dict[tuple[str, str], SegmentCost] | None,
+    exit_counts: dict[str, int] | None,
+) -> list[RouteCost]:
+    """Return one route per exit, starting with the agent's cheapest leg.
+
+    A successor whose table path to the exit leads back through *source*
+    is skipped: the route would revisit the agent's stage, and the leg
+    from the agent's position would be costed in place of that edge.
+    """
+    leg_weights = {
+        target: _edge_weight(leg, config) for target, leg in first_legs.items()
+    }
+    segments = ChainMap(
+        {(source, target): leg for target, leg in first_legs.items()},
+        cached_segments if cached_segments is not None else {},
+    )
+    routes = []
+    for exit_id, dist in exit_tables.cost_to_exit.items():
+        if source == exit_id:
+            path = [source]
+        else:
+            hops = sorted(
+                (weight + dist[target], k, target)
+                for k, (target, weight) in enumerate(leg_weights.items())
+                if target in dist
+            )
+            path = None
+            for _cost, _k, target in hops:
+                rest = exit_tables.path(target, exit_id)
+                if source not in rest:
+                    path = [source, *rest]
+                    break
+            if path is None:
+                continue
+        routes.append(
+            evaluate_route(
+                graph,
+                path,
+                time_s,
+                0.0,
+                extinction_sampler,
+                fed_rate_sampler,
+                config,
+                cached_segments=segments,
+                exit_counts=exit_counts,
+            )
+        )
+    return routes
 
 
 # ── Dynamic rerouting (Phase 4) ──────────────────────────────────────
@@ -801,6 +1975,41 @@ class RerouteConfig:
 
     reevaluation_interval_s: float = 10.0
     cost_config: RouteCostConfig = field(default_factory=RouteCostConfig)
+    # Edges whose extinction sample cells changed by at most this much
+    # [1/m] since they were last evaluated keep their cost (0 = exact).
+    extinction_change_tolerance: float = 0.0
+    # JSON file caching RoutingEngine edge polylines across runs.
+    edge_cache_path: str | None = None
+    # Processes computing edge polylines when the stage graph is built.
+    graph_build_workers: int = 1
+    # Cost edges on first relaxation in Dijkstra instead of all per pass.
+    lazy_edge_evaluation: bool = False
+    # Decide all due agents of a pass at once against one exit_counts
+    # snapshot (see route_decisions.decide_routes).
+    batch_decisions: bool = False
+    # "greedy" (best route per agent) or "min_cost_flow" (joint exit
+    # assignment of all due agents, see route_decisions.assign_routes).
+    assignment_mode: str = "greedy"
+    # Cost the first leg of each route from the agent's position instead
+    # of its source stage centroid (see first_leg_segments).
+    agent_first_leg: bool = False
+    # Cost edges at the FDS frame in which agents are expected to enter
+    # them, from an EdgeTimeTable sampled every time_dependent_step_s.
+    time_dependent: bool = False
+    time_dependent_step_s: float = 10.0
+    # Further paths offered per exit whose best route is rejected
+    # (rank_routes(alternatives=...)); per-agent ranking only.
+    route_alternatives: int = 0
+    # Directory of EdgeTimeTables shared across runs, used when
+    # time_dependent is set.  The case ID names the fire case (e.g. the
+    # resolved FDS directory).
+    edge_table_cache_dir: str | None = None
+    edge_table_case_id: str | None = None
+    # Stage ID -> cluster label (floor, fire compartment); when set, the
+    # per-pass exit tables come from a ClusterOverlay of the stage graph.
+    stage_clusters: dict[str, str] | None = None
+    # Cluster stages by square grid cells of this size [m] instead.
+    cluster_cell_m: float | None = None
 
 
 @dataclass
@@ -855,6 +2064,95 @@ def should_reevaluate(
     return current_time_s - state.last_eval_time_s >= interval_s
 
 
+class ReevaluationScheduler:
+    """Min-heap of agents keyed by their next reevaluation time.
+
+    Replaces scanning every agent with ``should_reevaluate`` each pass:
+    ``pop_due`` touches only agents whose time has come, so the per-pass
+    overhead follows the number of due agents.  Newly added agents are
+    due at the next pass, so callers can initialise them on first
+    encounter.  After that, ``reschedule`` places them by their staggered
+    ``eval_offset_s`` and the reevaluation interval.  Entries of removed
+    or rescheduled agents are dropped lazily when they reach the top of
+    the heap.
+    """
+
+    # Keys within this margin of the pass time are checked with
+    # should_reevaluate, which has the final say.
+    _TOLERANCE_S = 1e-6
+
+    def __init__(self, interval_s: float):
+        """Create an empty schedule for the given reevaluation interval."""
+        self.interval_s = interval_s
+        self._heap: list[tuple[float, int]] = []
+        self._due: dict[int, float] = {}
+        self._states: dict[int, AgentRouteState] = {}
+
+    def __len__(self) -> int:
+        """Return the number of scheduled agents."""
+        return len(self._due)
+
+    def __contains__(self, agent_id: int) -> bool:
+        """Return whether *agent_id* is scheduled."""
+        return agent_id in self._due
+
+    def next_time(self, state: AgentRouteState) -> float:
+        """Return the earliest time ``should_reevaluate`` can be True."""
+        if self.interval_s <= 0:
+            return math.inf
+        if state.last_eval_time_s < state.eval_offset_s:
+            return state.eval_offset_s
+        return state.last_eval_time_s + self.interval_s
+
+    def add(self, agent_id: int) -> None:
+        """Schedule a new agent for the next pass."""
+        self._push(agent_id, -math.inf)
+        self._states.pop(agent_id, None)
+
+    def reschedule(self, agent_id: int, state: AgentRouteState) -> None:
+        """Schedule *agent_id* for the next time its *state* is due."""
+        self._push(agent_id, self.next_time(state))
+        self._states[agent_id] = state
+
+    def remove(self, agent_id: int) -> None:
+        """Unschedule *agent_id* (e.g. when it leaves the simulation)."""
+        self._due.pop(agent_id, None)
+        self._states.pop(agent_id, None)
+
+    def pop_due(self, current_time_s: float) -> list[int]:
+        """Remove and return the agents due at *current_time_s*, by ID.
+
+        Returned agents are unscheduled; call ``reschedule`` for those
+        that should be evaluated again.
+        """
+        heap = self._heap
+        due: list[int] = []
+        deferred: list[int] = []
+        limit = current_time_s + self._TOLERANCE_S
+        while heap and heap[0][0] <= limit:
+            when, agent_id = heapq.heappop(heap)
+            if self._due.get(agent_id) != when:
+                continue  # stale entry
+            state = self._states.get(agent_id)
+            if state is not None and not should_reevaluate(
+                current_time_s, state, self.interval_s
+            ):
+                deferred.append(agent_id)
+                continue
+            del self._due[agent_id]
+            self._states.pop(agent_id, None)
+            due.append(agent_id)
+        for agent_id in deferred:
+            # Within the rounding margin but not yet due: check next pass.
+            self._push(agent_id, current_time_s)
+        due.sort()
+        return due
+
+    def _push(self, agent_id: int, when: float) -> None:
+        self._due[agent_id] = when
+        heapq.heappush(self._heap, (when, agent_id))
+
+
 def reroute_agent(
     wait_info: dict,
     new_path: list[str],
@@ -936,9 +2234,18 @@ def evaluate_and_reroute(
     vis_model=None,
     cognitive_map=None,
     agent_position: tuple[float, float] | None = None,
+    exit_tables: ExitCostTables | None = None,
+    ranking_cache=None,
+    on_ranked: Callable[[list[RouteCost]], None] | None = None,
+    first_legs: dict[str, SegmentCost] | None = None,
+    time_table: EdgeTimeTable | None = None,
 ) -> RouteSwitch | None:
     """Evaluate routes and reroute the agent if a better exit is found.
 
+    *on_ranked*, if given, receives the ranked routes before the agent's
+    state is changed (``run_scenario`` records them as cost history).
+    *first_legs* and *time_table* are passed on to ``rank_routes``.
+
     Returns a RouteSwitch record if the agent switched, else None.
     """
     # Determine the source node for ranking.  Prefer current_origin
@@ -961,7 +2268,15 @@ def evaluate_and_reroute(
         vis_model=vis_model,
         cognitive_map=cognitive_map,
         agent_position=agent_position,
+        exit_tables=exit_tables,
+        ranking_cache=ranking_cache,
+        lazy_edges=config.lazy_edge_evaluation,
+        first_legs=first_legs,
+        time_table=time_table,
+        alternatives=config.route_alternatives,
     )
+    if on_ranked is not None:
+        on_ranked(ranked)
     if not ranked:
         return None
 
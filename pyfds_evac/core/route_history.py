@@ -0,0 +1,217 @@
+"""Columnar, sampled collection of ranked route costs during a run."""
+
+from __future__ import annotations
+
+import csv
+import pathlib
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from .route_graph import RouteCost
+
+# Column order of the rows, the CSV header and ``columns()``.
+ROUTE_COST_COLUMNS: tuple[str, ...] = (
+    "time_s",
+    "agent_id",
+    "source",
+    "current_exit",
+    "current_fed",
+    "route_rank",
+    "exit_id",
+    "path",
+    "path_length_m",
+    "k_ave_route",
+    "travel_time_s",
+    "fed_max_route",
+    "composite_cost",
+    "rejected",
+    "rejection_reason",
+    "queue_time_s",
+    "exit_count",
+    "exit_capacity",
+)
+
+_DTYPES: dict[str, Any] = {
+    "time_s": np.float64,
+    "agent_id": np.int64,
+    "current_fed": np.float64,
+    "route_rank": np.int32,
+    "path_length_m": np.float64,
+    "k_ave_route": np.float64,
+    "travel_time_s": np.float64,
+    "fed_max_route": np.float64,
+    "composite_cost": np.float64,
+    "rejected": np.bool_,
+    "queue_time_s": np.float64,
+    "exit_count": np.int64,
+    "exit_capacity": np.float64,
+}
+# Text columns are stored as int32 codes into a shared string table.
+_TEXT_COLUMNS = ("source", "current_exit", "exit_id", "path", "rejection_reason")
+
+
+@dataclass(frozen=True)
+class RouteCostSampling:
+    """Which ranked routes ``RouteCostHistory`` keeps.
+
+    Attributes
+    ----------
+    every_nth_pass:
+        Record only every Nth reroute pass (1 = every pass).
+    top_k:
+        Record only the best *k* routes of each ranking (None = all).
+    agent_stride:
+        Record only agents whose ID is a multiple of this (1 = all).
+    max_rows:
+        Stop recording after this many rows (None = unbounded); later
+        rows are counted in ``RouteCostHistory.dropped_rows``.
+    """
+
+    every_nth_pass: int = 1
+    top_k: int | None = None
+    agent_stride: int = 1
+    max_rows: int | None = None
+
+
+class RouteCostHistory:
+    """Route-cost snapshots stored in growable NumPy column buffers.
+
+    Replaces one Python dict per ranked route.  ``rows()`` and
+    ``iter_rows()`` rebuild the dicts ``run_scenario`` used to collect,
+    with the same keys and value types.  ``columns()`` returns the
+    arrays, and ``write_csv`` streams them to disk.
+    """
+
+    def __init__(
+        self, sampling: RouteCostSampling | None = None, chunk_rows: int = 4096
+    ):
+        """Create empty buffers of *chunk_rows* rows, grown by doubling."""
+        if chunk_rows < 1:
+            raise ValueError(f"chunk_rows must be at least 1, got {chunk_rows}")
+        self.sampling = sampling or RouteCostSampling()
+        self.dropped_rows = 0
+        self._size = 0
+        self._passes = 0
+        self._pass_sampled = False
+        self._strings: list[str] = []
+        self._codes: dict[str, int] = {}
+        self._buffers: dict[str, np.ndarray] = {
+            name: np.empty(chunk_rows, dtype=_DTYPES.get(name, np.int32))
+            for name in ROUTE_COST_COLUMNS
+        }
+
+    def __len__(self) -> int:
+        """Return the number of recorded rows."""
+        return self._size
+
+    def start_pass(self) -> bool:
+        """Begin a reroute pass; return whether it is sampled."""
+        self._pass_sampled = self._passes % max(1, self.sampling.every_nth_pass) == 0
+        self._passes += 1
+        return self._pass_sampled
+
+    def wants(self, agent_id: int) -> bool:
+        """Return whether *agent_id* is recorded in the current pass."""
+        return self._pass_sampled and agent_id % max(1, self.sampling.agent_stride) == 0
+
+    def record(
+        self,
+        time_s: float,
+        agent_id: int,
+        source: str,
+        current_exit: str | None,
+        current_fed: float,
+        ranked: list[RouteCost],
+        exit_counts: dict[str, int],
+        exit_capacity: Callable[[str], float],
+    ) -> None:
+        """Append one row per ranked route (up to ``top_k``)."""
+        if self.sampling.top_k is not None:
+            ranked = ranked[: self.sampling.top_k]
+        n = len(ranked)
+        if self.sampling.max_rows is not None:
+            room = max(0, self.sampling.max_rows - self._size)
+            if n > room:
+                self.dropped_rows += n - room
+                ranked = ranked[:room]
+                n = room
+        if n == 0:
+            return
+        self._reserve(self._size + n)
+        start, stop = self._size, self._size + n
+        buffers = self._buffers
+        code = self._code
+        buffers["time_s"][start:stop] = round(float(time_s), 6)
+        buffers["agent_id"][start:stop] = agent_id
+        buffers["source"][start:stop] = code(source)
+        buffers["current_exit"][start:stop] = code(current_exit or "")
+        buffers["current_fed"][start:stop] = float(current_fed)
+        buffers["route_rank"][start:stop] = np.arange(1, n + 1)
+        for row, rc in enumerate(ranked, start=start):
+            buffers["exit_id"][row] = code(rc.exit_id)
+            buffers["path"][row] = code(" > ".join(rc.path))
+            buffers["path_length_m"][row] = rc.path_length_m
+            buffers["k_ave_route"][row] = rc.k_ave_route
+            buffers["travel_time_s"][row] = rc.travel_time_s
+            buffers["fed_max_route"][row] = rc.fed_max_route
+            buffers["composite_cost"][row] = rc.composite_cost
+            buffers["rejected"][row] = rc.rejected
+            buffers["rejection_reason"][row] = code(rc.rejection_reason or "")
+            buffers["queue_time_s"][row] = rc.queue_time_s
+            buffers["exit_count"][row] = exit_counts.get(rc.exit_id, 0)
+            buffers["exit_capacity"][row] = exit_capacity(rc.exit_id)
+        self._size = stop
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """Return the recorded rows as arrays; text columns as object arrays."""
+        strings = np.array(self._strings, dtype=object)
+        result = {}
+        for name in ROUTE_COST_COLUMNS:
+            values = self._buffers[name][: self._size]
+            result[name] = strings[values] if name in _TEXT_COLUMNS else values.copy()
+        return result
+
+    def iter_rows(self) -> Iterator[dict[str, Any]]:
+        """Yield one dict per recorded row, in recording order."""
+        lists = []
+        for name in ROUTE_COST_COLUMNS:
+            values = self._buffers[name][: self._size].tolist()
+            if name in _TEXT_COLUMNS:
+                values = [self._strings[c] for c in values]
+            lists.append(values)
+        for values in zip(*lists):
+            yield dict(zip(ROUTE_COST_COLUMNS, values))
+
+    def rows(self) -> list[dict[str, Any]]:
+        """Return all recorded rows as dicts."""
+        return list(self.iter_rows())
+
+    def write_csv(self, output_path: str | pathlib.Path) -> None:
+        """Write the recorded rows to a CSV file."""
+        destination = pathlib.Path(output_path).resolve()
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        with destination.open("w", encoding="utf-8", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=ROUTE_COST_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.iter_rows())
+
+    def _code(self, text: str) -> int:
+        code = self._codes.get(text)
+        if code is None:
+            code = self._codes[text] = len(self._strings)
+            self._strings.append(text)
+        return code
+
+    def _reserve(self, rows: int) -> None:
+        capacity = len(self._buffers["time_s"])
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        for name, buffer in self._buffers.items():
+            grown = np.empty(capacity, dtype=buffer.dtype)
+            grown[: self._size] = buffer[: self._size]
+            self._buffers[name] = grown
@@ -15,6 +15,7 @@ Usage::
     df = result.trajectory_dataframe()
 """
 
+import functools
 import json
 import logging
 import math
@@ -46,21 +47,31 @@ from .direct_steering_runtime import (
     set_agent_smoke_factor,
     update_checkpoint_speed,
 )
+from .cluster_graph import ClusterOverlay
 from .cognitive_map import (
     AgentCognitiveMap,
-    expand_from_visibility,
+    expand_from_visibility_many,
     expand_on_arrival,
     init_cognitive_map,
 )
 from .route_graph import (
     AgentRouteState,
+    ExitCostTables,
+    ReevaluationScheduler,
     RerouteConfig,
     StageGraph,
+    build_exit_cost_tables,
     compute_eval_offset,
     evaluate_and_reroute,
+    first_leg_segments,
     rank_routes,
+    refresh_segments,
     should_reevaluate,
 )
+from .edge_time_table import EdgeTimeTable, cached_edge_time_table
+from .route_cache import RouteRankingCache, SegmentCostCache, sampler_frame_key
+from .route_decisions import apply_route_decisions, assign_routes, decide_routes
+from .route_history import RouteCostHistory, RouteCostSampling
 from .smoke_speed import ConstantExtinctionField
 
 _logger = logging.getLogger(__name__)
@@ -77,6 +88,17 @@ class _FedRateAdapter:
         _, rate = self._model.sample_rate(time_s, x, y)
         return rate
 
+    def sample_fed_rate_many(self, time_s: float, xs, ys) -> np.ndarray:
+        return self._model.sample_rates_many(time_s, xs, ys)
+
+    def frame_key(self, time_s: float):
+        frame_key = getattr(self._model, "frame_key", None)
+        return frame_key(time_s) if frame_key is not None else None
+
+    def changed_many(self, time_a: float, time_b: float, xs, ys):
+        changed_many = getattr(self._model, "changed_many", None)
+        return changed_many(time_a, time_b, xs, ys) if changed_many else None
+
 
 # ---------------------------------------------------------------------------
 # Model factory
@@ -784,7 +806,19 @@ class ScenarioResult:
     smoke_history: Optional[list[dict[str, Any]]] = None
     fed_history: Optional[list[dict[str, Any]]] = None
     route_history: Optional[list[dict[str, Any]]] = None
-    route_cost_history: Optional[list[dict[str, Any]]] = None
+    # Ranked route costs in column buffers (see route_history.RouteCostHistory).
+    route_cost_table: Optional[RouteCostHistory] = None
+
+    @property
+    def route_cost_history(self) -> Optional[list[dict[str, Any]]]:
+        """Route-cost rows as dicts, rebuilt from ``route_cost_table``.
+
+        Every access builds one dict per row; use ``route_cost_table``
+        (``iter_rows``, ``columns``, ``write_csv``) for long runs.
+        """
+        if self.route_cost_table is None:
+            return None
+        return self.route_cost_table.rows()
 
     @property
     def success(self) -> bool:
@@ -972,8 +1006,14 @@ def run_scenario(
     reroute_config: Optional[RerouteConfig] = None,
     collect_route_cost_history: bool = False,
     vis_model=None,
+    route_cost_sampling: Optional[RouteCostSampling] = None,
 ) -> ScenarioResult:
-    """Run a scenario with the same shared setup/runtime semantics as the web app."""
+    """Run a scenario with the same shared setup/runtime semantics as the web app.
+
+    With *collect_route_cost_history*, the rankings made during rerouting
+    are recorded; *route_cost_sampling* limits which passes, agents and
+    routes are kept.
+    """
     _require_jupedsim()
     from .simulation_init import (
         _find_nearest_exit,
@@ -1038,11 +1078,24 @@ def run_scenario(
         last_fed_update_time = None
         last_reroute_check_time: float | None = None
         route_history: list[dict[str, Any]] = []
-        route_cost_history: list[dict[str, Any]] = []
+        route_cost_table = (
+            RouteCostHistory(route_cost_sampling)
+            if collect_route_cost_history and reroute_config is not None
+            else None
+        )
         agent_route_state: Dict[int, AgentRouteState] = {}
         cognitive_maps: Dict[int, AgentCognitiveMap] = {}
         route_segment_cache: dict[tuple[str, str], Any] | None = None
+        route_segment_costs = SegmentCostCache()
+        route_ranking_cache = RouteRankingCache()
+        reroute_scheduler = ReevaluationScheduler(
+            reroute_config.reevaluation_interval_s if reroute_config else 0.0
+        )
         stage_graph: StageGraph | None = None
+        route_overlay: ClusterOverlay | None = None
+        route_time_table: EdgeTimeTable | None = None
+        # The table again, when routes follow it (time-dependent routing).
+        route_paths_table: EdgeTimeTable | None = None
         reroute_debug_printed = False
         reroute_debug_samples = 0
         _fed_rate_adapter = None
@@ -1052,9 +1105,56 @@ def run_scenario(
                 scenario.raw.get("transitions", []),
                 distributions=scenario.raw.get("distributions"),
                 walkable_polygon=scenario.walkable_polygon,
+                edge_cache_path=reroute_config.edge_cache_path,
+                workers=reroute_config.graph_build_workers,
             )
+            if reroute_config.assignment_mode not in ("greedy", "min_cost_flow"):
+                raise ValueError(
+                    "Unknown assignment_mode "
+                    f"{reroute_config.assignment_mode!r}; "
+                    "expected 'greedy' or 'min_cost_flow'"
+                )
+            if reroute_config.stage_clusters is not None:
+                route_overlay = ClusterOverlay(
+                    stage_graph, reroute_config.stage_clusters
+                )
+            elif reroute_config.cluster_cell_m is not None:
+                route_overlay = ClusterOverlay.from_grid(
+                    stage_graph, reroute_config.cluster_cell_m
+                )
             route_segment_cache = {}
             _fed_rate_adapter = _FedRateAdapter(fed_model) if fed_model else None
+            # Every edge at every frame of the run, costed once up front
+            # (or loaded from a table another run of the ensemble saved).
+            table_args = (
+                stage_graph,
+                0.0,
+                scenario.max_simulation_time,
+                reroute_config.time_dependent_step_s,
+                (
+                    smoke_speed_model.field
+                    if smoke_speed_model is not None
+                    else _ZERO_EXTINCTION
+                ),
+                _fed_rate_adapter,
+                reroute_config.cost_config,
+            )
+            if (
+                reroute_config.edge_table_cache_dir is not None
+                and reroute_config.edge_table_case_id is None
+            ):
+                raise ValueError("edge_table_cache_dir requires edge_table_case_id")
+            if not reroute_config.time_dependent:
+                route_time_table = None
+            elif reroute_config.edge_table_cache_dir is not None:
+                route_time_table = cached_edge_time_table(
+                    reroute_config.edge_table_cache_dir,
+                    reroute_config.edge_table_case_id,
+                    *table_args,
+                )
+            else:
+                route_time_table = EdgeTimeTable.build(*table_args)
+            route_paths_table = route_time_table
             print(
                 "Reroute debug: "
                 f"nodes={len(stage_graph.nodes)} "
@@ -1062,6 +1162,14 @@ def run_scenario(
                 f"direct_steering={len(direct_steering_info)} "
                 f"wait_info={len(agent_wait_info)}"
             )
+
+        def _exit_capacity(exit_id: str) -> float:
+            """Exit capacity used by the queue term, for the cost history."""
+            node = stage_graph.nodes.get(exit_id)
+            if node is not None and node.capacity_agents_per_s is not None:
+                return float(node.capacity_agents_per_s)
+            return float(reroute_config.cost_config.default_exit_capacity)
+
         # Pre-compute familiarity per distribution index.
         dist_familiarity: list[str] = [
             d.get("parameters", {}).get("familiarity", "full")
@@ -1075,6 +1183,8 @@ def run_scenario(
                     exit_counts[node_id] = 0
             # Seed from initial agent assignments.
             for agent_id_init, wi in agent_wait_info.items():
+                if wi.get("mode") == "path":
+                    reroute_scheduler.add(agent_id_init)
                 exit_id = _extract_terminal_exit(wi, stage_graph.nodes)
                 if exit_id is not None:
                     exit_counts[exit_id] = exit_counts.get(exit_id, 0) + 1
@@ -1339,6 +1449,8 @@ def run_scenario(
                                     )
                                     if path_state:
                                         agent_wait_info[agent_id] = path_state
+                                        if path_state.get("mode") == "path":
+                                            reroute_scheduler.add(agent_id)
                                         _dist_idx = flow_dist.get(
                                             "dist_index", source_id
                                         )
@@ -1434,6 +1546,7 @@ def run_scenario(
                                             < len(dist_familiarity)
                                             else "full",
                                         }
+                                        reroute_scheduler.add(agent_id)
                                         if stage_graph is not None:
                                             _spawn_exit = _extract_terminal_exit(
                                                 agent_wait_info[agent_id],
@@ -1621,19 +1734,71 @@ def run_scenario(
                     if smoke_speed_model is not None
                     else _ZERO_EXTINCTION
                 )
-                # Scope the route segment cache to a single reroute-check pass.
-                # Segment costs depend on current_time and the time-varying smoke field,
-                # so we clear any previously cached values computed at different times.
-                route_segment_cache = {}
+                # Segment costs depend on the sampled smoke/FED frame, so
+                # passes within one FDS output frame share their segment
+                # dict; samplers without discrete frames get a fresh dict.
+                route_segment_cache = route_segment_costs.segments_for(
+                    sampler_frame_key(
+                        current_time, extinction_sampler, _fed_rate_adapter
+                    )
+                )
+                route_ranking_cache.clear()
+                if route_cost_table is not None:
+                    route_cost_table.start_pass()
+                # Cost-to-exit tables shared by every full-knowledge agent in
+                # this pass; built on first use.
+                route_exit_tables: ExitCostTables | None = None
                 last_reroute_check_time = current_time
                 reroute_loop_agents = 0
-                for agent in simulation.agents():
-                    agent_id = int(agent.id)
+                pass_switches = []
+                # Due agents collected for one batched decision
+                # (RerouteConfig.batch_decisions).
+                batch_ids, batch_wait, batch_states = [], [], []
+                batch_fed, batch_pos, batch_maps, batch_legs = [], [], [], []
+                # Agents visited this pass, rescheduled once it is done.
+                pass_agents: list[tuple[int, AgentRouteState]] = []
+                due_agents = reroute_scheduler.pop_due(current_time)
+                # Legs from each due agent's position to the successors of
+                # its source, sampled for all agents in one call.
+                pass_first_legs: dict[int, Any] = {}
+                if reroute_config.agent_first_leg and route_paths_table is None:
+                    leg_agents, leg_sources, leg_positions = [], [], []
+                    for agent_id in due_agents:
+                        wait_info = agent_wait_info.get(agent_id)
+                        if wait_info is None or wait_info.get("mode") != "path":
+                            continue
+                        _pos = wait_info.get("current_position")
+                        leg_agents.append(agent_id)
+                        leg_sources.append(
+                            wait_info.get("current_origin")
+                            or wait_info.get("current_target_stage")
+                        )
+                        leg_positions.append(tuple(_pos) if _pos is not None else None)
+                    pass_first_legs = dict(
+                        zip(
+                            leg_agents,
+                            first_leg_segments(
+                                stage_graph,
+                                leg_sources,
+                                leg_positions,
+                                current_time,
+                                extinction_sampler,
+                                _fed_rate_adapter,
+                                reroute_config.cost_config,
+                            ),
+                        )
+                    )
+                # Initialise route states and cognitive maps, then expand
+                # the maps of agents reevaluated this pass from their
+                # positions with one batched visibility lookup.
+                vis_maps, vis_nodes, vis_positions = [], [], []
+                for agent_id in due_agents:
                     wait_info = agent_wait_info.get(agent_id)
-                    if wait_info is None or wait_info.get("mode") != "path":
-                        continue
-                    reroute_loop_agents += 1
-                    if wait_info.get("state") == "done":
+                    if (
+                        wait_info is None
+                        or wait_info.get("mode") != "path"
+                        or wait_info.get("state") == "done"
+                    ):
                         continue
                     # Initialize route state on first encounter.
                     if agent_id not in agent_route_state:
@@ -1643,21 +1808,51 @@ def run_scenario(
                                 reroute_config.reevaluation_interval_s,
                             ),
                         )
+                    _cur_node = wait_info.get("current_origin") or wait_info.get(
+                        "current_target_stage"
+                    )
                     # Initialize cognitive map on first encounter.
-                    if agent_id not in cognitive_maps and stage_graph is not None:
-                        spawn_node = wait_info.get("current_origin") or wait_info.get(
-                            "current_target_stage"
+                    if agent_id not in cognitive_maps and _cur_node is not None:
+                        familiarity = wait_info.get("familiarity", "full")
+                        cognitive_maps[agent_id] = init_cognitive_map(
+                            _cur_node,
+                            stage_graph,
+                            familiarity,
+                            vis_model,
+                            current_time,
                         )
-                        if spawn_node is not None:
-                            familiarity = wait_info.get("familiarity", "full")
-                            cognitive_maps[agent_id] = init_cognitive_map(
-                                spawn_node,
-                                stage_graph,
-                                familiarity,
-                                vis_model,
-                                current_time,
-                            )
+                    _cmap = cognitive_maps.get(agent_id)
+                    _pos = wait_info.get("current_position")
+                    if (
+                        _cmap is not None
+                        and _cur_node is not None
+                        and _pos is not None
+                        and should_reevaluate(
+                            current_time,
+                            agent_route_state[agent_id],
+                            reroute_config.reevaluation_interval_s,
+                        )
+                    ):
+                        vis_maps.append(_cmap)
+                        vis_nodes.append(_cur_node)
+                        vis_positions.append((_pos[0], _pos[1]))
+                expand_from_visibility_many(
+                    vis_maps,
+                    vis_nodes,
+                    stage_graph,
+                    vis_model,
+                    current_time,
+                    vis_positions,
+                )
+                for agent_id in due_agents:
+                    wait_info = agent_wait_info.get(agent_id)
+                    if wait_info is None or wait_info.get("mode") != "path":
+                        continue
+                    reroute_loop_agents += 1
+                    if wait_info.get("state") == "done":
+                        continue
                     rs = agent_route_state[agent_id]
+                    pass_agents.append((agent_id, rs))
                     if not should_reevaluate(
                         current_time, rs, reroute_config.reevaluation_interval_s
                     ):
@@ -1678,74 +1873,100 @@ def run_scenario(
                             f"in_graph={source in stage_graph.nodes if source is not None else False}"
                         )
                         reroute_debug_samples += 1
-                    # Expand cognitive map from current position before reevaluation.
                     _cmap = cognitive_maps.get(agent_id)
                     _pos = wait_info.get("current_position")
-                    if _cmap is not None and stage_graph is not None:
-                        _cur_node = wait_info.get("current_origin") or wait_info.get(
-                            "current_target_stage"
+                    lazy_edges = reroute_config.lazy_edge_evaluation
+                    if not route_segment_cache and not lazy_edges:
+                        # Cost every edge of the full graph in one batch,
+                        # re-evaluating only edges whose sampled cells
+                        # changed since the previous frame; later lookups
+                        # this pass are cache hits.
+                        _segments, _evaluated_at = refresh_segments(
+                            stage_graph,
+                            current_time,
+                            extinction_sampler,
+                            _fed_rate_adapter,
+                            reroute_config.cost_config,
+                            *(route_segment_costs.latest or (None, None)),
+                            extinction_tolerance=(
+                                reroute_config.extinction_change_tolerance
+                            ),
                         )
-                        if _cur_node is not None and _pos is not None:
-                            expand_from_visibility(
-                                _cmap,
-                                _cur_node,
-                                stage_graph,
-                                vis_model,
-                                current_time,
-                                _pos[0],
-                                _pos[1],
-                            )
-                    if collect_route_cost_history:
+                        route_segment_cache.update(_segments)
+                        route_segment_costs.record(
+                            route_segment_cache, _evaluated_at, current_time
+                        )
+                    if (
+                        route_exit_tables is None
+                        and route_paths_table is None
+                        and not lazy_edges
+                        and (_cmap is None or _cmap.familiarity == "full")
+                    ):
+                        route_exit_tables = build_exit_cost_tables(
+                            stage_graph,
+                            current_time,
+                            extinction_sampler,
+                            _fed_rate_adapter,
+                            reroute_config.cost_config,
+                            cached_segments=route_segment_cache,
+                            overlay=route_overlay,
+                        )
+                    batched = (
+                        reroute_config.batch_decisions
+                        or reroute_config.assignment_mode == "min_cost_flow"
+                    )
+                    record_ranked = None
+                    if route_cost_table is not None and route_cost_table.wants(
+                        agent_id
+                    ):
                         source = wait_info.get("current_origin") or wait_info.get(
                             "current_target_stage"
                         )
-                        if source is not None and source in stage_graph.nodes:
-                            ranked = rank_routes(
-                                stage_graph,
-                                source,
-                                current_time,
-                                current_fed,
-                                extinction_sampler,
-                                _fed_rate_adapter,
-                                reroute_config.cost_config,
-                                cached_segments=route_segment_cache,
-                                exit_counts=exit_counts,
-                                vis_model=vis_model,
-                                cognitive_map=_cmap,
-                                agent_position=tuple(_pos)
-                                if _pos is not None
-                                else None,
-                            )
-                            for route_rank, rc in enumerate(ranked, start=1):
-                                _exit_node = stage_graph.nodes.get(rc.exit_id)
-                                _exit_cap = (
-                                    _exit_node.capacity_agents_per_s
-                                    if _exit_node is not None
-                                    and _exit_node.capacity_agents_per_s is not None
-                                    else reroute_config.cost_config.default_exit_capacity
-                                )
-                                route_cost_history.append(
-                                    {
-                                        "time_s": round(float(current_time), 6),
-                                        "agent_id": agent_id,
-                                        "source": source,
-                                        "current_exit": rs.current_exit or "",
-                                        "current_fed": float(current_fed),
-                                        "route_rank": route_rank,
-                                        "exit_id": rc.exit_id,
-                                        "path": " > ".join(rc.path),
-                                        "path_length_m": float(rc.path_length_m),
-                                        "k_ave_route": float(rc.k_ave_route),
-                                        "travel_time_s": float(rc.travel_time_s),
-                                        "fed_max_route": float(rc.fed_max_route),
-                                        "composite_cost": float(rc.composite_cost),
-                                        "rejected": bool(rc.rejected),
-                                        "rejection_reason": rc.rejection_reason or "",
-                                        "queue_time_s": float(rc.queue_time_s),
-                                        "exit_count": exit_counts.get(rc.exit_id, 0),
-                                        "exit_capacity": float(_exit_cap),
-                                    }
+                        record_ranked = functools.partial(
+                            route_cost_table.record,
+                            current_time,
+                            agent_id,
+                            source,
+                            rs.current_exit,
+                            current_fed,
+                            exit_counts=exit_counts,
+                            exit_capacity=_exit_capacity,
+                        )
+                        if batched and source in stage_graph.nodes:
+                            # Batched decisions do not produce per-agent
+                            # rankings, so rank once more for the history.
+                            record_ranked(
+                                rank_routes(
+                                    stage_graph,
+                                    source,
+                                    current_time,
+                                    current_fed,
+                                    extinction_sampler,
+                                    _fed_rate_adapter,
+                                    reroute_config.cost_config,
+                                    cached_segments=route_segment_cache,
+                                    exit_counts=exit_counts,
+                                    vis_model=vis_model,
+                                    cognitive_map=_cmap,
+                                    agent_position=tuple(_pos)
+                                    if _pos is not None
+                                    else None,
+                                    exit_tables=route_exit_tables,
+                                    ranking_cache=route_ranking_cache,
+                                    lazy_edges=lazy_edges,
+                                    first_legs=pass_first_legs.get(agent_id),
+                                    time_table=route_paths_table,
                                 )
+                            )
+                    if batched:
+                        batch_legs.append(pass_first_legs.get(agent_id))
+                        batch_ids.append(agent_id)
+                        batch_wait.append(wait_info)
+                        batch_states.append(rs)
+                        batch_fed.append(current_fed)
+                        batch_pos.append(tuple(_pos) if _pos is not None else None)
+                        batch_maps.append(_cmap)
+                        continue
                     switch = evaluate_and_reroute(
                         agent_id=agent_id,
                         wait_info=wait_info,
@@ -1761,6 +1982,11 @@ def run_scenario(
                         vis_model=vis_model,
                         cognitive_map=_cmap,
                         agent_position=tuple(_pos) if _pos is not None else None,
+                        exit_tables=route_exit_tables,
+                        ranking_cache=route_ranking_cache,
+                        on_ranked=record_ranked,
+                        first_legs=pass_first_legs.get(agent_id),
+                        time_table=route_paths_table,
                     )
                     if switch is not None:
                         # Update exit_counts: decrement old, increment new.
@@ -1772,25 +1998,68 @@ def run_scenario(
                             exit_counts[switch.new_exit] = (
                                 exit_counts.get(switch.new_exit, 0) + 1
                             )
-                        route_history.append(
-                            {
-                                "time_s": round(float(switch.time_s), 6),
-                                "agent_id": switch.agent_id,
-                                "old_exit": switch.old_exit or "",
-                                "new_exit": switch.new_exit,
-                                "old_cost": round(float(switch.old_cost), 4)
-                                if switch.old_cost is not None
-                                else "",
-                                "new_cost": round(float(switch.new_cost), 4),
-                                "reason": switch.reason,
-                            }
+                        pass_switches.append(switch)
+                if batch_ids:
+                    # All due agents ranked against one exit_counts snapshot
+                    # (or assigned jointly); counts are updated once afterwards.
+                    decide = (
+                        assign_routes
+                        if reroute_config.assignment_mode == "min_cost_flow"
+                        else decide_routes
+                    )
+                    decisions = decide(
+                        stage_graph,
+                        [
+                            w.get("current_origin") or w.get("current_target_stage")
+                            for w in batch_wait
+                        ],
+                        [rs.current_exit for rs in batch_states],
+                        batch_fed,
+                        current_time,
+                        extinction_sampler,
+                        _fed_rate_adapter,
+                        reroute_config,
+                        positions=batch_pos,
+                        cached_segments=route_segment_cache,
+                        exit_counts=exit_counts,
+                        vis_model=vis_model,
+                        cognitive_maps=batch_maps,
+                        exit_tables=route_exit_tables,
+                        first_legs=batch_legs,
+                        time_table=route_paths_table,
+                    )
+                    pass_switches.extend(
+                        apply_route_decisions(
+                            decisions,
+                            batch_ids,
+                            batch_wait,
+                            batch_states,
+                            current_time,
+                            exit_counts,
                         )
+                    )
+                for agent_id, rs in pass_agents:
+                    reroute_scheduler.reschedule(agent_id, rs)
+                for switch in pass_switches:
+                    route_history.append(
+                        {
+                            "time_s": round(float(switch.time_s), 6),
+                            "agent_id": switch.agent_id,
+                            "old_exit": switch.old_exit or "",
+                            "new_exit": switch.new_exit,
+                            "old_cost": round(float(switch.old_cost), 4)
+                            if switch.old_cost is not None
+                            else "",
+                            "new_cost": round(float(switch.new_cost), 4),
+                            "reason": switch.reason,
+                        }
+                    )
                 if not reroute_debug_printed:
                     print(
                         "Reroute debug pass: "
                         f"time={current_time:.2f} "
                         f"path_agents={reroute_loop_agents} "
-                        f"route_cost_rows={len(route_cost_history)} "
+                        f"route_cost_rows={len(route_cost_table or ())} "
                         f"switches={len(route_history)}"
                     )
                     reroute_debug_printed = True
@@ -1830,6 +2099,7 @@ def run_scenario(
                                 tracked_agent_id, None
                             )
                             cognitive_maps.pop(tracked_agent_id, None)
+                            reroute_scheduler.remove(tracked_agent_id)
                             if (
                                 removed_state is not None
                                 and removed_state.current_exit
@@ -2018,8 +2288,28 @@ def run_scenario(
 
         if reroute_config is not None and route_history:
             metrics["route_switches"] = len(route_history)
-        if reroute_config is not None and collect_route_cost_history:
-            metrics["route_cost_samples"] = len(route_cost_history)
+        if route_cost_table is not None:
+            metrics["route_cost_samples"] = len(route_cost_table)
+            if route_cost_table.dropped_rows:
+                metrics["route_cost_rows_dropped"] = route_cost_table.dropped_rows
+        if reroute_config is not None and stage_graph is not None:
+            metrics["route_ranking_cache_hits"] = route_ranking_cache.hits
+            metrics["route_ranking_cache_misses"] = route_ranking_cache.misses
+            metrics["route_ranking_cache_hit_rate"] = round(
+                route_ranking_cache.hit_rate, 4
+            )
+            metrics["route_segment_frame_hits"] = route_segment_costs.hits
+            metrics["route_segment_frame_misses"] = route_segment_costs.misses
+            metrics["route_segment_edges_evaluated"] = (
+                route_segment_costs.edges_evaluated
+            )
+            metrics["route_segment_edges_reused"] = route_segment_costs.edges_reused
+            if route_overlay is not None:
+                metrics["route_clusters"] = len(route_overlay.cluster_labels)
+                metrics["route_overlay_stages"] = route_overlay.overlay_size
+                metrics["route_cluster_updates"] = route_overlay.cluster_updates
+            if route_time_table is not None:
+                metrics["route_time_frames"] = route_time_table.n_frames
 
         return ScenarioResult(
             metrics=metrics,
@@ -2027,11 +2317,7 @@ def run_scenario(
             smoke_history=smoke_history if smoke_speed_model is not None else None,
             fed_history=fed_history if fed_model is not None else None,
             route_history=route_history if reroute_config is not None else None,
-            route_cost_history=(
-                route_cost_history
-                if reroute_config is not None and collect_route_cost_history
-                else None
-            ),
+            route_cost_table=route_cost_table,
         )
     finally:
         try:
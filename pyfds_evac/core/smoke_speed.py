@@ -125,6 +125,10 @@ class ExtinctionField:
         )
         return cls(sampler)
 
+    def frame_key(self, time_s: float) -> int:
+        """Return the FDS output frame sampled at *time_s*."""
+        return self._sampler.frame_key(time_s)
+
     def sample_extinction(self, time_s: float, x: float, y: float) -> float:
         """Return the nearest-grid extinction coefficient K [1/m]."""
         try:
@@ -141,6 +145,42 @@ class ExtinctionField:
                 self._warned_ood = True
             return 0.0
 
+    def sample_extinction_many(
+        self, time_s: float, xs: np.ndarray, ys: np.ndarray
+    ) -> np.ndarray:
+        """Return extinction coefficients for arrays of x/y points.
+
+        Vectorised counterpart of ``sample_extinction``; out-of-domain
+        points are returned as 0.0.
+        """
+        values = self._sampler.sample_many(time_s, xs, ys)
+        outside = ~self._sampler.contains_many(xs, ys)
+        if outside.any():
+            if not self._warned_ood:
+                first = int(np.flatnonzero(outside)[0])
+                _logger.warning(
+                    "Extinction sample at (%.2f, %.2f, t=%.1f) is outside "
+                    "the FDS slice domain; returning 0.0 for out-of-domain points",
+                    float(np.asarray(xs)[first]),
+                    float(np.asarray(ys)[first]),
+                    time_s,
+                )
+                self._warned_ood = True
+            values[outside] = 0.0
+        return values
+
+    def changed_many(
+        self,
+        time_a: float,
+        time_b: float,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        *,
+        tolerance: float = 0.0,
+    ) -> np.ndarray:
+        """Return a mask of points whose extinction changed between two times."""
+        return self._sampler.changed_many(time_a, time_b, xs, ys, tolerance=tolerance)
+
 
 class ConstantExtinctionField:
     """Return a constant extinction coefficient everywhere.
@@ -154,11 +194,36 @@ class ConstantExtinctionField:
         """Store a constant extinction coefficient in 1/m."""
         self.extinction_per_m = float(extinction_per_m)
 
+    def frame_key(self, time_s: float) -> int:
+        """Return a single frame; the field never changes."""
+        del time_s
+        return 0
+
     def sample_extinction(self, time_s: float, x: float, y: float) -> float:
         """Return the configured constant value for any point and time."""
         del time_s, x, y
         return self.extinction_per_m
 
+    def sample_extinction_many(
+        self, time_s: float, xs: np.ndarray, ys: np.ndarray
+    ) -> np.ndarray:
+        """Return the configured constant value for every point."""
+        del time_s, ys
+        return np.full(np.shape(xs), self.extinction_per_m)
+
+    def changed_many(
+        self,
+        time_a: float,
+        time_b: float,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        *,
+        tolerance: float = 0.0,
+    ) -> np.ndarray:
+        """Return an all-False mask; the field never changes."""
+        del time_a, time_b, ys, tolerance
+        return np.zeros(np.shape(xs), dtype=bool)
+
 
 def extinction_from_soot_density(
     soot_density_mg_per_m3: float,
@@ -219,11 +284,31 @@ def speed_factor_from_extinction(
     - Hard clamp at min_speed_factor preserves the FDS+Evac fractional interpretation.
     """
 
-    if not np.isfinite(extinction_per_m):
-        extinction_per_m = 0.0
-    extinction_per_m = max(0.0, float(extinction_per_m))
-    factor = 1.0 + (beta * extinction_per_m) / alpha
-    return float(np.clip(factor, min_speed_factor, 1.0))
+    return float(
+        speed_factor_from_extinction_many(
+            extinction_per_m,
+            alpha=alpha,
+            beta=beta,
+            min_speed_factor=min_speed_factor,
+        )
+    )
+
+
+def speed_factor_from_extinction_many(
+    extinction_per_m: np.ndarray,
+    *,
+    alpha: float = 0.706,
+    beta: float = -0.057,
+    min_speed_factor: float = 0.1,
+) -> np.ndarray:
+    """Apply ``speed_factor_from_extinction`` to an array of K [1/m].
+
+    Non-finite and negative K count as clear air, as in the scalar form,
+    which delegates here so both always follow the same law.
+    """
+    k = np.asarray(extinction_per_m, dtype=float)
+    k = np.maximum(0.0, np.where(np.isfinite(k), k, 0.0))
+    return np.clip(1.0 + (beta * k) / alpha, min_speed_factor, 1.0)
 
 
 def speed_factor_from_extinction_fridolf(
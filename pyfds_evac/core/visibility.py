@@ -2,14 +2,24 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import os
+import tempfile
+from collections.abc import Sequence
 from pathlib import Path
 
 import numpy as np
 
+from .array_dir import load_array_dir, save_array_dir
+
 _logger = logging.getLogger(__name__)
 
+# Cache paths with this suffix use the per-sign directory layout.
+VISMAP_DIR_SUFFIX = ".vismap"
+_GRID_ARRAYS = ("time_points", "x_coords", "y_coords")
+
 
 def extract_sign_descriptors(raw_config: dict) -> dict[str, dict]:
     """Return {node_id: {x, y, alpha, c}} for all nodes with a 'sign' field."""
@@ -68,11 +78,29 @@ def _make_meta(
     }
 
 
+def _make_grid_meta(fds_dir: str, time_step_s: float, slice_height_m: float) -> dict:
+    """Metadata shared by all signs of a per-sign (``.vismap``) cache."""
+    return {
+        "fds_dir": str(Path(fds_dir).resolve()),
+        "time_step_s": time_step_s,
+        "slice_height_m": slice_height_m,
+    }
+
+
+def _sign_key(sign: dict) -> str:
+    """File key of one sign's visibility: its position, bearing and contrast."""
+    geometry = [sign.get("x"), sign.get("y"), sign.get("alpha"), sign.get("c", 3)]
+    return hashlib.sha256(json.dumps(geometry).encode()).hexdigest()[:16]
+
+
 class _VisMapCache:
     """Lightweight visibility lookup backed by pre-computed numpy arrays.
 
     Mirrors the ``wp_is_visible`` interface of ``fdsvismap.VisMap`` without
-    carrying any of the heavy FDS reader state or requiring pickle.
+    carrying any of the heavy FDS reader state or requiring pickle.  Each
+    waypoint's visibility is a ``(T, H, ceil(W / 8))`` array bit-packed
+    along the x axis (``np.packbits``), one bit per cell instead of one
+    byte; waypoints may come from separate (memory-mapped) files.
     """
 
     def __init__(
@@ -80,12 +108,56 @@ class _VisMapCache:
         time_points: np.ndarray,
         x_coords: np.ndarray,
         y_coords: np.ndarray,
-        vis: np.ndarray,  # shape (T, N_wp, H, W), dtype bool
+        packed: Sequence[np.ndarray],  # per waypoint, shape (T, H, ceil(W / 8))
+        width: int,
     ) -> None:
         self._time_points = time_points
         self._x_coords = x_coords
         self._y_coords = y_coords
-        self._vis = vis
+        self._packed = list(packed)
+        self._width = width
+
+    @classmethod
+    def from_packed(
+        cls,
+        time_points: np.ndarray,
+        x_coords: np.ndarray,
+        y_coords: np.ndarray,
+        packed: np.ndarray,  # shape (T, N_wp, H, ceil(W / 8)), dtype uint8
+        width: int,
+    ) -> _VisMapCache:
+        """Split a packed ``(T, N_wp, H, ceil(W / 8))`` array by waypoint."""
+        return cls(
+            time_points,
+            x_coords,
+            y_coords,
+            [packed[:, wp] for wp in range(packed.shape[1])],
+            width,
+        )
+
+    @classmethod
+    def from_bool(
+        cls,
+        time_points: np.ndarray,
+        x_coords: np.ndarray,
+        y_coords: np.ndarray,
+        vis: np.ndarray,  # shape (T, N_wp, H, W), dtype bool
+    ) -> _VisMapCache:
+        """Pack a ``(T, N_wp, H, W)`` bool array."""
+        return cls.from_packed(
+            time_points, x_coords, y_coords, np.packbits(vis, axis=-1), vis.shape[-1]
+        )
+
+    @property
+    def vis(self) -> np.ndarray:
+        """Unpacked ``(T, N_wp, H, W)`` bool array (allocates a copy)."""
+        return np.stack(
+            [
+                np.unpackbits(p, axis=-1, count=self._width).astype(bool)
+                for p in self._packed
+            ],
+            axis=1,
+        )
 
     @staticmethod
     def _nearest(coords: np.ndarray, value: float) -> int:
@@ -102,19 +174,68 @@ class _VisMapCache:
         t_id = self._nearest(self._time_points, time)
         x_id = self._nearest(self._x_coords, x)
         y_id = self._nearest(self._y_coords, y)
-        return bool(self._vis[t_id, waypoint_id, y_id, x_id])
+        byte = self._packed[waypoint_id][t_id, y_id, x_id >> 3]
+        return bool((byte >> (7 - (x_id & 7))) & 1)
 
+    @staticmethod
+    def _nearest_many(coords: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Vectorised ``_nearest`` (same tie-breaking and clamping)."""
+        n = len(coords)
+        idx = np.searchsorted(coords, values)
+        hi = np.minimum(idx, n - 1)
+        lo = np.maximum(idx - 1, 0)
+        nearest = np.where(
+            np.abs(coords[hi] - values) < np.abs(values - coords[lo]), hi, lo
+        )
+        nearest[idx <= 0] = 0
+        nearest[idx >= n] = n - 1
+        return nearest
+
+    def wp_is_visible_many(
+        self,
+        time: float,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        waypoint_ids: np.ndarray,
+    ) -> np.ndarray:
+        """Return ``wp_is_visible`` for many (x, y, waypoint) at one *time*.
+
+        The cells of each waypoint are read with one gather from its
+        packed array.
+        """
+        t_id = self._nearest(self._time_points, time)
+        x_ids = self._nearest_many(self._x_coords, np.asarray(xs, dtype=float))
+        y_ids = self._nearest_many(self._y_coords, np.asarray(ys, dtype=float))
+        waypoint_ids = np.asarray(waypoint_ids)
+        bytes_ = np.empty(len(x_ids), dtype=np.uint8)
+        for wp in np.unique(waypoint_ids):
+            sel = waypoint_ids == wp
+            bytes_[sel] = self._packed[wp][t_id, y_ids[sel], x_ids[sel] >> 3]
+        return ((bytes_ >> (7 - (x_ids & 7))) & 1).astype(bool)
+
+
+def _vis_packed_array(vis) -> tuple[np.ndarray, int]:
+    """Pack VisMap's nested list into a (T, N_wp, H, ceil(W / 8)) array.
+
+    Time steps are packed one at a time, so the unpacked bool array is
+    never held for all of them at once.  Returns the array and W.
+    """
+    packed = []
+    width = 0
+    for ts in vis.all_time_all_wp_vismap_array_list:
+        step = np.array(list(ts), dtype=bool)
+        width = step.shape[-1]
+        packed.append(np.packbits(step, axis=-1))
+    return np.stack(packed), width
 
-def _vis_bool_array(vis) -> np.ndarray:
-    """Convert VisMap's nested list to a (T, N_wp, H, W) bool array."""
-    return np.array(
-        [list(ts) for ts in vis.all_time_all_wp_vismap_array_list],
-        dtype=bool,
-    )
 
+def _save_vismap_cache(
+    path: Path, vis, packed: np.ndarray, width: int, meta: dict
+) -> None:
+    """Serialise VisMap arrays to an npz file (no pickle, safe to load).
 
-def _save_vismap_cache(path: Path, vis, arrays: np.ndarray, meta: dict) -> None:
-    """Serialise VisMap arrays to an npz file (no pickle, safe to load)."""
+    The visibility array is stored bit-packed along x, with its width.
+    """
     npz_path = path.with_suffix(".npz")
     if path.suffix and path.suffix != ".npz":
         _logger.warning(
@@ -129,11 +250,173 @@ def _save_vismap_cache(path: Path, vis, arrays: np.ndarray, meta: dict) -> None:
         time_points=vis.vismap_time_points,
         x_coords=vis.all_x_coords,
         y_coords=vis.all_y_coords,
-        vis=arrays,
+        vis=packed,
+        width=np.array(width),
         meta=np.array(json.dumps(meta)),
     )
 
 
+def _save_vismap_grid(
+    directory: Path, arrays: dict[str, np.ndarray], width: int, meta: dict
+) -> None:
+    """Start a per-sign cache: grid ``.npy`` files, ``meta.json``, ``signs/``.
+
+    Uses ``save_array_dir``, so an existing directory is never replaced;
+    ``_load_vismap_grid`` tells whether it matches.
+    """
+    save_array_dir(
+        directory,
+        {name: arrays[name] for name in _GRID_ARRAYS},
+        {"meta": meta, "width": width},
+        subdirs=("signs",),
+    )
+
+
+def _load_vismap_grid(directory: Path, expected_meta: dict) -> dict | None:
+    """Memory-map the grid of a per-sign cache.
+
+    Returns the grid arrays and ``width``, or None when the directory is
+    missing, unreadable or was saved with different metadata.
+    """
+    loaded = load_array_dir(
+        directory,
+        _GRID_ARRAYS,
+        lambda payload: payload.get("meta") == expected_meta,
+        "vismap cache",
+    )
+    if loaded is None:
+        return None
+    payload, grid = loaded
+    grid["width"] = int(payload["width"])
+    return grid
+
+
+def _load_sign(directory: Path, key: str, grid: dict) -> np.ndarray | None:
+    """Memory-map one sign's packed array from a per-sign cache.
+
+    Returns None when the file is missing, unreadable or does not match
+    the ``(T, H, ceil(W / 8))`` shape of *grid*, so the sign is computed
+    again.
+    """
+    path = directory / "signs" / f"{key}.npy"
+    if not path.exists():
+        return None
+    shape = (
+        len(grid["time_points"]),
+        len(grid["y_coords"]),
+        -(-grid["width"] // 8),
+    )
+    try:
+        packed = np.load(path, mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError) as e:
+        _logger.warning("Failed to load vismap sign %s: %s", key, e)
+        return None
+    if packed.shape != shape or packed.dtype != np.uint8:
+        _logger.warning(
+            "Vismap sign %s has shape %s, expected %s (uint8) — recomputing.",
+            key,
+            packed.shape,
+            shape,
+        )
+        return None
+    return packed
+
+
+def _save_sign(directory: Path, key: str, packed: np.ndarray) -> bool:
+    """Write one sign's packed ``(T, H, ceil(W / 8))`` array atomically.
+
+    Returns False, after logging, when the file cannot be written (for
+    example because the directory was removed meanwhile).
+    """
+    signs = directory / "signs"
+    try:
+        fd, tmp = tempfile.mkstemp(dir=signs, prefix=f".{key}", suffix=".npy")
+    except OSError as e:
+        _logger.warning("Failed to save vismap sign %s: %s", key, e)
+        return False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, packed, allow_pickle=False)
+        os.replace(tmp, signs / f"{key}.npy")
+    except OSError as e:
+        _logger.warning("Failed to save vismap sign %s: %s", key, e)
+        return False
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return True
+
+
+def _resolve_vis_dir(
+    fds_dir: str,
+    sign_descriptors: dict[str, dict],
+    time_step_s: float,
+    slice_height_m: float,
+    directory: Path,
+    force_recompute: bool,
+) -> _VisMapCache:
+    """Return a _VisMapCache from a per-sign ``.vismap`` cache directory.
+
+    Each sign is stored in ``signs/<key>.npy``, keyed by its own geometry
+    (``_sign_key``); the directory metadata only covers the FDS data,
+    time step and slice height.  Only signs without a file are computed
+    with fdsvismap, so adding, moving or re-angling one sign recomputes
+    that sign alone.  Files are memory-mapped; when the directory holds
+    another case or cannot be written, the computed arrays are used
+    from memory instead.
+    """
+    grid_meta = _make_grid_meta(fds_dir, time_step_s, slice_height_m)
+    grid = None if force_recompute else _load_vismap_grid(directory, grid_meta)
+    keys = {node_id: _sign_key(sign) for node_id, sign in sign_descriptors.items()}
+    signs: dict[str, np.ndarray] = {}
+    missing: dict[str, str] = {}
+    for node_id, key in keys.items():
+        if key in signs or key in missing.values():
+            continue
+        packed = None if grid is None else _load_sign(directory, key, grid)
+        if packed is None:
+            missing[node_id] = key
+        else:
+            signs[key] = packed
+    if grid is None or missing:
+        vis_obj = _build_vismap(
+            fds_dir,
+            {node_id: sign_descriptors[node_id] for node_id in missing},
+            time_step_s,
+            slice_height_m,
+        )
+        packed, width = _vis_packed_array(vis_obj)
+        writable = grid is not None
+        if grid is None:
+            computed = {
+                "time_points": np.asarray(vis_obj.vismap_time_points),
+                "x_coords": np.asarray(vis_obj.all_x_coords),
+                "y_coords": np.asarray(vis_obj.all_y_coords),
+            }
+            _save_vismap_grid(directory, computed, width, grid_meta)
+            grid = _load_vismap_grid(directory, grid_meta)
+            writable = grid is not None
+            if grid is None:
+                _logger.warning(
+                    "Vismap cache %s holds other data; using the computed "
+                    "visibility without caching it.",
+                    directory,
+                )
+                grid = {**computed, "width": width}
+        for wp_id, key in enumerate(missing.values()):
+            saved = None
+            if writable and _save_sign(directory, key, packed[:, wp_id]):
+                saved = _load_sign(directory, key, grid)
+            signs[key] = packed[:, wp_id] if saved is None else saved
+    return _VisMapCache(
+        time_points=grid["time_points"],
+        x_coords=grid["x_coords"],
+        y_coords=grid["y_coords"],
+        packed=[signs[key] for key in keys.values()],
+        width=grid["width"],
+    )
+
+
 def _resolve_vis(
     fds_dir: str,
     sign_descriptors: dict[str, dict],
@@ -143,7 +426,20 @@ def _resolve_vis(
     force_recompute: bool,
     expected_meta: dict,
 ) -> "_VisMapCache":
-    """Return a _VisMapCache, loading from disk or computing from FDS data."""
+    """Return a _VisMapCache, loading from disk or computing from FDS data.
+
+    Cache paths ending in ``.vismap`` use the per-sign directory layout
+    (``_resolve_vis_dir``); others a single npz.
+    """
+    if cache is not None and cache.suffix == VISMAP_DIR_SUFFIX:
+        return _resolve_vis_dir(
+            fds_dir,
+            sign_descriptors,
+            time_step_s,
+            slice_height_m,
+            cache,
+            force_recompute,
+        )
     if not force_recompute and cache:
         cached = _load_vismap_cache(cache, expected_meta)
         if cached is not None:
@@ -163,15 +459,16 @@ def _build_cache_from_fds(
 ) -> _VisMapCache:
     """Build VisMapCache from FDS data and optionally save to disk."""
     vis_obj = _build_vismap(fds_dir, sign_descriptors, time_step_s, slice_height_m)
-    arrays = _vis_bool_array(vis_obj)
-    result = _VisMapCache(
-        time_points=vis_obj.vismap_time_points,
-        x_coords=vis_obj.all_x_coords,
-        y_coords=vis_obj.all_y_coords,
-        vis=arrays,
+    packed, width = _vis_packed_array(vis_obj)
+    result = _VisMapCache.from_packed(
+        vis_obj.vismap_time_points,
+        vis_obj.all_x_coords,
+        vis_obj.all_y_coords,
+        packed,
+        width,
     )
     if cache:
-        _save_vismap_cache(cache, vis_obj, arrays, expected_meta)
+        _save_vismap_cache(cache, vis_obj, packed, width, expected_meta)
     return result
 
 
@@ -192,11 +489,20 @@ def _load_vismap_cache(path: Path, expected_meta: dict) -> _VisMapCache | None:
             if json.loads(str(data["meta"])) != expected_meta:
                 _logger.info("Vismap cache metadata mismatch — recomputing.")
                 return None
-            return _VisMapCache(
-                time_points=data["time_points"],
-                x_coords=data["x_coords"],
-                y_coords=data["y_coords"],
-                vis=data["vis"],
+            if "width" not in data:
+                # Caches written before bit-packing hold the bool array.
+                return _VisMapCache.from_bool(
+                    data["time_points"],
+                    data["x_coords"],
+                    data["y_coords"],
+                    data["vis"].astype(bool, copy=False),
+                )
+            return _VisMapCache.from_packed(
+                data["time_points"],
+                data["x_coords"],
+                data["y_coords"],
+                data["vis"],
+                int(data["width"]),
             )
     except Exception as e:
         _logger.warning("Failed to load vismap cache: %s", e)
@@ -214,9 +520,14 @@ class VisibilityModel:
     If a node has no 'sign' descriptor it is always considered visible
     (fallback to current behaviour).
 
-    Cache format: numpy npz containing the visibility arrays and metadata.
-    The cache is safe to load (no pickle / no arbitrary code execution).
-    Metadata mismatches trigger an automatic recompute and cache refresh.
+    Cache format: numpy npz containing the visibility arrays and metadata,
+    or, for a *cache_path* ending in ``.vismap``, a directory of raw
+    ``.npy`` files, one per sign, plus ``meta.json``.  The directory is
+    memory-mapped on load (no decompression; concurrent runs share the
+    page cache), and only signs whose geometry is not cached yet are
+    computed.  Either is safe to load (no pickle / no arbitrary code
+    execution).  Metadata mismatches trigger an automatic recompute and
+    cache refresh.
     """
 
     def __init__(
@@ -257,3 +568,31 @@ class VisibilityModel:
         if wp_id is None:
             return True
         return self._vis.wp_is_visible(time=time, x=x, y=y, waypoint_id=wp_id)
+
+    def node_is_visible_many(
+        self,
+        time: float,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        node_ids: list[str],
+    ) -> np.ndarray:
+        """Return ``node_is_visible`` for many (x, y, node) at one *time*.
+
+        Nodes without a sign descriptor are visible; the others are looked
+        up in one vectorised gather.
+        """
+        wp_ids = np.fromiter(
+            (self._wp_ids.get(node_id, -1) for node_id in node_ids),
+            dtype=np.intp,
+            count=len(node_ids),
+        )
+        visible = np.ones(len(wp_ids), dtype=bool)
+        signed = wp_ids >= 0
+        if signed.any():
+            visible[signed] = self._vis.wp_is_visible_many(
+                time,
+                np.asarray(xs, dtype=float)[signed],
+                np.asarray(ys, dtype=float)[signed],
+                wp_ids[signed],
+            )
+        return visible
@@ -14,6 +14,7 @@ from pyfds_evac.core import (
     FdsFedField,
     RerouteConfig,
     RouteCostConfig,
+    RouteCostSampling,
     SmokeSpeedConfig,
     SmokeSpeedModel,
     inspect_fds_quantities,
@@ -106,11 +107,55 @@ def _build_parser() -> argparse.ArgumentParser:
         "--output-route-cost-history",
         help="Write ranked route cost snapshots to CSV",
     )
+    parser.add_argument(
+        "--route-cost-every",
+        type=int,
+        default=1,
+        help="Record route costs only every Nth reroute pass (default: 1)",
+    )
+    parser.add_argument(
+        "--route-cost-top-k",
+        type=int,
+        default=None,
+        help="Record only the K best routes per ranking (default: all)",
+    )
+    parser.add_argument(
+        "--route-cost-agent-stride",
+        type=int,
+        default=1,
+        help="Record route costs only for agent IDs divisible by N (default: 1)",
+    )
+    parser.add_argument(
+        "--route-cost-max-rows",
+        type=int,
+        default=None,
+        help="Stop recording route costs after this many rows (default: unbounded)",
+    )
+    parser.add_argument(
+        "--edge-cache",
+        help="JSON file caching stage-graph edge polylines across runs. "
+        "Requires --enable-rerouting. Created if missing, extended if present.",
+    )
+    parser.add_argument(
+        "--graph-workers",
+        type=int,
+        default=1,
+        help="Processes computing stage-graph edge polylines (default: 1). "
+        "Requires --enable-rerouting.",
+    )
+    parser.add_argument(
+        "--edge-table-cache",
+        help="Directory of whole-run edge cost tables (smoke and FED per edge "
+        "and frame) shared across runs of an ensemble. Requires "
+        "--enable-rerouting; used when routing.time_dependent is set. Tables "
+        "are created if missing, loaded if present.",
+    )
     parser.add_argument(
         "--vis-cache",
-        help="Path to vismap pickle cache for visibility-gated route rejection. "
+        help="Path to vismap cache for visibility-gated route rejection. "
         "Requires --fds-dir and --enable-rerouting. "
-        "Cache is created if missing, loaded if present.",
+        "Cache is created if missing, loaded if present. A path ending in "
+        ".vismap is a memory-mapped directory; otherwise an .npz file.",
     )
     return parser
 
@@ -129,6 +174,32 @@ def _export_app_bundle(scenario, output_dir: str) -> None:
     )
 
 
+def _stage_clusters(clusters: dict | None) -> dict[str, str] | None:
+    """Invert the `routing.clusters` mapping (cluster -> stage IDs)."""
+    if clusters is None:
+        return None
+    return {
+        stage_id: cluster_id
+        for cluster_id, stage_ids in clusters.items()
+        for stage_id in stage_ids
+    }
+
+
+def _fire_case_id(args, with_fed: bool) -> str:
+    """Identify the smoke and FED inputs, for keying shared edge tables."""
+    return json.dumps(
+        {
+            "fds_dir": (
+                str(pathlib.Path(args.fds_dir).resolve()) if args.fds_dir else None
+            ),
+            "constant_extinction": args.constant_extinction,
+            "slice_height_m": args.smoke_slice_height,
+            "fed": with_fed,
+        },
+        sort_keys=True,
+    )
+
+
 def _write_smoke_history_csv(rows, output_path: str) -> None:
     """Write sampled smoke-speed history rows to a CSV file."""
     destination = pathlib.Path(output_path).resolve()
@@ -192,37 +263,6 @@ def _write_route_history_csv(rows, output_path: str) -> None:
             writer.writerow(row)
 
 
-def _write_route_cost_history_csv(rows, output_path: str) -> None:
-    """Write ranked route cost snapshots to a CSV file."""
-    destination = pathlib.Path(output_path).resolve()
-    destination.parent.mkdir(parents=True, exist_ok=True)
-    fieldnames = [
-        "time_s",
-        "agent_id",
-        "source",
-        "current_exit",
-        "current_fed",
-        "route_rank",
-        "exit_id",
-        "path",
-        "path_length_m",
-        "k_ave_route",
-        "travel_time_s",
-        "fed_max_route",
-        "composite_cost",
-        "rejected",
-        "rejection_reason",
-        "queue_time_s",
-        "exit_count",
-        "exit_capacity",
-    ]
-    with destination.open("w", encoding="utf-8", newline="") as handle:
-        writer = csv.DictWriter(handle, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
-
-
 def main() -> int:
     """Parse arguments, run the scenario, and export requested outputs."""
     args = _build_parser().parse_args()
@@ -279,6 +319,19 @@ def main() -> int:
                 slice_height_m=args.smoke_slice_height,
             )
             fed_model = DefaultFedModel(FdsFedField.from_fds(args.fds_dir), fed_config)
+    if args.edge_cache and not args.enable_rerouting:
+        raise ValueError("--edge-cache requires --enable-rerouting")
+    if args.graph_workers != 1 and not args.enable_rerouting:
+        raise ValueError("--graph-workers requires --enable-rerouting")
+    if args.edge_table_cache and not args.enable_rerouting:
+        raise ValueError("--edge-table-cache requires --enable-rerouting")
+    for flag, value in (
+        ("--route-cost-every", args.route_cost_every),
+        ("--route-cost-agent-stride", args.route_cost_agent_stride),
+        ("--route-cost-top-k", args.route_cost_top_k),
+    ):
+        if value is not None and value < 1:
+            raise ValueError(f"{flag} must be at least 1, got {value}")
     reroute_config = None
     if args.enable_rerouting:
         routing_params = scenario.raw.get("routing", {})
@@ -301,6 +354,24 @@ def main() -> int:
         reroute_config = RerouteConfig(
             reevaluation_interval_s=args.reroute_interval,
             cost_config=cost_config,
+            extinction_change_tolerance=routing_params.get(
+                "extinction_change_tolerance", 0.0
+            ),
+            edge_cache_path=args.edge_cache,
+            graph_build_workers=args.graph_workers,
+            lazy_edge_evaluation=bool(
+                routing_params.get("lazy_edge_evaluation", False)
+            ),
+            batch_decisions=bool(routing_params.get("batch_decisions", False)),
+            assignment_mode=routing_params.get("assignment_mode", "greedy"),
+            agent_first_leg=bool(routing_params.get("agent_first_leg", False)),
+            route_alternatives=int(routing_params.get("route_alternatives", 0)),
+            time_dependent=bool(routing_params.get("time_dependent", False)),
+            time_dependent_step_s=routing_params.get("time_dependent_step_s", 10.0),
+            edge_table_cache_dir=args.edge_table_cache,
+            edge_table_case_id=_fire_case_id(args, fed_model is not None),
+            stage_clusters=_stage_clusters(routing_params.get("clusters")),
+            cluster_cell_m=routing_params.get("cluster_cell_m"),
         )
 
     vis_model = None
@@ -333,6 +404,12 @@ def main() -> int:
         reroute_config=reroute_config,
         collect_route_cost_history=bool(args.output_route_cost_history),
         vis_model=vis_model,
+        route_cost_sampling=RouteCostSampling(
+            every_nth_pass=args.route_cost_every,
+            top_k=args.route_cost_top_k,
+            agent_stride=args.route_cost_agent_stride,
+            max_rows=args.route_cost_max_rows,
+        ),
     )
     if result.agents_remaining == 0:
         print(
@@ -353,12 +430,9 @@ def main() -> int:
     if args.output_route_history and result.route_history is not None:
         _write_route_history_csv(result.route_history, args.output_route_history)
         print(f"Route switches: {len(result.route_history)}")
-    if args.output_route_cost_history and result.route_cost_history is not None:
-        _write_route_cost_history_csv(
-            result.route_cost_history,
-            args.output_route_cost_history,
-        )
-        print(f"Route cost samples: {len(result.route_cost_history)}")
+    if args.output_route_cost_history and result.route_cost_table is not None:
+        result.route_cost_table.write_csv(args.output_route_cost_history)
+        print(f"Route cost samples: {len(result.route_cost_table)}")
 
     if args.output_sqlite and result.sqlite_file:
         output_path = pathlib.Path(args.output_sqlite).resolve()
@@ -0,0 +1,129 @@
+"""Benchmark A* against Dijkstra for single-target and nearest-exit queries.
+
+Builds square grid stage graphs (rooms on a regular grid, exits along the
+border), applies random smoke factors >= 1 to the edge weights and times:
+
+  dijkstra_full    full Dijkstra from the source (previous shortest_exit)
+  dijkstra_target  Dijkstra stopped once the target is settled
+  astar_target     A* to one target (StageGraph.shortest_path)
+  astar_exit       A* to the nearest exit (StageGraph.shortest_exit)
+
+Queries run on the compiled graph with precomputed slot weights, so
+the timings compare the searches alone.  Every A* cost is checked
+against Dijkstra.
+
+Usage:
+    uv run python scripts/benchmark_astar.py --sizes 30 60 100 --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import time
+
+from pyfds_evac.core.route_graph import StageEdge, StageGraph, StageNode
+
+
+def _grid_graph(size: int, spacing_m: float, seed: int) -> StageGraph:
+    """*size* x *size* rooms linked to their 4 neighbours, exits on the border."""
+    rng = random.Random(seed)
+    nodes = {}
+    for i in range(size):
+        for j in range(size):
+            sid = f"R{i}_{j}"
+            border = i in (0, size - 1) or j in (0, size - 1)
+            kind = "exit" if border and rng.random() < 0.05 else "checkpoint"
+            nodes[sid] = StageNode(sid, i * spacing_m, j * spacing_m, kind)
+    edges: dict[str, list[StageEdge]] = {}
+    for i in range(size):
+        for j in range(size):
+            for di, dj in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                ti, tj = i + di, j + dj
+                if 0 <= ti < size and 0 <= tj < size:
+                    # Corridors are a little longer than the straight line.
+                    length = spacing_m * rng.uniform(1.0, 1.3)
+                    edges.setdefault(f"R{i}_{j}", []).append(
+                        StageEdge(f"R{i}_{j}", f"R{ti}_{tj}", length)
+                    )
+    return StageGraph(nodes=nodes, edges=edges)
+
+
+def _smoke_weights(graph: StageGraph, seed: int) -> dict[tuple[str, str], float]:
+    """Edge weights scaled by a smoke factor >= 1, as compute_dynamic_weights."""
+    rng = random.Random(seed)
+    return {
+        (e.source, e.target): e.weight * (1.0 + 2.0 * rng.random() ** 4)
+        for edges in graph.edges.values()
+        for e in edges
+    }
+
+
+def _time(fn, queries) -> tuple[float, list]:
+    start = time.perf_counter()
+    results = [fn(*q) for q in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e3, results
+
+
+def _bench(size: int, n_queries: int, seed: int) -> dict[str, float]:
+    graph = _grid_graph(size, 4.0, seed)
+    weights = _smoke_weights(graph, seed)
+    compiled = graph.compiled()
+    slot_weights = compiled.weights_for(weights)
+    rng = random.Random(seed)
+    ids = list(graph.nodes)
+    pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(n_queries)]
+
+    def dijkstra_full(source, _target):
+        dist, _prev = compiled.dijkstra(compiled.index[source], slot_weights)
+        return min((dist[e] for e in compiled.exit_indices), default=math.inf)
+
+    def dijkstra_target(source, target):
+        t = compiled.index[target]
+        dist, _prev = compiled.dijkstra(
+            compiled.index[source], slot_weights, stop_at=(t,)
+        )
+        return dist[t]
+
+    def astar_target(source, target):
+        found = compiled.astar(
+            compiled.index[source], (compiled.index[target],), slot_weights
+        )
+        return found[0] if found is not None else math.inf
+
+    def astar_exit(source, _target):
+        found = compiled.astar(
+            compiled.index[source], compiled.exit_indices, slot_weights
+        )
+        return found[0] if found is not None else math.inf
+
+    timings = {}
+    timings["dijkstra_full"], full = _time(dijkstra_full, pairs)
+    timings["dijkstra_target"], expected = _time(dijkstra_target, pairs)
+    timings["astar_target"], found = _time(astar_target, pairs)
+    timings["astar_exit"], nearest = _time(astar_exit, pairs)
+    for a, b in zip(expected, found, strict=True):
+        assert math.isclose(a, b, rel_tol=1e-9), (a, b)
+    for a, b in zip(full, nearest, strict=True):
+        assert math.isclose(a, b, rel_tol=1e-9), (a, b)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 60, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    header = ["nodes", "dijkstra_full", "dijkstra_target", "astar_target", "astar_exit"]
+    print(" ".join(f"{h:>16}" for h in header) + "   [ms per query]")
+    for size in args.sizes:
+        timings = _bench(size, args.queries, args.seed)
+        row = [f"{size * size:>16}"] + [f"{timings[h]:>16.3f}" for h in header[1:]]
+        print(" ".join(row))
+
+
+if __name__ == "__main__":
+    main()
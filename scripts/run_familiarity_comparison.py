@@ -125,7 +125,11 @@ def run_tier(
         "agents_evacuated": result.agents_evacuated,
         "total_agents": result.total_agents,
         "agents_remaining": result.agents_remaining,
-        "route_cost_history": result.route_cost_history or [],
+        "route_cost_history": pd.DataFrame(
+            result.route_cost_table.columns()
+            if result.route_cost_table is not None
+            else {}
+        ),
         "route_history": result.route_history or [],
     }
 
@@ -134,8 +138,8 @@ def save_csvs(results: list[dict], out_dir: Path) -> None:
     out_dir.mkdir(parents=True, exist_ok=True)
     for r in results:
         label = r["label"]
-        if r["route_cost_history"]:
-            pd.DataFrame(r["route_cost_history"]).to_csv(
+        if not r["route_cost_history"].empty:
+            r["route_cost_history"].to_csv(
                 out_dir / f"{label}_route_costs.csv", index=False
             )
         if r["route_history"]:
@@ -159,7 +163,7 @@ def plot_comparison(results: list[dict], out_dir: Path) -> None:
 
     for i, r in enumerate(results):
         label = r["label"]
-        rc = pd.DataFrame(r["route_cost_history"])
+        rc = r["route_cost_history"]
         if rc.empty:
             counts = [0, 0]
         else:
@@ -208,7 +212,7 @@ def plot_comparison(results: list[dict], out_dir: Path) -> None:
     # ── Panel 2: rejection events over time ───────────────────────────────────
     ax = axes[1]
     for r in results:
-        rc = pd.DataFrame(r["route_cost_history"])
+        rc = r["route_cost_history"]
         if rc.empty:
             continue
         rejected = rc[
@@ -0,0 +1,39 @@
+"""Tests for the shared .npy directory caches."""
+
+import json
+
+import numpy as np
+
+from pyfds_evac.core.array_dir import load_array_dir, save_array_dir
+
+
+def _accept(payload):
+    return payload.get("meta") == "a"
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+    arrays = {"x": np.arange(4.0), "y": np.eye(2)}
+    assert save_array_dir(tmp_path / "d", arrays, {"meta": "a"}, subdirs=("signs",))
+    assert (tmp_path / "d" / "signs").is_dir()
+
+    payload, loaded = load_array_dir(tmp_path / "d", ("x", "y"), _accept, "test")
+    assert payload == {"meta": "a"}
+    assert isinstance(loaded["x"], np.memmap)
+    assert np.array_equal(loaded["y"], np.eye(2))
+    assert [p.name for p in tmp_path.iterdir()] == ["d"]
+
+
+def test_existing_directory_is_kept(tmp_path):
+    save_array_dir(tmp_path / "d", {"x": np.zeros(2)}, {"meta": "a"})
+    assert not save_array_dir(tmp_path / "d", {"x": np.ones(2)}, {"meta": "b"})
+    assert json.loads((tmp_path / "d" / "meta.json").read_text()) == {"meta": "a"}
+    assert [p.name for p in tmp_path.iterdir()] == ["d"]
+
+
+def test_mismatched_or_unreadable_directory_is_not_loaded(tmp_path):
+    assert load_array_dir(tmp_path / "missing", ("x",), _accept, "test") is None
+    save_array_dir(tmp_path / "b", {"x": np.zeros(2)}, {"meta": "b"})
+    assert load_array_dir(tmp_path / "b", ("x",), _accept, "test") is None
+    save_array_dir(tmp_path / "a", {"x": np.zeros(2)}, {"meta": "a"})
+    (tmp_path / "a" / "x.npy").write_bytes(b"truncated")
+    assert load_array_dir(tmp_path / "a", ("x",), _accept, "test") is None
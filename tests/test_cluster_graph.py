@@ -0,0 +1,125 @@
+"""Tests for the cluster overlay of the stage graph."""
+
+import math
+import random
+from itertools import pairwise
+
+import pytest
+
+from pyfds_evac.core.cluster_graph import ClusterOverlay, grid_clusters
+from pyfds_evac.core.route_graph import (
+    RouteCostConfig,
+    StageEdge,
+    StageGraph,
+    StageNode,
+    build_exit_cost_tables,
+)
+
+
+def _building(seed, floors=3, rooms=12, n_exits=3):
+    """Floors of randomly linked rooms joined by a few stair edges."""
+    rng = random.Random(seed)
+    nodes, edges = {}, {}
+    for f in range(floors):
+        for r in range(rooms):
+            sid = f"F{f}R{r}"
+            kind = "exit" if f == 0 and r < n_exits else "checkpoint"
+            nodes[sid] = StageNode(sid, 3.0 * r, 50.0 * f, kind)
+        for r in range(rooms):
+            for t in rng.sample(range(rooms), 3):
+                if t != r:
+                    edges.setdefault(f"F{f}R{r}", []).append(
+                        StageEdge(f"F{f}R{r}", f"F{f}R{t}", rng.uniform(1.0, 9.0))
+                    )
+        if f:
+            for r in rng.sample(range(rooms), 2):
+                edges.setdefault(f"F{f}R{r}", []).append(
+                    StageEdge(f"F{f}R{r}", f"F{f - 1}R{r}", 6.0)
+                )
+    return StageGraph(nodes=nodes, edges=edges)
+
+
+def _floors(graph):
+    return {sid: sid.split("R")[0] for sid in graph.nodes}
+
+
+def _path_cost(graph, path, weights):
+    return sum(weights.get((a, b), graph.edge(a, b).weight) for a, b in pairwise(path))
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_matches_flat_exit_tables(seed):
+    graph = _building(seed)
+    rng = random.Random(seed)
+    weights = {
+        (e.source, e.target): e.weight * rng.uniform(1.0, 3.0)
+        for edges in graph.edges.values()
+        for e in edges
+    }
+    overlay = ClusterOverlay(graph, _floors(graph))
+    assert overlay.overlay_size < len(graph.nodes)
+
+    flat = graph.exit_cost_tables(weights)
+    clustered = overlay.exit_cost_tables(weights)
+    for exit_id, costs in flat.cost_to_exit.items():
+        assert clustered.cost_to_exit[exit_id].keys() == costs.keys()
+        for sid, cost in costs.items():
+            assert clustered.cost_to_exit[exit_id][sid] == pytest.approx(cost)
+    for sid in graph.nodes:
+        paths = clustered.paths_from(sid)
+        assert paths.keys() == flat.paths_from(sid).keys()
+        for cost, path in paths.values():
+            assert path[0] == sid
+            assert _path_cost(graph, path, weights) == pytest.approx(cost)
+
+
+def test_only_changed_clusters_are_recomputed():
+    graph = _building(0)
+    overlay = ClusterOverlay(graph, _floors(graph))
+    weights = {
+        (e.source, e.target): e.weight for edges in graph.edges.values() for e in edges
+    }
+    overlay.exit_cost_tables(weights)
+    assert overlay.cluster_updates == 3
+
+    overlay.exit_cost_tables(weights)
+    assert overlay.cluster_updates == 3
+
+    smoky = dict(weights)
+    for key in smoky:
+        if key[0].startswith("F2") and key[1].startswith("F2"):
+            smoky[key] *= 4.0
+    # Stair edges between floors are overlay arcs, not cluster edges.
+    smoky[("F1R0", "F0R0")] = 100.0
+    tables = overlay.exit_cost_tables(smoky)
+    assert overlay.cluster_updates == 4
+    flat = graph.exit_cost_tables(smoky)
+    for exit_id, costs in flat.cost_to_exit.items():
+        for sid, cost in costs.items():
+            assert tables.cost_to_exit[exit_id][sid] == pytest.approx(cost)
+
+
+class _SmokeAbove:
+    def sample_extinction(self, time_s, x, y):
+        return 0.5 if y > 60.0 else 0.0
+
+
+def test_build_exit_cost_tables_with_overlay():
+    graph = _building(2)
+    config = RouteCostConfig()
+    overlay = ClusterOverlay.from_grid(graph, 50.0)
+    assert overlay.cluster_labels == ("0:0", "0:1", "0:2")
+
+    flat = build_exit_cost_tables(graph, 30.0, _SmokeAbove(), None, config)
+    clustered = build_exit_cost_tables(
+        graph, 30.0, _SmokeAbove(), None, config, overlay=overlay
+    )
+    for exit_id, costs in flat.cost_to_exit.items():
+        for sid, cost in costs.items():
+            assert clustered.cost_to_exit[exit_id][sid] == pytest.approx(cost)
+            assert math.isfinite(cost)
+
+
+def test_grid_clusters_rejects_bad_cell():
+    with pytest.raises(ValueError):
+        grid_clusters(_building(0), 0.0)
@@ -0,0 +1,299 @@
+"""Tests for the integer-indexed CSR form of the stage graph."""
+
+import heapq
+import math
+import random
+from itertools import pairwise
+
+import pytest
+
+from pyfds_evac.core.route_graph import StageEdge, StageGraph, StageNode
+
+
+def _reference_paths(graph, source, dynamic_weights=None):
+    """Dict-based Dijkstra used by StageGraph before the CSR form."""
+    dist = {sid: math.inf for sid in graph.nodes}
+    prev = {sid: None for sid in graph.nodes}
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for edge in graph.edges.get(u, []):
+            w = edge.weight
+            if dynamic_weights is not None:
+                w = dynamic_weights.get((edge.source, edge.target), edge.weight)
+            if d + w < dist[edge.target]:
+                dist[edge.target] = d + w
+                prev[edge.target] = u
+                heapq.heappush(heap, (d + w, edge.target))
+    results = {}
+    for exit_id in graph.exit_nodes():
+        if math.isfinite(dist[exit_id]):
+            path = [exit_id]
+            while path[-1] != source:
+                path.append(prev[path[-1]])
+            results[exit_id] = (dist[exit_id], path[::-1])
+    return results
+
+
+def _random_graph(seed, n_nodes=60, n_exits=4, degree=3):
+    """Random graph with integer weights, so equal-cost ties are common."""
+    rng = random.Random(seed)
+    ids = [f"N{i}" for i in range(n_nodes)]
+    rng.shuffle(ids)
+    nodes = {
+        sid: StageNode(sid, 0.0, 0.0, "exit" if i < n_exits else "checkpoint")
+        for i, sid in enumerate(ids)
+    }
+    edges = {}
+    for sid in ids[n_exits:]:
+        for target in rng.sample(ids, degree):
+            if target != sid:
+                edges.setdefault(sid, []).append(
+                    StageEdge(sid, target, float(rng.randint(1, 4)))
+                )
+    return StageGraph(nodes=nodes, edges=edges)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_dict_dijkstra_including_ties(seed):
+    graph = _random_graph(seed)
+    rng = random.Random(seed)
+    dynamic = {
+        (e.source, e.target): float(rng.randint(1, 3))
+        for edges in graph.edges.values()
+        for e in edges
+    }
+    for source in graph.nodes:
+        assert graph.shortest_paths_to_exits(source) == _reference_paths(graph, source)
+        assert graph.shortest_paths_to_exits(source, dynamic) == _reference_paths(
+            graph, source, dynamic
+        )
+
+
+def test_csr_layout():
+    graph = StageGraph(
+        nodes={
+            "B": StageNode("B", 0.0, 0.0, "checkpoint"),
+            "A": StageNode("A", 0.0, 0.0, "distribution"),
+            "E": StageNode("E", 0.0, 0.0, "exit"),
+        },
+        edges={
+            "A": [StageEdge("A", "B", 1.0, [(0.0, 0.0), (1.0, 0.0)])],
+            "B": [StageEdge("B", "E", 2.0), StageEdge("B", "A", 1.0)],
+        },
+    )
+    compiled = graph.compiled()
+    assert compiled.node_ids == ("A", "B", "E")
+    assert compiled.offsets.tolist() == [0, 1, 3, 3]
+    assert compiled.sources.tolist() == compiled.source_list == [0, 1, 1]
+    assert compiled.targets.tolist() == compiled.target_list == [1, 2, 0]
+    assert compiled.weights.tolist() == [1.0, 2.0, 1.0]
+    assert compiled.edge_waypoints[0].shape == (2, 2)
+    assert compiled.edge_waypoints[1].shape == (0, 2)
+    assert compiled.exit_indices == (2,)
+    assert graph.compiled() is compiled
+
+
+def test_recompiled_after_edge_added():
+    graph = StageGraph(
+        nodes={
+            "A": StageNode("A", 0.0, 0.0, "distribution"),
+            "E": StageNode("E", 0.0, 0.0, "exit"),
+        }
+    )
+    assert graph.shortest_paths_to_exits("A") == {}
+    graph.edges["A"] = [StageEdge("A", "E", 3.0)]
+    assert graph.shortest_paths_to_exits("A") == {"E": (3.0, ["A", "E"])}
+
+
+def test_invalidate_after_in_place_reweighting():
+    graph = StageGraph(
+        nodes={
+            "A": StageNode("A", 0.0, 0.0, "distribution"),
+            "E": StageNode("E", 0.0, 0.0, "exit"),
+        },
+        edges={"A": [StageEdge("A", "E", 3.0)]},
+    )
+    graph.edge_sample_table(2.0)
+    assert graph.shortest_paths_to_exits("A") == {"E": (3.0, ["A", "E"])}
+    graph.edges["A"] = [StageEdge("A", "E", 5.0)]
+    graph.invalidate()
+    assert graph.edge("A", "E").weight == 5.0
+    assert graph.shortest_paths_to_exits("A") == {"E": (5.0, ["A", "E"])}
+    assert graph._sample_tables == {}
+
+
+def test_count_change_drops_derived_caches():
+    graph = _random_graph(0)
+    compiled = graph.compiled()
+    graph.edge("N10", "N20")
+    graph._views["key"] = StageGraph()
+    graph.edges.setdefault("N10", []).append(StageEdge("N10", "N20", 1.0))
+    assert graph.compiled() is not compiled
+    assert graph._views == {}
+    assert graph.edge("N10", "N20") is not None
+
+
+def test_buffers_are_reused():
+    graph = _random_graph(0)
+    compiled = graph.compiled()
+    dist_a, prev_a = compiled.dijkstra(compiled.index["N10"])
+    dist_b, prev_b = compiled.dijkstra(compiled.index["N20"])
+    assert dist_a is dist_b and prev_a is prev_b
+    assert dist_b[compiled.index["N20"]] == 0.0
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_settle_and_stop_at_match_full_search(seed):
+    graph = _random_graph(seed)
+    compiled = graph.compiled()
+    source = compiled.index["N30"]
+    dist, prev = (list(b) for b in compiled.dijkstra(source))
+    weights = [math.nan] * len(compiled.edge_keys)
+    settled = []
+
+    def settle(node):
+        settled.append(node)
+        for slot in compiled.slots(node):
+            weights[slot] = compiled.weights[slot]
+
+    lazy_dist, lazy_prev = compiled.dijkstra(
+        source, weights, settle=settle, stop_at=compiled.exit_indices
+    )
+    for e in compiled.exit_indices:
+        assert lazy_dist[e] == dist[e]
+        if math.isfinite(dist[e]):
+            assert compiled.path(lazy_prev, source, e) == compiled.path(prev, source, e)
+    assert len(settled) == len(set(settled))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_time_dependent_with_constant_rows_matches_dijkstra(seed):
+    graph = _random_graph(seed)
+    compiled = graph.compiled()
+    source = compiled.index["N30"]
+    dist, prev = (list(b) for b in compiled.dijkstra(source))
+    row = compiled.weights.tolist()
+    td_dist, td_prev, elapsed = compiled.time_dependent_dijkstra(
+        source, lambda t: min(int(t), 2), [row] * 3, [row] * 3
+    )
+    assert td_dist == dist
+    assert td_prev == prev
+    for e in compiled.exit_indices:
+        assert elapsed[e] == dist[e]
+
+
+def test_time_dependent_uses_entry_frame():
+    graph = StageGraph(
+        nodes={
+            "A": StageNode("A", 0.0, 0.0, "distribution"),
+            "B": StageNode("B", 0.0, 0.0, "checkpoint"),
+            "C": StageNode("C", 0.0, 0.0, "checkpoint"),
+            "E": StageNode("E", 0.0, 0.0, "exit"),
+        },
+        edges={
+            "A": [StageEdge("A", "B", 1.0), StageEdge("A", "C", 2.0)],
+            "B": [StageEdge("B", "E", 1.0)],
+            "C": [StageEdge("C", "E", 1.0)],
+        },
+    )
+    compiled = graph.compiled()
+    slot = compiled.edge_keys.index(("B", "E"))
+    early = compiled.weights.tolist()
+    late = list(early)
+    late[slot] = 10.0
+    # B is reached after 1 s, when B -> E has become expensive.
+    dist, prev, elapsed = compiled.time_dependent_dijkstra(
+        compiled.index["A"], lambda t: 0 if t < 0.5 else 1, [early, late], [early, late]
+    )
+    e = compiled.index["E"]
+    assert dist[e] == 3.0
+    assert compiled.path(prev, compiled.index["A"], e) == ["A", "C", "E"]
+    assert elapsed[e] == 3.0
+
+
+def _simple_paths(graph, source, target, path=None):
+    """All loopless paths from *source* to *target*, by brute force."""
+    path = path or [source]
+    if path[-1] == target:
+        yield list(path)
+        return
+    for edge in graph.edges.get(path[-1], []):
+        if edge.target not in path:
+            yield from _simple_paths(graph, source, target, [*path, edge.target])
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_k_shortest_paths_match_enumeration(seed):
+    graph = _random_graph(seed, n_nodes=14, n_exits=2, degree=3)
+    compiled = graph.compiled()
+    for source in ("N5", "N9"):
+        for target in graph.exit_nodes():
+            expected = sorted(
+                sum(graph.edge(a, b).weight for a, b in pairwise(p))
+                for p in _simple_paths(graph, source, target)
+            )
+            found = list(graph.k_shortest_paths(source, target))
+            assert [cost for cost, _ in found] == pytest.approx(expected)
+            assert len({tuple(p) for _, p in found}) == len(found)
+            for cost, path in found:
+                assert path[0] == source and path[-1] == target
+                assert len(set(path)) == len(path)
+    assert compiled is graph.compiled()
+
+
+def _geometric_graph(seed, n_nodes=80, n_exits=3, slack=(1.0, 2.0)):
+    """Random nodes in a 100 m square, edges to near neighbours."""
+    rng = random.Random(seed)
+    ids = [f"N{i}" for i in range(n_nodes)]
+    xy = {sid: (rng.uniform(0, 100), rng.uniform(0, 100)) for sid in ids}
+    nodes = {
+        sid: StageNode(sid, *xy[sid], "exit" if i < n_exits else "checkpoint")
+        for i, sid in enumerate(ids)
+    }
+    edges = {}
+    for sid in ids:
+        near = sorted(ids, key=lambda t: math.dist(xy[sid], xy[t]))[1:5]
+        for target in near:
+            length = math.dist(xy[sid], xy[target]) * rng.uniform(*slack)
+            edges.setdefault(sid, []).append(StageEdge(sid, target, length))
+    return StageGraph(nodes=nodes, edges=edges)
+
+
+@pytest.mark.parametrize(("seed", "slack"), [(0, (1.0, 2.0)), (1, (0.5, 1.5))])
+def test_astar_matches_dijkstra(seed, slack):
+    graph = _geometric_graph(seed, slack=slack)
+    rng = random.Random(seed)
+    smoky = {
+        (e.source, e.target): e.weight * rng.uniform(1.0, 4.0)
+        for edges in graph.edges.values()
+        for e in edges
+    }
+    for weights in (None, smoky):
+        for source in ("N10", "N40", "N70"):
+            paths = graph.shortest_paths_to_exits(source, weights)
+            for exit_id, (cost, _path) in paths.items():
+                found_cost, found_path = graph.shortest_path(source, exit_id, weights)
+                assert found_cost == pytest.approx(cost)
+                assert found_path[0] == source and found_path[-1] == exit_id
+            exit_id, cost, path = graph.shortest_exit(source, weights)
+            assert cost == pytest.approx(min(c for c, _ in paths.values()))
+            assert path[-1] == exit_id
+
+
+def test_astar_unreachable_and_trivial():
+    graph = StageGraph(
+        nodes={
+            "A": StageNode("A", 0.0, 0.0, "distribution"),
+            "B": StageNode("B", 5.0, 0.0, "checkpoint"),
+            "E": StageNode("E", 9.0, 0.0, "exit"),
+        },
+        edges={"A": [StageEdge("A", "B", 5.0)]},
+    )
+    assert graph.shortest_path("A", "E") is None
+    assert graph.shortest_exit("A") is None
+    assert graph.shortest_path("A", "A") == (0.0, ["A"])
+    assert graph.shortest_path("A", "missing") is None
@@ -0,0 +1,114 @@
+"""Tests for the on-disk stage-graph edge polyline cache."""
+
+import json
+
+import jupedsim as jps
+import pytest
+from shapely.geometry import Polygon
+
+from pyfds_evac.core.edge_cache import EdgePolylineCache, walkable_hash
+from pyfds_evac.core.route_graph import StageGraph
+
+
+def _box(cx: float, cy: float, half: float = 1.0) -> Polygon:
+    """Return a square polygon centred at (cx, cy)."""
+    return Polygon(
+        [
+            (cx - half, cy - half),
+            (cx + half, cy - half),
+            (cx + half, cy + half),
+            (cx - half, cy + half),
+        ]
+    )
+
+
+WALKABLE = Polygon([(-5, -5), (25, -5), (25, 5), (-5, 5)])
+
+
+def _build(cache_path, exit_x: float = 20.0, walkable=WALKABLE):
+    return StageGraph.from_scenario(
+        {
+            "C0": {"polygon": _box(10, 0), "stage_type": "checkpoint"},
+            "E0": {"polygon": _box(exit_x, 0), "stage_type": "exit"},
+        },
+        [{"from": "D0", "to": "C0"}, {"from": "C0", "to": "E0"}],
+        {"D0": {"coordinates": list(_box(0, 0).exterior.coords)}},
+        walkable_polygon=walkable,
+        edge_cache_path=cache_path,
+    )
+
+
+class _CountingEngine:
+    """Wrap jps.RoutingEngine and count compute_waypoints calls."""
+
+    calls = 0
+    built = 0
+
+    def __init__(self, polygon):
+        type(self).built += 1
+        self._engine = _REAL_ENGINE(polygon)
+
+    def compute_waypoints(self, start, end):
+        type(self).calls += 1
+        return self._engine.compute_waypoints(start, end)
+
+
+_REAL_ENGINE = jps.RoutingEngine
+
+
+@pytest.fixture()
+def counting_engine(monkeypatch):
+    _CountingEngine.calls = 0
+    _CountingEngine.built = 0
+    monkeypatch.setattr(jps, "RoutingEngine", _CountingEngine)
+    return _CountingEngine
+
+
+def _waypoints(graph):
+    return {
+        (e.source, e.target): e.waypoints
+        for edges in graph.edges.values()
+        for e in edges
+    }
+
+
+def test_second_build_reuses_cache_without_engine(tmp_path, counting_engine):
+    path = tmp_path / "edges.json"
+    first = _build(path)
+    assert counting_engine.calls == 2
+    assert path.exists()
+
+    second = _build(path)
+    assert counting_engine.calls == 2
+    assert counting_engine.built == 1
+    assert _waypoints(second) == _waypoints(first)
+    assert second.edges["C0"][0].weight == first.edges["C0"][0].weight
+
+
+def test_only_moved_edges_are_recomputed(tmp_path, counting_engine):
+    path = tmp_path / "edges.json"
+    _build(path)
+    moved = _build(path, exit_x=18.0)
+    # D0 -> C0 is unchanged; only C0 -> E0 has a moved endpoint.
+    assert counting_engine.calls == 3
+    assert moved.edges["C0"][0].waypoints[-1] == pytest.approx((18.0, 0.0))
+
+
+def test_walkable_change_invalidates_cache(tmp_path, counting_engine):
+    path = tmp_path / "edges.json"
+    _build(path)
+    _build(path, walkable=Polygon([(-5, -6), (25, -6), (25, 6), (-5, 6)]))
+    assert counting_engine.calls == 4
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    assert payload["walkable_hash"] != walkable_hash(WALKABLE)
+
+
+def test_corrupt_cache_is_ignored(tmp_path):
+    path = tmp_path / "edges.json"
+    path.write_text("not json", encoding="utf-8")
+    cache = EdgePolylineCache(path, "abc")
+    assert cache.get((0.0, 0.0), (1.0, 1.0)) is None
+    cache.put((0.0, 0.0), (1.0, 1.0), [(0.0, 0.0), (1.0, 1.0)])
+    cache.save()
+    reloaded = EdgePolylineCache(path, "abc")
+    assert reloaded.get((0.0, 0.0), (1.0, 1.0)) == [(0.0, 0.0), (1.0, 1.0)]
@@ -0,0 +1,214 @@
+"""Tests for per-frame edge costs and time-dependent routing."""
+
+import numpy as np
+import pytest
+
+from pyfds_evac.core.edge_time_table import (
+    EdgeTimeTable,
+    cached_edge_time_table,
+    graph_hash,
+    table_meta,
+)
+from pyfds_evac.core.route_decisions import decide_routes
+from pyfds_evac.core.route_graph import (
+    RerouteConfig,
+    RouteCostConfig,
+    StageEdge,
+    StageGraph,
+    StageNode,
+    evaluate_segments,
+    rank_routes,
+)
+
+
+@pytest.fixture
+def two_route_graph():
+    """S -> M1 -> E1 (60 m, east) and S -> M2 -> E2 (70 m, north)."""
+    nodes = {
+        "S": StageNode("S", 0.0, 0.0, "distribution"),
+        "M1": StageNode("M1", 50.0, 0.0, "checkpoint"),
+        "E1": StageNode("E1", 60.0, 0.0, "exit"),
+        "M2": StageNode("M2", 0.0, 40.0, "checkpoint"),
+        "E2": StageNode("E2", 0.0, 70.0, "exit"),
+    }
+    edges = {
+        "S": [StageEdge("S", "M1", 50.0), StageEdge("S", "M2", 40.0)],
+        "M1": [StageEdge("M1", "E1", 10.0)],
+        "M2": [StageEdge("M2", "E2", 30.0)],
+    }
+    return StageGraph(nodes=nodes, edges=edges)
+
+
+class _SmokeArrivesEast:
+    """Heavy smoke east of x = 45 m from t = 40 s on."""
+
+    def sample_extinction(self, time_s, x, y):
+        return 5.0 if x > 45.0 and time_s >= 40.0 else 0.0
+
+
+class _Steady:
+    def sample_extinction(self, time_s, x, y):
+        return 0.3 if y > 20.0 else 0.0
+
+
+class _Framed:
+    """Steady field whose FDS frames are 30 s apart; counts samples."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def frame_key(self, time_s):
+        return int(time_s // 30.0)
+
+    def sample_extinction(self, time_s, x, y):
+        self.calls += 1
+        return 0.0
+
+
+CONFIG = RouteCostConfig(base_speed_m_per_s=1.0, w_smoke=2.0)
+
+
+def test_future_smoke_changes_the_choice(two_route_graph):
+    field = _SmokeArrivesEast()
+    static = rank_routes(two_route_graph, "S", 0.0, 0.0, field, None, CONFIG)
+    assert static[0].exit_id == "E1"
+
+    table = EdgeTimeTable.build(two_route_graph, 0.0, 120.0, 10.0, field, None, CONFIG)
+    ranked = rank_routes(
+        two_route_graph, "S", 0.0, 0.0, field, None, CONFIG, time_table=table
+    )
+    assert ranked[0].exit_id == "E2"
+    # M1 -> E1 is entered after 50 s of travel, when the smoke is there.
+    e1 = next(rc for rc in ranked if rc.exit_id == "E1")
+    assert e1.segments[0].k_avg == 0.0
+    assert e1.segments[1].k_avg == pytest.approx(5.0)
+
+
+def test_steady_field_matches_static_ranking(two_route_graph):
+    field = _Steady()
+    table = EdgeTimeTable.build(two_route_graph, 0.0, 60.0, 10.0, field, None, CONFIG)
+    static = rank_routes(two_route_graph, "S", 20.0, 0.1, field, None, CONFIG)
+    timed = rank_routes(
+        two_route_graph, "S", 20.0, 0.1, field, None, CONFIG, time_table=table
+    )
+    assert [rc.path for rc in timed] == [rc.path for rc in static]
+    for a, b in zip(timed, static, strict=True):
+        assert a.composite_cost == pytest.approx(b.composite_cost)
+
+
+def test_batched_decisions_use_the_table(two_route_graph):
+    field = _SmokeArrivesEast()
+    table = EdgeTimeTable.build(two_route_graph, 0.0, 120.0, 10.0, field, None, CONFIG)
+    decisions = decide_routes(
+        two_route_graph,
+        ["S", "S"],
+        [None, "E1"],
+        [0.0, 0.0],
+        0.0,
+        field,
+        None,
+        RerouteConfig(cost_config=CONFIG),
+        time_table=table,
+    )
+    assert decisions.new_exit == ["E2", "E2"]
+    assert decisions.switch.tolist() == [True, True]
+
+
+def test_frames_are_clamped(two_route_graph):
+    table = EdgeTimeTable.build(
+        two_route_graph, 0.0, 60.0, 10.0, _Steady(), None, CONFIG
+    )
+    assert table.n_frames == 7
+    assert table.frame(-5.0) == 0
+    assert table.frame(19.9) == 1
+    assert table.frame(1e6) == 6
+    slot = two_route_graph.compiled().edge_keys.index(("M2", "E2"))
+    seg = table.segment(slot, 3)
+    assert (seg.source, seg.target, seg.length_m) == ("M2", "E2", 30.0)
+
+
+def test_rows_within_a_frame_key_are_copied(two_route_graph):
+    field = _Framed()
+    evaluate_segments(two_route_graph, 0.0, field, None, CONFIG)
+    per_frame = field.calls
+    field.calls = 0
+    # Times 0..60 s in 10 s steps fall into frame keys 0, 0, 0, 1, 1, 1, 2.
+    table = EdgeTimeTable.build(two_route_graph, 0.0, 60.0, 10.0, field, None, CONFIG)
+    assert field.calls == 3 * per_frame
+    assert (table.weight[1] == table.weight[0]).all()
+
+
+def test_rejects_non_positive_step(two_route_graph):
+    with pytest.raises(ValueError):
+        EdgeTimeTable.build(two_route_graph, 0.0, 60.0, 0.0, _Steady(), None, CONFIG)
+
+
+def test_segments_at_matches_evaluate_segments(two_route_graph):
+    field = _Steady()
+    table = EdgeTimeTable.build(two_route_graph, 0.0, 60.0, 10.0, field, None, CONFIG)
+    assert table.segments_at(25.0) == evaluate_segments(
+        two_route_graph, 20.0, field, None, CONFIG
+    )
+    assert table.segments_at(29.0) is table.segments_at(25.0)
+    assert table.segments_at(30.0) is not table.segments_at(25.0)
+
+
+def test_rows_are_listed_only_for_frames_a_query_reaches(two_route_graph):
+    field = _Steady()
+    table = EdgeTimeTable.build(two_route_graph, 0.0, 600.0, 10.0, field, None, CONFIG)
+    assert len(table._weight_rows) == table.n_frames
+    assert table._weight_rows._rows == {}
+
+    table.paths_to_exits(two_route_graph, "S", 100.0)
+    listed = set(table._weight_rows._rows)
+    assert listed and listed < set(range(table.n_frames))
+    assert min(listed) == table.frame(100.0)
+    assert table._weight_rows[10] == table.weight[10].tolist()
+
+
+def test_save_and_load_round_trip(two_route_graph, tmp_path):
+    field = _SmokeArrivesEast()
+    table = EdgeTimeTable.build(two_route_graph, 0.0, 120.0, 10.0, field, None, CONFIG)
+    meta = table_meta(two_route_graph, "case-a", 0.0, 120.0, 10.0, CONFIG)
+    table.save(tmp_path / "t", meta)
+
+    loaded = EdgeTimeTable.load(tmp_path / "t", meta)
+    assert isinstance(loaded.weight, np.memmap)
+    assert loaded.keys == table.keys
+    for name in ("lengths", "k_avg", "travel_time", "visible", "weight"):
+        assert np.array_equal(getattr(loaded, name), getattr(table, name))
+    assert loaded.paths_to_exits(two_route_graph, "S", 0.0) == table.paths_to_exits(
+        two_route_graph, "S", 0.0
+    )
+
+    other = table_meta(two_route_graph, "case-b", 0.0, 120.0, 10.0, CONFIG)
+    assert EdgeTimeTable.load(tmp_path / "t", other) is None
+    assert EdgeTimeTable.load(tmp_path / "missing", meta) is None
+
+
+def test_cache_is_shared_between_runs(two_route_graph, tmp_path):
+    field = _Framed()
+    args = (two_route_graph, 0.0, 60.0, 10.0, field, None, CONFIG)
+    first = cached_edge_time_table(tmp_path, "case-a", *args)
+    built = field.calls
+    assert built > 0
+
+    second = cached_edge_time_table(tmp_path, "case-a", *args)
+    assert field.calls == built
+    assert np.array_equal(second.weight, first.weight)
+
+    cached_edge_time_table(tmp_path, "case-b", *args)
+    assert field.calls == 2 * built
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_graph_hash_follows_geometry(two_route_graph):
+    longer = StageGraph(
+        nodes=dict(two_route_graph.nodes),
+        edges={
+            sid: [StageEdge(e.source, e.target, e.weight + 1.0) for e in edges]
+            for sid, edges in two_route_graph.edges.items()
+        },
+    )
+    assert graph_hash(two_route_graph) == graph_hash(two_route_graph)
+    assert graph_hash(longer) != graph_hash(two_route_graph)
@@ -28,6 +28,7 @@ from pyfds_evac.core.fed import (
     time_to_fed_threshold_s,
 )
 from pyfds_evac.core import load_scenario, run_scenario
+from pyfds_evac.core.fds_sampling import SliceFieldSampler
 
 
 HASPEL_DIR = Path("fds_data/haspel")
@@ -777,3 +778,33 @@ def test_iso_table22_stationary_runtime_produces_plot(tmp_path: Path):
         assert output.stat().st_size > 0
     finally:
         result.cleanup()
+
+
+def _fake_gas_sampler(value: float, x_end: float = 4.0) -> SliceFieldSampler:
+    """Return a sampler over a 2x2 grid on [0, x_end] x [0, 2] with a gradient."""
+    data = value * (1.0 + np.arange(2 * 2 * 2, dtype=float).reshape(2, 2, 2))
+    subslice = SimpleNamespace(
+        extent=SimpleNamespace(x_start=0.0, x_end=x_end, y_start=0.0, y_end=2.0),
+        shape=(2, 2),
+        data=data,
+    )
+    return SliceFieldSampler(
+        SimpleNamespace(subslices=[subslice], get_nearest_timestep=lambda t: 1)
+    )
+
+
+def test_fds_fed_field_sample_inputs_many_matches_scalar():
+    field = FdsFedField(
+        _fake_gas_sampler(0.001),
+        _fake_gas_sampler(0.01),
+        _fake_gas_sampler(0.02),
+        hcn=_fake_gas_sampler(1e-5, x_end=2.0),
+    )
+    model = DefaultFedModel(field, DefaultFedConfig(fds_dir="."))
+    xs = np.array([0.5, 1.5, 3.0, 3.5, 6.0])
+    ys = np.array([0.5, 1.5, 0.2, 1.8, 1.0])
+    batch = field.sample_inputs_many(5.0, xs, ys)
+    assert batch == [field.sample_inputs(5.0, x, y) for x, y in zip(xs, ys)]
+    assert batch[-1] == DefaultFedInputs()
+    rates = model.sample_rates_many(5.0, xs, ys)
+    assert rates.tolist() == [model.sample_rate(5.0, x, y)[1] for x, y in zip(xs, ys)]
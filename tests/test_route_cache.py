@@ -0,0 +1,190 @@
+"""Tests for the route evaluation caches."""
+
+import pytest
+from shapely.geometry import Polygon
+
+from pyfds_evac.core.cognitive_map import AgentCognitiveMap
+from pyfds_evac.core.route_cache import (
+    RouteRankingCache,
+    SegmentCostCache,
+    sampler_frame_key,
+)
+from pyfds_evac.core.route_graph import RouteCostConfig, StageGraph, rank_routes
+from pyfds_evac.core.smoke_speed import ConstantExtinctionField
+
+
+def _box(cx: float, cy: float, half: float = 1.0) -> Polygon:
+    """Return a square polygon centred at (cx, cy)."""
+    return Polygon(
+        [
+            (cx - half, cy - half),
+            (cx + half, cy - half),
+            (cx + half, cy + half),
+            (cx - half, cy + half),
+        ]
+    )
+
+
+class ConstantFedRateSampler:
+    """Return a constant FED rate everywhere (for testing)."""
+
+    def __init__(self, rate_per_min: float):
+        self.rate_per_min = rate_per_min
+
+    def sample_fed_rate(self, time_s: float, x: float, y: float) -> float:
+        del time_s, x, y
+        return self.rate_per_min
+
+
+@pytest.fixture()
+def multi_exit_graph():
+    """D0 (10, 0) with direct edges to E0 (0, 0) and E1 (30, 0)."""
+    direct_steering_info = {
+        "E0": {"polygon": _box(0, 0), "stage_type": "exit"},
+        "E1": {"polygon": _box(30, 0), "stage_type": "exit"},
+    }
+    distributions = {"D0": {"coordinates": list(_box(10, 0).exterior.coords)}}
+    transitions = [{"from": "D0", "to": "E0"}, {"from": "D0", "to": "E1"}]
+    return StageGraph.from_scenario(direct_steering_info, transitions, distributions)
+
+
+def _rank(graph, cache, *, current_fed=0.0, exit_counts=None, cognitive_map=None):
+    return rank_routes(
+        graph,
+        "D0",
+        0.0,
+        current_fed,
+        ConstantExtinctionField(0.0),
+        ConstantFedRateSampler(0.3),
+        RouteCostConfig(),
+        exit_counts=exit_counts,
+        cognitive_map=cognitive_map,
+        ranking_cache=cache,
+    )
+
+
+class TestRouteRankingCache:
+    def test_second_agent_at_same_source_hits(self, multi_exit_graph):
+        cache = RouteRankingCache()
+        first = _rank(multi_exit_graph, cache)
+        second = _rank(multi_exit_graph, cache)
+        assert first == second
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.hit_rate == pytest.approx(0.5)
+
+    def test_current_fed_applied_per_agent(self, multi_exit_graph):
+        """Cached candidates are FED-neutral; each agent's FED is added on top."""
+        cache = RouteRankingCache()
+        _rank(multi_exit_graph, cache, current_fed=0.0)
+        cached = _rank(multi_exit_graph, cache, current_fed=0.95)
+        direct = _rank(multi_exit_graph, None, current_fed=0.95)
+        assert cache.hits == 1
+        assert cached == direct
+        assert [rc.exit_id for rc in cached] == ["E0", "E1"]
+        assert cached[1].rejected  # longer route pushes FED over the threshold
+
+    def test_exit_counts_change_invalidates(self, multi_exit_graph):
+        cache = RouteRankingCache()
+        counts = {"E0": 0, "E1": 0}
+        _rank(multi_exit_graph, cache, exit_counts=counts)
+        _rank(multi_exit_graph, cache, exit_counts=counts)
+        assert cache.hits == 1
+        version = cache.exit_counts_version
+        counts["E0"] = 50
+        ranked = _rank(multi_exit_graph, cache, exit_counts=counts)
+        assert cache.exit_counts_version == version + 1
+        assert cache.misses == 2
+        assert ranked[0].exit_id == "E1"
+
+    def test_knowledge_signature_separates_entries(self, multi_exit_graph):
+        cache = RouteRankingCache()
+        known_e0 = AgentCognitiveMap(
+            familiarity="discovery",
+            known_nodes={"D0", "E0"},
+            known_edges={("D0", "E0")},
+        )
+        same_knowledge = AgentCognitiveMap(
+            familiarity="discovery",
+            known_nodes={"D0", "E0"},
+            known_edges={("D0", "E0")},
+        )
+        full = AgentCognitiveMap(familiarity="full")
+        assert [rc.exit_id for rc in _rank(multi_exit_graph, cache)] == ["E0", "E1"]
+        restricted = _rank(multi_exit_graph, cache, cognitive_map=known_e0)
+        assert [rc.exit_id for rc in restricted] == ["E0"]
+        _rank(multi_exit_graph, cache, cognitive_map=same_knowledge)
+        _rank(multi_exit_graph, cache, cognitive_map=full)
+        assert (cache.hits, cache.misses) == (2, 2)
+
+    def test_clear_keeps_statistics(self, multi_exit_graph):
+        cache = RouteRankingCache()
+        _rank(multi_exit_graph, cache)
+        cache.clear()
+        _rank(multi_exit_graph, cache)
+        assert (cache.hits, cache.misses) == (0, 2)
+
+    def test_weights_computed_once_per_signature_and_pass(self):
+        cache = RouteRankingCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {("A", "B"): float(len(calls))}
+
+        known = AgentCognitiveMap(
+            familiarity="discovery", known_nodes={"A"}, known_edges=set()
+        )
+        assert cache.weights(None, compute) == {("A", "B"): 1.0}
+        assert cache.weights(None, compute) == {("A", "B"): 1.0}
+        assert cache.weights(known, compute) == {("A", "B"): 2.0}
+        cache.clear()
+        assert cache.weights(None, compute) == {("A", "B"): 3.0}
+
+
+class _FramedField:
+    """Extinction field whose values change every 10 s output frame."""
+
+    def frame_key(self, time_s):
+        return int(time_s // 10)
+
+    def sample_extinction(self, time_s, x, y):
+        return 0.1 * self.frame_key(time_s)
+
+
+class TestSegmentCostCache:
+    def test_same_frame_reuses_segments(self):
+        cache = SegmentCostCache()
+        first = cache.segments_for(sampler_frame_key(1.0, _FramedField(), None))
+        first[("A", "B")] = "cost"
+        again = cache.segments_for(sampler_frame_key(9.0, _FramedField(), None))
+        assert again is first
+        later = cache.segments_for(sampler_frame_key(10.0, _FramedField(), None))
+        assert later == {}
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_frameless_sampler_never_reuses(self):
+        class Continuous:
+            def sample_extinction(self, time_s, x, y):
+                return 0.0
+
+        assert sampler_frame_key(0.0, Continuous()) is None
+        assert sampler_frame_key(0.0, _FramedField(), Continuous()) is None
+        cache = SegmentCostCache()
+        first = cache.segments_for(None)
+        first[("A", "B")] = "cost"
+        assert cache.segments_for(None) == {}
+        assert len(cache) == 0
+
+    def test_least_recently_used_frame_evicted(self):
+        cache = SegmentCostCache(max_frames=2)
+        frame0 = cache.segments_for((0,))
+        cache.segments_for((1,))
+        assert cache.segments_for((0,)) is frame0
+        cache.segments_for((2,))  # evicts frame 1
+        assert cache.segments_for((0,)) is frame0
+        assert cache.segments_for((1,)) == {}
+        assert len(cache) == 2
+
+    def test_constant_field_is_single_frame(self):
+        field = ConstantExtinctionField(0.2)
+        assert sampler_frame_key(0.0, field) == sampler_frame_key(500.0, field)
@@ -0,0 +1,318 @@
+"""Tests for batched route decisions."""
+
+import math
+from collections import Counter
+
+import pytest
+
+from pyfds_evac.core.route_decisions import (
+    apply_route_decisions,
+    assign_routes,
+    decide_routes,
+)
+from pyfds_evac.core.route_graph import (
+    AgentRouteState,
+    RerouteConfig,
+    RouteCostConfig,
+    StageEdge,
+    StageGraph,
+    StageNode,
+    evaluate_and_reroute,
+)
+
+
+class _GradientField:
+    """Extinction rising towards +x, so the east exit gets smoky."""
+
+    def sample_extinction(self, time_s, x, y):
+        return max(0.0, 0.04 * x)
+
+
+class _FedRate:
+    def sample_fed_rate(self, time_s, x, y):
+        return 0.02 * max(0.0, x)
+
+
+class _HiddenNode:
+    """Visibility model that hides one stage from everyone."""
+
+    def __init__(self, hidden):
+        self.hidden = hidden
+
+    def node_is_visible(self, time_s, x, y, node_id):
+        return node_id != self.hidden
+
+
+def _graph():
+    nodes = {
+        "D0": StageNode("D0", 0.0, 0.0, "distribution"),
+        "D1": StageNode("D1", 5.0, 5.0, "distribution"),
+        "C0": StageNode("C0", 10.0, 0.0, "checkpoint"),
+        "E0": StageNode("E0", 20.0, 0.0, "exit", capacity_agents_per_s=0.5),
+        "E1": StageNode("E1", -15.0, 0.0, "exit"),
+        "E2": StageNode("E2", 0.0, 18.0, "exit"),
+    }
+    edges = {
+        "D0": [
+            StageEdge("D0", "C0", 10.0),
+            StageEdge("D0", "E1", 15.0),
+            StageEdge("D0", "E2", 18.0),
+        ],
+        "D1": [StageEdge("D1", "C0", 7.1), StageEdge("D1", "E2", 14.0)],
+        "C0": [StageEdge("C0", "E0", 10.0)],
+    }
+    return StageGraph(nodes=nodes, edges=edges)
+
+
+AGENTS = [
+    # (source, current exit, current FED)
+    ("D0", None, 0.0),
+    ("D0", "E0", 0.4),
+    ("D0", "E1", 0.95),
+    ("D1", "E2", 0.0),
+    ("D1", None, 2.0),
+    ("XX", None, 0.0),
+]
+
+
+def _wait_info(source):
+    return {
+        "current_origin": source,
+        "current_target_stage": source,
+        "path_choices": {},
+        "stage_configs": {},
+    }
+
+
+@pytest.mark.parametrize("vis_model", [None, _HiddenNode("E2")])
+@pytest.mark.parametrize("w_queue", [0.0, 1.0])
+def test_matches_sequential_with_fixed_counts(vis_model, w_queue):
+    graph = _graph()
+    config = RerouteConfig(cost_config=RouteCostConfig(w_queue=w_queue))
+    counts = {"E0": 3, "E1": 20, "E2": 0}
+    field, fed = _GradientField(), _FedRate()
+
+    expected = []
+    for agent_id, (source, exit_id, current_fed) in enumerate(AGENTS):
+        state = AgentRouteState(current_exit=exit_id)
+        switch = evaluate_and_reroute(
+            agent_id,
+            _wait_info(source),
+            state,
+            graph,
+            10.0,
+            current_fed,
+            field,
+            fed,
+            config,
+            {},
+            exit_counts=dict(counts),
+            vis_model=vis_model,
+        )
+        expected.append((switch, state))
+
+    decisions = decide_routes(
+        graph,
+        [a[0] for a in AGENTS],
+        [a[1] for a in AGENTS],
+        [a[2] for a in AGENTS],
+        10.0,
+        field,
+        fed,
+        config,
+        cached_segments={},
+        exit_counts=counts,
+        vis_model=vis_model,
+    )
+    states = [AgentRouteState(current_exit=a[1]) for a in AGENTS]
+    switches = apply_route_decisions(
+        decisions,
+        list(range(len(AGENTS))),
+        [_wait_info(a[0]) for a in AGENTS],
+        states,
+        10.0,
+    )
+
+    assert switches == [switch for switch, _ in expected if switch is not None]
+    assert states == [state for _, state in expected]
+    assert not decisions.ranked[-1]
+
+
+def test_counts_snapshot_and_single_update():
+    graph = _graph()
+    config = RerouteConfig(cost_config=RouteCostConfig(w_smoke=0.0, w_fed=0.0))
+    counts = {"E0": 0, "E1": 0, "E2": 0}
+    sources = ["D1"] * 3
+    decisions = decide_routes(
+        graph,
+        sources,
+        [None, None, "E0"],
+        [0.0, 0.0, 0.0],
+        0.0,
+        _GradientField(),
+        None,
+        config,
+        exit_counts=counts,
+    )
+    # Every agent saw empty exits, so all pick the same one.
+    assert decisions.new_exit == ["E2"] * 3
+    assert decisions.switch.tolist() == [True, True, True]
+    assert math.isnan(decisions.old_cost[0])
+    assert decisions.old_cost[2] > decisions.new_cost[2]
+    assert counts == {"E0": 0, "E1": 0, "E2": 0}
+
+    switches = apply_route_decisions(
+        decisions,
+        [1, 2, 3],
+        [_wait_info(s) for s in sources],
+        [AgentRouteState(), AgentRouteState(), AgentRouteState(current_exit="E0")],
+        0.0,
+        counts,
+    )
+    assert [s.reason for s in switches] == ["initial", "initial", "smoke_reroute"]
+    assert counts == {"E0": 0, "E1": 0, "E2": 3}
+
+
+def _brute_force(cost, queue_coef, base_load):
+    """Minimum total cost over every assignment of rows to columns."""
+    import itertools
+
+    best = math.inf
+    n_rows, n_cols = cost.shape
+    for choice in itertools.product(range(n_cols), repeat=n_rows):
+        total = sum(cost[r, c] for r, c in enumerate(choice))
+        for c in range(n_cols):
+            k = choice.count(c)
+            total += sum(queue_coef[c] * (base_load[c] + j) for j in range(k))
+        best = min(best, total)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_min_cost_assignment_is_optimal(seed):
+    import numpy as np
+
+    from pyfds_evac.core.route_decisions import _min_cost_assignment
+
+    rng = np.random.default_rng(seed)
+    cost = rng.uniform(5.0, 30.0, size=(6, 3))
+    cost[rng.uniform(size=cost.shape) < 0.2] = math.inf
+    cost[:, 0] = np.where(np.isinf(cost).all(axis=1), 10.0, cost[:, 0])
+    queue_coef = rng.uniform(0.0, 8.0, size=3)
+    base_load = rng.integers(0, 3, size=3).astype(float)
+
+    assigned, load = _min_cost_assignment(cost, queue_coef, base_load)
+    assert (assigned >= 0).all()
+    assert load.tolist() == np.bincount(assigned, minlength=3).tolist()
+    total = cost[np.arange(6), assigned].sum() + sum(
+        queue_coef[c] * (base_load[c] + j)
+        for c in range(3)
+        for j in range(int(load[c]))
+    )
+    assert total == pytest.approx(_brute_force(cost, queue_coef, base_load))
+
+
+def test_assignment_spreads_load_and_ignores_order():
+    graph = _graph()
+    config = RerouteConfig(
+        cost_config=RouteCostConfig(w_smoke=0.0, w_fed=0.0, w_queue=1.0),
+        assignment_mode="min_cost_flow",
+    )
+    counts = {"E0": 0, "E1": 0, "E2": 0}
+    sources = ["D1"] * 6 + ["D0"] * 2
+    fed = [0.0] * 8
+
+    decisions = assign_routes(
+        graph,
+        sources,
+        [None] * 8,
+        fed,
+        0.0,
+        _GradientField(),
+        None,
+        config,
+        exit_counts=counts,
+    )
+    greedy = decide_routes(
+        graph,
+        sources,
+        [None] * 8,
+        fed,
+        0.0,
+        _GradientField(),
+        None,
+        config,
+        exit_counts=counts,
+    )
+    assert set(greedy.new_exit[:6]) == {"E2"}
+    assert set(decisions.new_exit[:6]) == {"E0", "E2"}
+    assert decisions.ranked.all()
+
+    order = [7, 3, 0, 5, 1, 6, 2, 4]
+    shuffled_sources = [sources[i] for i in order]
+    shuffled = assign_routes(
+        graph,
+        shuffled_sources,
+        [None] * 8,
+        fed,
+        0.0,
+        _GradientField(),
+        None,
+        config,
+        exit_counts=counts,
+    )
+    assert Counter(zip(shuffled_sources, shuffled.new_exit)) == Counter(
+        zip(sources, decisions.new_exit)
+    )
+
+
+def test_first_legs_match_rank_routes():
+    from pyfds_evac.core.route_graph import (
+        build_exit_cost_tables,
+        first_leg_segments,
+        rank_routes,
+    )
+
+    graph = _graph()
+    config = RerouteConfig()
+    field, fed = _GradientField(), _FedRate()
+    cache = {}
+    tables = build_exit_cost_tables(
+        graph, 10.0, field, fed, config.cost_config, cached_segments=cache
+    )
+    sources = ["D0", "D0", "D1", "XX"]
+    positions = [(-4.0, 0.0), (4.0, 3.0), (5.0, 5.0), (0.0, 0.0)]
+    legs = first_leg_segments(
+        graph, sources, positions, 10.0, field, fed, config.cost_config
+    )
+    decisions = decide_routes(
+        graph,
+        sources,
+        [None] * 4,
+        [0.0] * 4,
+        10.0,
+        field,
+        fed,
+        config,
+        positions=positions,
+        cached_segments=cache,
+        exit_tables=tables,
+        first_legs=legs,
+    )
+    for i, source in enumerate(sources[:3]):
+        ranked = rank_routes(
+            graph,
+            source,
+            10.0,
+            0.0,
+            field,
+            fed,
+            config.cost_config,
+            cached_segments=cache,
+            exit_tables=tables,
+            first_legs=legs[i],
+        )
+        assert decisions.new_path[i] == ranked[0].path
+        assert decisions.new_cost[i] == pytest.approx(ranked[0].composite_cost)
+    assert decisions.new_exit[0] != decisions.new_exit[1]
+    assert not decisions.ranked[3]
@@ -1,21 +1,26 @@
 """Tests for StageGraph construction and Dijkstra shortest-path routing."""
 
+import math
+
 import pytest
 from shapely.geometry import Polygon
 
 from pyfds_evac.core.route_graph import (
     StageEdge,
     StageGraph,
+    StageNode,
     RouteCostConfig,
     RerouteConfig,
     AgentRouteState,
     evaluate_route,
     evaluate_segment,
+    evaluate_segments,
     rank_routes,
     compute_eval_offset,
     should_reevaluate,
     reroute_agent,
     evaluate_and_reroute,
+    compute_dynamic_weights,
 )
 from pyfds_evac.core.smoke_speed import ConstantExtinctionField
 
@@ -286,6 +291,42 @@ class TestEdgeCases:
         assert result is not None
 
 
+class TestParallelBuild:
+    def _build(self, workers):
+        # Auto-connected minimal config: every distribution to every exit,
+        # around a wall in the middle of the walkable area.
+        walkable = Polygon([(-5, -15), (35, -15), (35, 15), (-5, 15)]).difference(
+            Polygon([(14, -10), (16, -10), (16, 10), (14, 10)])
+        )
+        direct_steering_info = {
+            f"E{i}": {"polygon": _box(30, -10 + 10 * i), "stage_type": "exit"}
+            for i in range(3)
+        }
+        distributions = {
+            f"D{i}": {"coordinates": list(_box(0, -8 + 4 * i).exterior.coords)}
+            for i in range(5)
+        }
+        return StageGraph.from_scenario(
+            direct_steering_info,
+            [],
+            distributions,
+            walkable_polygon=walkable,
+            workers=workers,
+        )
+
+    def test_workers_give_identical_graph(self):
+        serial = self._build(1)
+        parallel = self._build(3)
+        assert list(parallel.nodes) == list(serial.nodes)
+        assert parallel.nodes == serial.nodes
+        assert parallel.edges == serial.edges
+        assert sum(len(e) for e in serial.edges.values()) == 15
+        # Waypoints go around the wall, so edges are longer than the rays.
+        edge = serial.edge("D2", "E1")
+        assert len(edge.waypoints) > 2
+        assert edge.weight > 30.0
+
+
 # ── Phase 3: Route cost evaluation ───────────────────────────────────
 
 
@@ -648,6 +689,59 @@ class TestStaggeredScheduling:
         assert should_reevaluate(13.0, state, 10.0) is True
 
 
+class TestReevaluationScheduler:
+    def test_matches_scanning_with_should_reevaluate(self):
+        """Due sets equal a full scan over every agent, pass by pass."""
+        from pyfds_evac.core.route_graph import ReevaluationScheduler
+
+        interval = 3.0
+        states = {
+            i: AgentRouteState(eval_offset_s=compute_eval_offset(i, interval, 0.7))
+            for i in range(12)
+        }
+        scheduler = ReevaluationScheduler(interval)
+        for agent_id in states:
+            scheduler.add(agent_id)
+        seen = set()
+        t = 0.0
+        while t < 20.0:
+            scanned = sorted(
+                i
+                for i, st in states.items()
+                if i not in seen or should_reevaluate(t, st, interval)
+            )
+            assert scheduler.pop_due(t) == scanned
+            for agent_id in scanned:
+                seen.add(agent_id)
+                if should_reevaluate(t, states[agent_id], interval):
+                    states[agent_id].last_eval_time_s = t
+                scheduler.reschedule(agent_id, states[agent_id])
+            t = round(t + 0.1, 10)
+
+    def test_removed_agents_are_not_yielded(self):
+        from pyfds_evac.core.route_graph import ReevaluationScheduler
+
+        scheduler = ReevaluationScheduler(10.0)
+        scheduler.add(1)
+        scheduler.add(2)
+        scheduler.remove(1)
+        assert scheduler.pop_due(0.0) == [2]
+        assert len(scheduler) == 0
+        scheduler.reschedule(2, AgentRouteState(last_eval_time_s=0.0))
+        assert scheduler.pop_due(9.0) == []
+        assert 2 in scheduler
+        assert scheduler.pop_due(10.0) == [2]
+
+    def test_zero_interval_never_due_again(self):
+        from pyfds_evac.core.route_graph import ReevaluationScheduler
+
+        scheduler = ReevaluationScheduler(0.0)
+        scheduler.add(7)
+        assert scheduler.pop_due(0.0) == [7]
+        scheduler.reschedule(7, AgentRouteState())
+        assert scheduler.pop_due(1e9) == []
+
+
 class TestRerouteAgent:
     def test_reroute_changes_path_choices(self, two_exit_graph):
         """Rerouting updates path_choices to follow new path."""
@@ -1169,6 +1263,493 @@ class TestDynamicRanking:
         assert "C1" in best.path, f"Expected C1 path due to smoke, got {best.path}"
 
 
+class TestExitCostTables:
+    def test_tables_match_forward_dijkstra(self, diamond_graph):
+        """Reverse per-exit tables reproduce the forward Dijkstra paths."""
+        dynamic_weights = {
+            ("D0", "C0"): 1000.0,
+            ("D0", "C1"): 1.0,
+            ("C0", "E0"): 1.0,
+            ("C1", "E0"): 1.0,
+        }
+        tables = diamond_graph.exit_cost_tables(dynamic_weights)
+        for source in ("D0", "C0", "C1"):
+            assert tables.paths_from(source) == pytest.approx(
+                diamond_graph.shortest_paths_to_exits(source, dynamic_weights)
+            )
+        assert tables.paths_from("D0")["E0"][1] == ["D0", "C1", "E0"]
+
+    def test_next_hop_table(self, linear_graph):
+        tables = linear_graph.exit_cost_tables()
+        assert tables.next_hop["E0"] == {"E0": None, "C0": "E0", "D0": "C0"}
+        assert tables.cost_to_exit["E0"]["D0"] == pytest.approx(20.0)
+
+    def test_unreachable_exit_absent(self, two_exit_graph):
+        tables = two_exit_graph.exit_cost_tables()
+        # E0 cannot be reached from C0 (no C0 -> E0 edge).
+        assert set(tables.paths_from("C0")) == {"E1"}
+        assert tables.paths_from("unknown") == {}
+
+    def test_rank_routes_with_tables_matches_per_agent_dijkstra(self, diamond_graph):
+        from pyfds_evac.core.route_graph import build_exit_cost_tables
+
+        class SpatialSmoke:
+            def sample_extinction(self, time_s, x, y):
+                return 5.0 if abs(y - 10.0) < 5.0 else 0.0
+
+        config = RouteCostConfig()
+        cache: dict = {}
+        tables = build_exit_cost_tables(
+            diamond_graph, 0.0, SpatialSmoke(), None, config, cached_segments=cache
+        )
+        assert len(cache) == 4  # every edge evaluated once for the pass
+        with_tables = rank_routes(
+            diamond_graph,
+            "D0",
+            0.0,
+            0.0,
+            SpatialSmoke(),
+            None,
+            config,
+            cached_segments=cache,
+            exit_tables=tables,
+        )
+        without = rank_routes(
+            diamond_graph, "D0", 0.0, 0.0, SpatialSmoke(), None, config
+        )
+        assert with_tables == without
+
+    def test_tables_ignored_for_discovery_agent(self, multi_exit_graph):
+        from pyfds_evac.core.cognitive_map import AgentCognitiveMap
+
+        cmap = AgentCognitiveMap(
+            familiarity="discovery",
+            known_nodes={"D0", "E0"},
+            known_edges={("D0", "E0")},
+        )
+        ranked = rank_routes(
+            multi_exit_graph,
+            "D0",
+            0.0,
+            0.0,
+            ConstantExtinctionField(0.0),
+            None,
+            RouteCostConfig(),
+            cognitive_map=cmap,
+            exit_tables=multi_exit_graph.exit_cost_tables(),
+        )
+        assert [rc.exit_id for rc in ranked] == ["E0"]
+
+
+class TestEvaluateSegments:
+    @staticmethod
+    def _graph():
+        """D0 -> C0 (polyline with a zero-length leg), C0 -> E0, D0 -> E0 (ray)."""
+        nodes = {
+            "D0": StageNode("D0", 0.0, 0.0, "distribution"),
+            "C0": StageNode("C0", 10.0, 5.0, "checkpoint"),
+            "E0": StageNode("E0", 23.0, 0.0, "exit"),
+        }
+        edges = {
+            "D0": [
+                StageEdge(
+                    "D0", "C0", 12.0, [(0.0, 0.0), (5.0, 5.0), (5.0, 5.0), (10.0, 5.0)]
+                ),
+                StageEdge("D0", "E0", 23.0),
+            ],
+            "C0": [StageEdge("C0", "E0", 13.9, [(10.0, 5.0)])],
+        }
+        return StageGraph(nodes=nodes, edges=edges)
+
+    class _GradientField:
+        def sample_extinction(self, time_s, x, y):
+            return 0.01 * x * x + 0.1 * y + 0.001 * time_s
+
+    class _BatchGradientField(_GradientField):
+        def __init__(self):
+            self.batch_calls = 0
+
+        def sample_extinction_many(self, time_s, xs, ys):
+            self.batch_calls += 1
+            return 0.01 * xs * xs + 0.1 * ys + 0.001 * time_s
+
+    class _FedRate:
+        def sample_fed_rate(self, time_s, x, y):
+            return 0.02 * x + 0.01 * y
+
+    @pytest.mark.parametrize("batched", [False, True])
+    def test_matches_evaluate_segment(self, batched):
+        graph = self._graph()
+        field = self._BatchGradientField() if batched else self._GradientField()
+        config = RouteCostConfig(sampling_step_m=1.5)
+        batch = evaluate_segments(graph, 7.0, field, self._FedRate(), config)
+        assert set(batch) == {("D0", "C0"), ("D0", "E0"), ("C0", "E0")}
+        for (source, target), seg in batch.items():
+            assert seg == evaluate_segment(
+                graph, source, target, 7.0, field, self._FedRate(), config
+            )
+        if batched:
+            assert field.batch_calls == 1
+
+    def test_keys_subset(self):
+        graph = self._graph()
+        config = RouteCostConfig()
+        batch = evaluate_segments(
+            graph,
+            0.0,
+            self._GradientField(),
+            None,
+            config,
+            keys=[("C0", "E0")],
+        )
+        assert list(batch) == [("C0", "E0")]
+        assert batch[("C0", "E0")].fed_growth == 0.0
+
+    def test_sample_table_is_cached_and_read_only(self):
+        graph = self._graph()
+        table = graph.edge_sample_table(2.0)
+        assert graph.edge_sample_table(2.0) is table
+        assert not table.xs.flags.writeable
+        # Per-call tables must not take the sampler's location cache.
+        assert table.subset([table.keys[0]]).xs.flags.writeable
+        # The zero-length polyline leg contributes a single sample.
+        start, stop = table.offsets[0], table.offsets[1]
+        assert (
+            list(zip(table.xs[start:stop], table.ys[start:stop])).count((5.0, 5.0)) == 3
+        )
+
+    def test_edge_lookup(self):
+        graph = self._graph()
+        assert graph.edge("D0", "E0").weight == 23.0
+        assert graph.edge("E0", "D0") is None
+
+    def test_compute_dynamic_weights_fills_cache(self):
+        from pyfds_evac.core.route_graph import compute_dynamic_weights
+
+        graph = self._graph()
+        cache = {}
+        weights = compute_dynamic_weights(
+            graph,
+            0.0,
+            self._GradientField(),
+            None,
+            RouteCostConfig(),
+            cached_segments=cache,
+        )
+        assert set(cache) == set(weights)
+
+
+class TestRefreshSegments:
+    """Incremental edge costs driven by per-cell change detection."""
+
+    @staticmethod
+    def _field():
+        """20x4 m slice, 1 m cells; smoke grows only for x >= 12 after frame 0."""
+        from types import SimpleNamespace
+
+        import numpy as np
+
+        from pyfds_evac.core.fds_sampling import SliceFieldSampler
+        from pyfds_evac.core.smoke_speed import ExtinctionField
+
+        data = np.zeros((3, 20, 4))
+        data[1, 12:, :] = 0.5
+        data[2, 12:, :] = 0.5
+        data[2, 16:, :] = 0.52
+        subslice = SimpleNamespace(
+            extent=SimpleNamespace(x_start=0.0, x_end=20.0, y_start=0.0, y_end=4.0),
+            shape=(20, 4),
+            data=data,
+        )
+        slice_obj = SimpleNamespace(
+            subslices=[subslice], get_nearest_timestep=lambda t: min(2, int(t // 10))
+        )
+        return ExtinctionField(SliceFieldSampler(slice_obj))
+
+    @staticmethod
+    def _graph():
+        nodes = {
+            "D0": StageNode("D0", 1.0, 2.0, "distribution"),
+            "C0": StageNode("C0", 8.0, 2.0, "checkpoint"),
+            "E0": StageNode("E0", 2.0, 3.0, "exit"),
+            "E1": StageNode("E1", 19.0, 2.0, "exit"),
+        }
+        edges = {
+            "D0": [StageEdge("D0", "C0", 7.0), StageEdge("D0", "E0", 1.4)],
+            "C0": [StageEdge("C0", "E1", 11.0)],
+        }
+        return StageGraph(nodes=nodes, edges=edges)
+
+    def test_only_edges_in_changed_cells_are_recomputed(self):
+        from pyfds_evac.core.route_graph import refresh_segments
+
+        graph, field, config = self._graph(), self._field(), RouteCostConfig()
+        first, times = refresh_segments(graph, 0.0, field, None, config)
+        second, times = refresh_segments(graph, 10.0, field, None, config, first, times)
+        assert second == evaluate_segments(graph, 10.0, field, None, config)
+        assert second[("D0", "C0")] is first[("D0", "C0")]
+        assert second[("D0", "E0")] is first[("D0", "E0")]
+        assert second[("C0", "E1")] is not first[("C0", "E1")]
+        assert times == {("D0", "C0"): 0.0, ("D0", "E0"): 0.0, ("C0", "E1"): 10.0}
+
+    def test_tolerance_keeps_small_changes(self):
+        from pyfds_evac.core.route_graph import refresh_segments
+
+        graph, field, config = self._graph(), self._field(), RouteCostConfig()
+        first, times = refresh_segments(graph, 10.0, field, None, config)
+        exact, _ = refresh_segments(graph, 20.0, field, None, config, first, times)
+        assert exact[("C0", "E1")] is not first[("C0", "E1")]
+        loose, loose_times = refresh_segments(
+            graph,
+            20.0,
+            field,
+            None,
+            config,
+            first,
+            times,
+            extinction_tolerance=0.05,
+        )
+        assert loose[("C0", "E1")] is first[("C0", "E1")]
+        assert loose_times[("C0", "E1")] == 10.0
+
+    def test_samplers_without_change_detection_recompute_everything(self):
+        from pyfds_evac.core.route_graph import refresh_segments
+
+        graph, config = self._graph(), RouteCostConfig()
+        field = self._field()
+        first, times = refresh_segments(graph, 0.0, field, None, config)
+
+        class NoChangeInfo:
+            def sample_extinction(self, time_s, x, y):
+                return 0.0
+
+        second, second_times = refresh_segments(
+            graph, 10.0, NoChangeInfo(), None, config, first, times
+        )
+        assert set(second_times.values()) == {10.0}
+        assert all(second[key] is not first[key] for key in first)
+
+
+class TestLazyEdgeEvaluation:
+    """Edges costed on first relaxation must give the eager ranking."""
+
+    class _GradientField:
+        def sample_extinction(self, time_s, x, y):
+            return 0.05 * x + 0.02 * y
+
+    @staticmethod
+    def _graph():
+        nodes = {
+            "D0": StageNode("D0", 0.0, 0.0, "distribution"),
+            "C0": StageNode("C0", 5.0, 0.0, "checkpoint"),
+            "C1": StageNode("C1", 0.0, 5.0, "checkpoint"),
+            "E0": StageNode("E0", 10.0, 0.0, "exit"),
+            "E1": StageNode("E1", 0.0, 10.0, "exit"),
+            # Far wing behind the exits: reachable, but never on a shortest path.
+            "F0": StageNode("F0", 40.0, 0.0, "checkpoint"),
+            "F1": StageNode("F1", 80.0, 0.0, "checkpoint"),
+        }
+        edges = {
+            "D0": [
+                StageEdge("D0", "C0", 5.0),
+                StageEdge("D0", "C1", 5.0),
+                StageEdge("D0", "F0", 40.0),
+            ],
+            "C0": [StageEdge("C0", "E0", 5.0)],
+            "C1": [StageEdge("C1", "E1", 5.0)],
+            "F0": [StageEdge("F0", "F1", 40.0), StageEdge("F0", "E0", 30.0)],
+            "F1": [StageEdge("F1", "E0", 70.0)],
+        }
+        return StageGraph(nodes=nodes, edges=edges)
+
+    def test_ranking_matches_eager(self):
+        graph, field, config = self._graph(), self._GradientField(), RouteCostConfig()
+        eager = rank_routes(graph, "D0", 0.0, 0.0, field, None, config)
+        lazy = rank_routes(graph, "D0", 0.0, 0.0, field, None, config, lazy_edges=True)
+        assert lazy == eager
+
+    def test_stops_before_far_edges(self):
+        from pyfds_evac.core.route_graph import lazy_shortest_paths_to_exits
+
+        graph, field, config = self._graph(), self._GradientField(), RouteCostConfig()
+        cache = {}
+        paths = lazy_shortest_paths_to_exits(
+            graph, "D0", 0.0, field, None, config, cached_segments=cache
+        )
+        weights = compute_dynamic_weights(graph, 0.0, field, None, config)
+        assert paths == graph.shortest_paths_to_exits("D0", weights)
+        assert ("F0", "F1") not in cache
+        assert ("F1", "E0") not in cache
+        assert set(cache) == {
+            ("D0", "C0"),
+            ("D0", "C1"),
+            ("D0", "F0"),
+            ("C0", "E0"),
+            ("C1", "E1"),
+        }
+
+    def test_reroute_config_enables_lazy_mode(self):
+        graph, field = self._graph(), self._GradientField()
+        state = AgentRouteState()
+        wait_info = {"current_origin": "D0", "stage_configs": {}}
+        cache = {}
+        evaluate_and_reroute(
+            0,
+            wait_info,
+            state,
+            graph,
+            0.0,
+            0.0,
+            field,
+            None,
+            RerouteConfig(lazy_edge_evaluation=True),
+            cache,
+        )
+        assert ("F1", "E0") not in cache
+        assert state.current_exit in {"E0", "E1"}
+
+
+class TestFirstLegs:
+    """Routes costed from the agent's position inside a wide source stage."""
+
+    class _Smoke:
+        def sample_extinction(self, time_s, x, y):
+            return 0.3 if y > 2.0 else 0.0
+
+    @staticmethod
+    def _graph():
+        nodes = {
+            "D0": StageNode("D0", 0.0, 0.0, "distribution"),
+            "C0": StageNode("C0", -10.0, 0.0, "checkpoint"),
+            "C1": StageNode("C1", 10.0, 0.0, "checkpoint"),
+            "E0": StageNode("E0", -20.0, 0.0, "exit"),
+            "E1": StageNode("E1", 20.0, 0.0, "exit"),
+        }
+        edges = {
+            "D0": [StageEdge("D0", "C0", 10.0), StageEdge("D0", "C1", 10.0)],
+            "C0": [StageEdge("C0", "E0", 10.0)],
+            "C1": [StageEdge("C1", "E1", 10.0)],
+        }
+        return StageGraph(nodes=nodes, edges=edges)
+
+    def _rank(self, graph, legs, config=None):
+        from pyfds_evac.core.route_graph import build_exit_cost_tables
+
+        config = config or RouteCostConfig()
+        cache: dict = {}
+        tables = build_exit_cost_tables(
+            graph, 0.0, self._Smoke(), None, config, cached_segments=cache
+        )
+        return rank_routes(
+            graph,
+            "D0",
+            0.0,
+            0.0,
+            self._Smoke(),
+            None,
+            config,
+            cached_segments=cache,
+            exit_tables=tables,
+            first_legs=legs,
+        )
+
+    def test_position_decides_between_symmetric_exits(self):
+        from pyfds_evac.core.route_graph import first_leg_segments
+
+        graph = self._graph()
+        west, east = first_leg_segments(
+            graph,
+            ["D0", "D0"],
+            [(-8.0, 0.0), (8.0, 0.0)],
+            0.0,
+            self._Smoke(),
+            None,
+            RouteCostConfig(),
+        )
+        assert west["C0"].length_m == pytest.approx(2.0)
+        assert east["C0"].length_m == pytest.approx(18.0)
+        assert west["C0"].source == "D0"
+
+        ranked_west = self._rank(graph, west)
+        ranked_east = self._rank(graph, east)
+        assert ranked_west[0].exit_id == "E0"
+        assert ranked_east[0].exit_id == "E1"
+        assert ranked_west[0].path == ["D0", "C0", "E0"]
+        assert ranked_west[0].path_length_m == pytest.approx(12.0)
+
+    def test_centroid_position_matches_shared_ranking(self):
+        from pyfds_evac.core.route_graph import first_leg_segments
+
+        graph = self._graph()
+        (legs,) = first_leg_segments(
+            graph, ["D0"], [(0.0, 0.0)], 0.0, self._Smoke(), None, RouteCostConfig()
+        )
+        assert self._rank(graph, legs) == self._rank(graph, None)
+
+    def test_smoky_leg_is_costed(self):
+        from pyfds_evac.core.route_graph import first_leg_segments
+
+        graph = self._graph()
+        (legs,) = first_leg_segments(
+            graph, ["D0"], [(0.0, 6.0)], 0.0, self._Smoke(), None, RouteCostConfig()
+        )
+        assert legs["C0"].k_avg > 0.0
+        assert legs["C0"].k_avg == pytest.approx(legs["C1"].k_avg)
+
+    def test_hop_leading_back_through_source_is_skipped(self):
+        from pyfds_evac.core.route_graph import (
+            build_exit_cost_tables,
+            first_leg_segments,
+        )
+
+        class _SmokeAbove:
+            def sample_extinction(self, time_s, x, y):
+                return 5.0 if y > 0.5 else 0.0
+
+        graph = self._graph()
+        # C0 leads back to D0, so C0's table path to E1 passes D0 again.
+        graph.edges["C0"].append(StageEdge("C0", "D0", 10.0))
+        smoke, config = _SmokeAbove(), RouteCostConfig()
+        (legs,) = first_leg_segments(
+            graph, ["D0"], [(-9.0, 1.0)], 0.0, smoke, None, config
+        )
+        cache: dict = {}
+        tables = build_exit_cost_tables(
+            graph, 0.0, smoke, None, config, cached_segments=cache
+        )
+        assert tables.path("C0", "E1") == ["C0", "D0", "C1", "E1"]
+        ranked = rank_routes(
+            graph,
+            "D0",
+            0.0,
+            0.0,
+            smoke,
+            None,
+            config,
+            cached_segments=cache,
+            exit_tables=tables,
+            first_legs=legs,
+        )
+        to_e1 = next(rc for rc in ranked if rc.exit_id == "E1")
+        assert to_e1.path == ["D0", "C1", "E1"]
+        assert to_e1.path_length_m == pytest.approx(legs["C1"].length_m + 10.0)
+
+    def test_agents_without_position_or_source(self):
+        from pyfds_evac.core.route_graph import first_leg_segments
+
+        graph = self._graph()
+        legs = first_leg_segments(
+            graph,
+            ["D0", "XX", None, "E0"],
+            [None, (0.0, 0.0), (0.0, 0.0), (-20.0, 0.0)],
+            0.0,
+            self._Smoke(),
+            None,
+            RouteCostConfig(),
+        )
+        assert legs == [None, None, None, {}]
+
+
 class TestFedRateAdapter:
     def test_evaluate_segment_with_fed_sampler(self, linear_graph):
         """evaluate_segment should compute non-zero fed_growth when sampler is provided."""
@@ -1560,6 +2141,189 @@ class TestCognitiveMapRouting:
         assert "E1" in exit_ids
 
 
+class TestCognitiveSubgraphViews:
+    """Restricted graphs are cached and shared by knowledge state."""
+
+    @staticmethod
+    def _map(nodes, edges):
+        from pyfds_evac.core.cognitive_map import AgentCognitiveMap
+
+        return AgentCognitiveMap(
+            familiarity="discovery", known_nodes=set(nodes), known_edges=set(edges)
+        )
+
+    def test_view_contains_known_part_only(self, diamond_graph):
+        from pyfds_evac.core.cognitive_map import cognitive_subgraph
+
+        cmap = self._map({"D0", "C0", "E0"}, {("D0", "C0"), ("C0", "E0")})
+        sub = cognitive_subgraph(cmap, diamond_graph)
+        assert set(sub.nodes) == {"D0", "C0", "E0"}
+        assert {
+            (e.source, e.target) for edges in sub.edges.values() for e in edges
+        } == {("D0", "C0"), ("C0", "E0")}
+        assert sub.edge("D0", "C0") is diamond_graph.edge("D0", "C0")
+
+    def test_equal_knowledge_shares_one_view(self, diamond_graph):
+        from pyfds_evac.core.cognitive_map import cognitive_subgraph
+
+        a = self._map({"D0", "C0"}, {("D0", "C0")})
+        b = self._map({"C0", "D0"}, {("D0", "C0")})
+        assert cognitive_subgraph(a, diamond_graph) is cognitive_subgraph(
+            b, diamond_graph
+        )
+
+    def test_view_rebuilt_only_when_map_grows(self, diamond_graph):
+        from pyfds_evac.core.cognitive_map import (
+            cognitive_subgraph,
+            expand_on_arrival,
+        )
+
+        cmap = self._map({"D0"}, set())
+        expand_on_arrival(cmap, "D0", diamond_graph)
+        first = cognitive_subgraph(cmap, diamond_graph)
+        signature = cmap.signature()
+        version = cmap.version
+
+        expand_on_arrival(cmap, "D0", diamond_graph)  # nothing new
+        assert cmap.version == version
+        assert cmap.signature() is signature
+        assert cognitive_subgraph(cmap, diamond_graph) is first
+
+        node = next(sid for sid in first.nodes if sid != "D0")
+        expand_on_arrival(cmap, node, diamond_graph)
+        assert cmap.version != version
+        assert cognitive_subgraph(cmap, diamond_graph) is not first
+
+    def test_full_map_uses_base_graph(self, diamond_graph):
+        from pyfds_evac.core.cognitive_map import AgentCognitiveMap, cognitive_subgraph
+
+        cmap = AgentCognitiveMap(familiarity="full")
+        assert cognitive_subgraph(cmap, diamond_graph) is diamond_graph
+
+
+class TestCognitiveMapBits:
+    """Cognitive maps keep their knowledge as integer bitsets."""
+
+    def test_sets_round_trip(self):
+        from pyfds_evac.core.cognitive_map import AgentCognitiveMap
+
+        cmap = AgentCognitiveMap(
+            "discovery", known_nodes={"D0", "C0"}, known_edges={("D0", "C0")}
+        )
+        assert cmap.known_nodes == {"D0", "C0"}
+        assert cmap.known_edges == {("D0", "C0")}
+        assert cmap.knows_node("C0") and not cmap.knows_node("E0")
+        assert cmap.knows_edge("D0", "C0") and not cmap.knows_edge("C0", "D0")
+        assert cmap.version == (2, 1)
+
+    def test_expansion_matches_graph(self, diamond_graph):
+        from pyfds_evac.core.cognitive_map import (
+            expand_from_visibility,
+            expand_on_arrival,
+            init_cognitive_map,
+        )
+
+        class _SeesC0:
+            def node_is_visible(self, time, x, y, node_id):
+                return node_id == "C0"
+
+        cmap = init_cognitive_map("D0", diamond_graph, "discovery", _SeesC0(), 0.0)
+        assert cmap.known_nodes == {"D0", "C0"}
+        expand_from_visibility(cmap, "D0", diamond_graph, None, 0.0, 0.0, 0.0)
+        assert cmap.known_nodes == {"D0", "C0", "C1"}
+        expand_on_arrival(cmap, "C1", diamond_graph)
+        assert cmap.known_edges == {("D0", "C0"), ("D0", "C1"), ("C1", "E0")}
+
+        full = init_cognitive_map("D0", diamond_graph, "full", None, 0.0)
+        assert full.known_nodes == set(diamond_graph.nodes)
+        assert len(full.known_edges) == 4
+
+    def test_copies_do_not_share_discoveries(self, diamond_graph):
+        from pyfds_evac.core.cognitive_map import expand_on_arrival, init_cognitive_map
+
+        a = init_cognitive_map("D0", diamond_graph, "discovery", None, 0.0)
+        b = a.copy()
+        assert b.signature() == a.signature()
+        expand_on_arrival(b, "C0", diamond_graph)
+        assert "E0" in b.known_nodes
+        assert "E0" not in a.known_nodes
+        assert b.signature() != a.signature()
+
+    def test_each_graph_has_its_own_index(self, diamond_graph):
+        from pyfds_evac.core.cognitive_map import _INDEX, init_cognitive_map
+
+        before = len(_INDEX.node_ids)
+        other = StageGraph(
+            nodes={"Q": StageNode("Q", 0.0, 0.0, "distribution")}, edges={}
+        )
+        a = init_cognitive_map("D0", diamond_graph, "discovery", None, 0.0)
+        b = init_cognitive_map("Q", other, "discovery", None, 0.0)
+        assert a.index is not b.index
+        assert tuple(a.index.node_ids) == diamond_graph.compiled().node_ids
+        assert len(_INDEX.node_ids) == before
+
+    def test_set_maps_move_to_the_graph_index(self, diamond_graph):
+        from pyfds_evac.core.cognitive_map import (
+            _INDEX,
+            AgentCognitiveMap,
+            cognitive_subgraph,
+            init_cognitive_map,
+        )
+
+        built = AgentCognitiveMap(
+            "discovery", known_nodes={"D0", "C0"}, known_edges={("D0", "C0")}
+        )
+        assert built.index is _INDEX
+        sub = cognitive_subgraph(built, diamond_graph)
+        assert built.index is not _INDEX
+        assert built.known_nodes == {"D0", "C0"}
+        assert set(sub.nodes) == {"D0", "C0"}
+
+        grown = init_cognitive_map("D0", diamond_graph, "discovery", None, 0.0)
+        diamond_graph.invalidate()
+        cognitive_subgraph(grown, diamond_graph)
+        assert grown.index is diamond_graph._knowledge_bits.index
+        assert grown.known_nodes == {"D0", "C0", "C1"}
+
+    def test_batched_expansion_matches_per_agent(self, diamond_graph):
+        from pyfds_evac.core.cognitive_map import (
+            AgentCognitiveMap,
+            expand_from_visibility,
+            expand_from_visibility_many,
+        )
+
+        class _EastOnly:
+            """Signs are visible from x > 5 only; counts batched calls."""
+
+            batches = 0
+
+            def node_is_visible(self, time, x, y, node_id):
+                return x > 5.0
+
+            def node_is_visible_many(self, time, xs, ys, node_ids):
+                self.batches += 1
+                return xs > 5.0
+
+        vis = _EastOnly()
+        starts = [("D0", (0.0, 0.0)), ("D0", (9.0, 0.0)), ("C0", (9.0, 0.0))]
+        batched = [AgentCognitiveMap("discovery", {node}) for node, _ in starts]
+        single = [AgentCognitiveMap("discovery", {node}) for node, _ in starts]
+        expand_from_visibility_many(
+            batched,
+            [node for node, _ in starts],
+            diamond_graph,
+            vis,
+            0.0,
+            [pos for _, pos in starts],
+        )
+        for cmap, (node, (x, y)) in zip(single, starts, strict=True):
+            expand_from_visibility(cmap, node, diamond_graph, vis, 0.0, x, y)
+        assert batched == single
+        assert vis.batches == 1
+        assert batched[0].known_nodes == {"D0"}
+        assert batched[1].known_nodes == {"D0", "C0", "C1"}
+
+
 class TestVisibilityRejection:
     """rank_routes applies next_node_not_visible rejection unconditionally."""
 
@@ -1636,6 +2400,130 @@ class TestVisibilityRejection:
         assert all(x == 7.5 and y == 3.0 for x, y in received)
 
 
+class TestRouteAlternatives:
+    """Further corridors to the same exit when its best route is rejected."""
+
+    class _Vis:
+        def __init__(self, visible):
+            self.visible = visible
+            self.queries = []
+
+        def node_is_visible(self, time, x, y, node_id):
+            self.queries.append(node_id)
+            return node_id in self.visible
+
+    @staticmethod
+    def _graph():
+        # Corridors via A (10 m), B (13.1 m) and C (20.8 m) to one exit.
+        nodes = {
+            "D0": StageNode("D0", 0.0, 0.0, "distribution"),
+            "A": StageNode("A", 5.0, 0.0, "checkpoint"),
+            "B": StageNode("B", 3.0, 4.0, "checkpoint"),
+            "C": StageNode("C", 0.0, 8.0, "checkpoint"),
+            "E": StageNode("E", 10.0, 0.0, "exit"),
+        }
+
+        def edge(a, b):
+            length = math.hypot(
+                nodes[b].centroid_x - nodes[a].centroid_x,
+                nodes[b].centroid_y - nodes[a].centroid_y,
+            )
+            return StageEdge(a, b, length)
+
+        edges = {
+            "D0": [edge("D0", "A"), edge("D0", "B"), edge("D0", "C")],
+            "A": [edge("A", "E")],
+            "B": [edge("B", "E")],
+            "C": [edge("C", "E")],
+        }
+        return StageGraph(nodes=nodes, edges=edges)
+
+    def _rank(self, vis, alternatives):
+        return rank_routes(
+            self._graph(),
+            "D0",
+            0.0,
+            0.0,
+            ConstantExtinctionField(0.0),
+            None,
+            RouteCostConfig(),
+            vis_model=vis,
+            alternatives=alternatives,
+        )
+
+    def test_k_shortest_paths_in_cost_order(self):
+        paths = list(self._graph().k_shortest_paths("D0", "E"))
+        assert [path for _, path in paths] == [
+            ["D0", "A", "E"],
+            ["D0", "B", "E"],
+            ["D0", "C", "E"],
+        ]
+        assert [cost for cost, _ in paths] == pytest.approx(
+            [10.0, 5.0 + math.hypot(7.0, 4.0), 8.0 + math.hypot(10.0, 8.0)]
+        )
+
+    def test_without_alternatives_falls_back(self):
+        ranked = self._rank(self._Vis({"B", "C"}), 0)
+        assert ranked[0].path == ["D0", "A", "E"]
+        assert ranked[0].rejection_reason.startswith("fallback")
+
+    def test_next_corridor_replaces_rejected_route(self):
+        vis = self._Vis({"B", "C"})
+        ranked = self._rank(vis, 2)
+        assert [rc.path for rc in ranked] == [["D0", "B", "E"]]
+        assert not ranked[0].rejected
+        # Stops at the first acceptable path; C is never checked.
+        assert vis.queries == ["A", "B"]
+
+    def test_alternatives_are_limited(self):
+        ranked = self._rank(self._Vis({"C"}), 1)
+        assert ranked[0].path == ["D0", "A", "E"]
+        assert ranked[0].rejection_reason.startswith("fallback")
+        ranked = self._rank(self._Vis({"C"}), 2)
+        assert ranked[0].path == ["D0", "C", "E"]
+        assert ranked[0].rejection_reason is None
+
+    def test_dominated_exit_is_not_searched(self):
+        graph = self._graph()
+        nodes = dict(graph.nodes, X=StageNode("X", -4.0, 0.0, "exit"))
+        edges = dict(graph.edges)
+        edges["D0"] = [*edges["D0"], StageEdge("D0", "X", 4.0)]
+        vis = self._Vis({"B", "C", "X"})
+        ranked = rank_routes(
+            StageGraph(nodes=nodes, edges=edges),
+            "D0",
+            0.0,
+            0.0,
+            ConstantExtinctionField(0.0),
+            None,
+            RouteCostConfig(),
+            vis_model=vis,
+            alternatives=2,
+        )
+        # The 4 m route to X beats every path to E, so B is never checked.
+        assert [rc.exit_id for rc in ranked] == ["X", "E"]
+        assert ranked[1].rejected
+        assert sorted(vis.queries) == ["A", "X"]
+
+    def test_evaluate_and_reroute_uses_config(self):
+        graph = self._graph()
+        wait_info = _make_wait_info(graph, "D0", "A")
+        state = AgentRouteState()
+        evaluate_and_reroute(
+            agent_id=1,
+            wait_info=wait_info,
+            route_state=state,
+            graph=graph,
+            current_time_s=0.0,
+            current_fed=0.0,
+            extinction_sampler=ConstantExtinctionField(0.0),
+            fed_rate_sampler=None,
+            config=RerouteConfig(route_alternatives=2),
+            vis_model=self._Vis({"B", "C"}),
+        )
+        assert state.current_path == ["D0", "B", "E"]
+
+
 # ── VisibilityModel cache tests are in test_visibility.py ─────────────
 
 
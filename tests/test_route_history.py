@@ -0,0 +1,150 @@
+"""Tests for the columnar route-cost history."""
+
+import csv
+
+import pytest
+
+from pyfds_evac.core.route_graph import RouteCost
+from pyfds_evac.core.route_history import (
+    ROUTE_COST_COLUMNS,
+    RouteCostHistory,
+    RouteCostSampling,
+)
+
+
+def _ranked(n=3):
+    return [
+        RouteCost(
+            exit_id=f"E{i}",
+            path=["D0", f"E{i}"],
+            path_length_m=10.0 + i,
+            k_ave_route=0.1 * i,
+            travel_time_s=7.5 + i,
+            fed_max_route=0.01 * i,
+            composite_cost=20.0 + i,
+            segments=[],
+            rejected=i == n - 1,
+            rejection_reason="next_node_not_visible" if i == n - 1 else None,
+            queue_time_s=0.5 * i,
+        )
+        for i in range(n)
+    ]
+
+
+def _record(history, agent_id=4, n=3, time_s=12.0000001):
+    history.record(
+        time_s,
+        agent_id,
+        "D0",
+        None,
+        0.25,
+        _ranked(n),
+        {"E0": 2},
+        lambda exit_id: 1.5,
+    )
+
+
+def test_rows_match_dict_format():
+    history = RouteCostHistory()
+    history.start_pass()
+    _record(history)
+
+    rows = history.rows()
+    assert len(history) == 3
+    assert list(rows[0]) == list(ROUTE_COST_COLUMNS)
+    assert rows[0] == {
+        "time_s": 12.0,
+        "agent_id": 4,
+        "source": "D0",
+        "current_exit": "",
+        "current_fed": 0.25,
+        "route_rank": 1,
+        "exit_id": "E0",
+        "path": "D0 > E0",
+        "path_length_m": 10.0,
+        "k_ave_route": 0.0,
+        "travel_time_s": 7.5,
+        "fed_max_route": 0.0,
+        "composite_cost": 20.0,
+        "rejected": False,
+        "rejection_reason": "",
+        "queue_time_s": 0.0,
+        "exit_count": 2,
+        "exit_capacity": 1.5,
+    }
+    assert type(rows[0]["agent_id"]) is int
+    assert type(rows[2]["rejected"]) is bool
+    assert rows[2]["rejection_reason"] == "next_node_not_visible"
+    assert [row["exit_count"] for row in rows] == [2, 0, 0]
+
+
+def test_sampling_filters_passes_agents_and_ranks():
+    history = RouteCostHistory(
+        RouteCostSampling(every_nth_pass=2, top_k=2, agent_stride=3)
+    )
+    wanted = []
+    for _ in range(4):
+        history.start_pass()
+        for agent_id in range(6):
+            if history.wants(agent_id):
+                wanted.append(agent_id)
+                _record(history, agent_id=agent_id)
+
+    assert wanted == [0, 3, 0, 3]
+    assert len(history) == 8
+    assert {row["route_rank"] for row in history.rows()} == {1, 2}
+
+
+def test_max_rows_counts_dropped():
+    history = RouteCostHistory(RouteCostSampling(max_rows=5))
+    history.start_pass()
+    for agent_id in range(3):
+        _record(history, agent_id=agent_id)
+
+    assert len(history) == 5
+    assert history.dropped_rows == 4
+    assert [row["agent_id"] for row in history.rows()] == [0, 0, 0, 1, 1]
+
+
+def test_buffers_grow_past_chunk():
+    history = RouteCostHistory(chunk_rows=2)
+    history.start_pass()
+    for agent_id in range(5):
+        _record(history, agent_id=agent_id)
+
+    columns = history.columns()
+    assert len(history) == 15
+    assert columns["agent_id"].tolist() == [a for a in range(5) for _ in range(3)]
+    assert columns["route_rank"].tolist() == [1, 2, 3] * 5
+    assert columns["exit_id"].tolist() == ["E0", "E1", "E2"] * 5
+
+
+def test_chunk_rows_must_be_positive():
+    with pytest.raises(ValueError):
+        RouteCostHistory(chunk_rows=0)
+
+
+def test_write_csv_round_trip(tmp_path):
+    history = RouteCostHistory()
+    history.start_pass()
+    _record(history)
+    output = tmp_path / "nested" / "route_costs.csv"
+    history.write_csv(output)
+
+    with output.open(encoding="utf-8", newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    assert tuple(rows[0]) == ROUTE_COST_COLUMNS
+    assert [row["path"] for row in rows] == ["D0 > E0", "D0 > E1", "D0 > E2"]
+    assert rows[2]["rejected"] == "True"
+    assert rows[1]["composite_cost"] == "21.0"
+
+
+def test_scenario_result_builds_rows_on_access():
+    from pyfds_evac.core.scenario import ScenarioResult
+
+    assert ScenarioResult(metrics={}).route_cost_history is None
+    history = RouteCostHistory()
+    history.start_pass()
+    _record(history)
+    result = ScenarioResult(metrics={}, route_cost_table=history)
+    assert result.route_cost_history == history.rows()
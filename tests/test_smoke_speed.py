@@ -1,6 +1,8 @@
 from pathlib import Path
+from types import SimpleNamespace
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pytest
 
 from pyfds_evac.core import (
@@ -12,12 +14,35 @@ from pyfds_evac.core import (
     run_scenario,
     speed_from_soot_density,
 )
+from pyfds_evac.core.fds_sampling import SliceFieldSampler
 from pyfds_evac.core.smoke_speed import (
+    ExtinctionField,
     speed_factor_from_extinction,
     speed_factor_from_extinction_fridolf,
+    speed_factor_from_extinction_many,
 )
 
 
+class _FakeSlice:
+    """Two side-by-side subslices on a 4x2 grid over x in [0, 8], y in [0, 2]."""
+
+    def __init__(self, scale: float = 1.0):
+        def sub(x_start, offset):
+            data = scale * (offset + np.arange(3 * 4 * 2, dtype=float).reshape(3, 4, 2))
+            return SimpleNamespace(
+                extent=SimpleNamespace(
+                    x_start=x_start, x_end=x_start + 4.0, y_start=0.0, y_end=2.0
+                ),
+                shape=(4, 2),
+                data=data,
+            )
+
+        self.subslices = [sub(0.0, 0.0), sub(4.0, 100.0)]
+
+    def get_nearest_timestep(self, time_s):
+        return min(2, round(time_s))
+
+
 def _run_iso_constant_extinction(extinction_per_m: float):
     scenario = load_scenario("assets/ISO-table21")
     baseline = run_scenario(scenario, seed=420)
@@ -39,6 +64,16 @@ def test_speed_factor_clear_air_is_one():
     assert speed_factor_from_extinction(0.0) == 1.0
 
 
+def test_speed_factor_many_matches_scalar():
+    k = np.array([0.0, 0.5, 3.0, 50.0, -1.0, np.nan, np.inf])
+    params = {"alpha": 0.5, "beta": -0.1, "min_speed_factor": 0.2}
+    factors = speed_factor_from_extinction_many(k, **params)
+    assert factors.tolist() == [
+        speed_factor_from_extinction(value, **params) for value in k
+    ]
+    assert factors[-3:].tolist() == [1.0, 1.0, 1.0]
+
+
 class TestFridolfSpeedFactor:
     """Fridolf et al. (2019) individualized speed-visibility model."""
 
@@ -262,3 +297,26 @@ def test_fds_evac_guide_smoke_density_plot_is_generated(tmp_path: Path):
 
     assert output.exists()
     assert output.stat().st_size > 0
+
+
+def test_extinction_sample_many_matches_scalar_sampling():
+    field = ExtinctionField(SliceFieldSampler(_FakeSlice()))
+    xs = np.array([0.1, 3.9, 4.0, 4.6, 7.99, 9.0, 2.0])
+    ys = np.array([0.1, 1.9, 0.5, 1.0, 0.0, 1.0, 3.0])
+    xs.flags.writeable = False
+    ys.flags.writeable = False
+    for time_s in (0.0, 1.2, 5.0):
+        batch = field.sample_extinction_many(time_s, xs, ys)
+        scalar = [field.sample_extinction(time_s, x, y) for x, y in zip(xs, ys)]
+        assert batch.tolist() == scalar
+    # Out-of-domain points are zero, like the scalar path.
+    assert batch[-2:].tolist() == [0.0, 0.0]
+
+
+def test_constant_extinction_sample_many():
+    field = ConstantExtinctionField(0.3)
+    assert field.sample_extinction_many(0.0, np.zeros(3), np.zeros(3)).tolist() == [
+        0.3,
+        0.3,
+        0.3,
+    ]
@@ -9,7 +9,7 @@ from unittest.mock import patch
 
 import numpy as np
 
-from pyfds_evac.core.visibility import VisibilityModel, _make_meta
+from pyfds_evac.core.visibility import VisibilityModel, _make_meta, _VisMapCache
 
 
 # ── helpers ───────────────────────────────────────────────────────────
@@ -160,3 +160,239 @@ class TestVisibilityModelCache:
             with np.load(cache, allow_pickle=False) as data:
                 saved_meta = json.loads(str(data["meta"]))
             assert saved_meta["fds_dir"] == str(Path(FDS_DIR).resolve())
+
+
+class TestBatchedLookups:
+    def test_many_matches_single_lookups(self):
+        """Vectorised lookups agree with the scalar ones, edges included."""
+        rng = np.random.default_rng(0)
+        cache = _VisMapCache.from_bool(
+            np.array([0.0, 10.0, 20.0]),
+            np.linspace(0.0, 4.0, 11),
+            np.linspace(0.0, 3.0, 4),
+            rng.random((3, 2, 4, 11)) < 0.5,
+        )
+        xs = rng.uniform(-1.0, 5.0, 200)
+        ys = rng.uniform(-1.0, 4.0, 200)
+        # Exact midpoints exercise the tie-breaking.
+        xs[:5] = [0.2, 1.4, 2.6, 3.8, 4.0]
+        wp_ids = rng.integers(0, 2, 200)
+        for time in (-3.0, 4.0, 15.0, 99.0):
+            many = cache.wp_is_visible_many(time, xs, ys, wp_ids)
+            single = [
+                cache.wp_is_visible(time, x, y, int(wp))
+                for x, y, wp in zip(xs, ys, wp_ids, strict=True)
+            ]
+            assert many.tolist() == single
+
+    @patch("pyfds_evac.core.visibility._build_vismap")
+    def test_unsigned_nodes_are_visible(self, mock_build):
+        mock_build.return_value = _FakeVis()
+        model = VisibilityModel(FDS_DIR, SIGNS, time_step_s=TIME_STEP)
+        visible = model.node_is_visible_many(
+            0.0, np.zeros(3), np.zeros(3), ["exit_A", "no_sign", "exit_B"]
+        )
+        assert visible.tolist() == [False, True, False]
+
+    def test_packed_lookups_match_bool_array(self):
+        rng = np.random.default_rng(1)
+        vis = rng.random((2, 3, 4, 13)) < 0.5
+        cache = _VisMapCache.from_bool(
+            np.array([0.0, 10.0]), np.arange(13.0), np.arange(4.0), vis
+        )
+        assert [p.shape for p in cache._packed] == [(2, 4, 2)] * 3
+        assert np.array_equal(cache.vis, vis)
+        for t, wp, y, x in np.ndindex(vis.shape):
+            assert cache.wp_is_visible(10.0 * t, x, y, wp) == vis[t, wp, y, x]
+
+
+class TestPackedCacheFile:
+    @patch("pyfds_evac.core.visibility._build_vismap")
+    def test_written_cache_is_packed(self, mock_build):
+        fake = _FakeVis()
+        fake.all_x_coords = np.arange(10.0)
+        fake.all_time_all_wp_vismap_array_list = [
+            [np.ones((1, 10), dtype=bool), np.eye(1, 10, 3, dtype=bool)],
+            [np.zeros((1, 10), dtype=bool), np.ones((1, 10), dtype=bool)],
+        ]
+        mock_build.return_value = fake
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = Path(tmp) / "vis.npz"
+            kwargs = {
+                "cache_path": cache,
+                "time_step_s": TIME_STEP,
+                "slice_height_m": HEIGHT,
+            }
+            built = VisibilityModel(FDS_DIR, SIGNS, **kwargs)
+            with np.load(cache, allow_pickle=False) as data:
+                assert data["vis"].shape == (2, 2, 1, 2)
+                assert int(data["width"]) == 10
+
+            loaded = VisibilityModel(FDS_DIR, SIGNS, **kwargs)
+            mock_build.assert_called_once()
+            for x in range(10):
+                assert loaded.node_is_visible(0.0, x, 0.0, "exit_B") == (x == 3)
+                assert built.node_is_visible(0.0, x, 0.0, "exit_B") == (x == 3)
+
+    @patch("pyfds_evac.core.visibility._build_vismap")
+    def test_unpacked_cache_still_loads(self, mock_build):
+        """Caches written before bit-packing hold a bool array and no width."""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = Path(tmp) / "vis.npz"
+            _write_valid_cache(cache)
+            model = VisibilityModel(
+                FDS_DIR, SIGNS, cache_path=cache, time_step_s=TIME_STEP
+            )
+            mock_build.assert_not_called()
+            assert model.node_is_visible(0.0, 0.0, 0.0, "exit_A") is False
+
+
+class TestDirectoryCache:
+    @staticmethod
+    def _fake():
+        fake = _FakeVis()
+        fake.all_x_coords = np.arange(10.0)
+        fake.all_time_all_wp_vismap_array_list = [
+            [np.ones((1, 10), dtype=bool), np.eye(1, 10, 3, dtype=bool)],
+            [np.zeros((1, 10), dtype=bool), np.ones((1, 10), dtype=bool)],
+        ]
+        return fake
+
+    @patch("pyfds_evac.core.visibility._build_vismap")
+    def test_vismap_suffix_is_memory_mapped(self, mock_build):
+        mock_build.return_value = self._fake()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = Path(tmp) / "vis.vismap"
+            kwargs = {
+                "cache_path": cache,
+                "time_step_s": TIME_STEP,
+                "slice_height_m": HEIGHT,
+            }
+            VisibilityModel(FDS_DIR, SIGNS, **kwargs)
+            assert (cache / "meta.json").exists()
+            assert not cache.with_suffix(".npz").exists()
+
+            loaded = VisibilityModel(FDS_DIR, SIGNS, **kwargs)
+            mock_build.assert_called_once()
+            assert all(isinstance(p, np.memmap) for p in loaded._vis._packed)
+            for x in range(10):
+                assert loaded.node_is_visible(0.0, x, 0.0, "exit_B") == (x == 3)
+                assert loaded.node_is_visible(10.0, x, 0.0, "exit_A") is False
+
+    @patch("pyfds_evac.core.visibility._build_vismap")
+    def test_mismatched_directory_is_kept(self, mock_build):
+        mock_build.return_value = self._fake()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = Path(tmp) / "vis.vismap"
+            VisibilityModel(FDS_DIR, SIGNS, cache_path=cache, time_step_s=TIME_STEP)
+            model = VisibilityModel(FDS_DIR, SIGNS, cache_path=cache, time_step_s=5.0)
+            assert mock_build.call_count == 2
+            # Another run may be reading the directory: it is left alone
+            # and the new visibility is used from memory.
+            meta = json.loads((cache / "meta.json").read_text())["meta"]
+            assert meta["time_step_s"] == TIME_STEP
+            assert [p.name for p in Path(tmp).iterdir()] == ["vis.vismap"]
+            assert not any(isinstance(p, np.memmap) for p in model._vis._packed)
+            for x in range(10):
+                assert model.node_is_visible(0.0, x, 0.0, "exit_B") == (x == 3)
+
+    @patch("pyfds_evac.core.visibility._build_vismap")
+    def test_unreadable_saved_grid_falls_back_to_memory(self, mock_build):
+        mock_build.return_value = self._fake()
+
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch("pyfds_evac.core.visibility._load_vismap_grid", return_value=None),
+        ):
+            cache = Path(tmp) / "vis.vismap"
+            model = VisibilityModel(
+                FDS_DIR, SIGNS, cache_path=cache, time_step_s=TIME_STEP
+            )
+            assert (cache / "meta.json").exists()
+            assert list((cache / "signs").iterdir()) == []
+            for x in range(10):
+                assert model.node_is_visible(0.0, x, 0.0, "exit_A") is True
+                assert model.node_is_visible(0.0, x, 0.0, "exit_B") == (x == 3)
+
+    @patch("pyfds_evac.core.visibility._build_vismap")
+    def test_signs_directory_removed_meanwhile(self, mock_build):
+        from pyfds_evac.core import visibility
+
+        mock_build.return_value = self._fake()
+        save_grid = visibility._save_vismap_grid
+
+        def save_then_remove_signs(directory, *args):
+            save_grid(directory, *args)
+            (directory / "signs").rmdir()
+
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch.object(visibility, "_save_vismap_grid", save_then_remove_signs),
+        ):
+            cache = Path(tmp) / "vis.vismap"
+            model = VisibilityModel(
+                FDS_DIR, SIGNS, cache_path=cache, time_step_s=TIME_STEP
+            )
+            for x in range(10):
+                assert model.node_is_visible(0.0, x, 0.0, "exit_B") == (x == 3)
+
+    @patch("pyfds_evac.core.visibility._build_vismap")
+    def test_only_new_signs_are_computed(self, mock_build):
+        mock_build.return_value = self._fake()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = Path(tmp) / "vis.vismap"
+            VisibilityModel(FDS_DIR, SIGNS, cache_path=cache, time_step_s=TIME_STEP)
+            assert len(list((cache / "signs").iterdir())) == 2
+
+            # Move exit_B and add a sign with exit_A's geometry: only the
+            # moved sign is new.
+            fake = self._fake()
+            fake.all_time_all_wp_vismap_array_list = [
+                [np.eye(1, 10, 7, dtype=bool)],
+                [np.eye(1, 10, 7, dtype=bool)],
+            ]
+            mock_build.return_value = fake
+            signs = {
+                "exit_A": SIGNS["exit_A"],
+                "exit_B": {**SIGNS["exit_B"], "x": 8.0},
+                "exit_C": dict(SIGNS["exit_A"]),
+            }
+            model = VisibilityModel(
+                FDS_DIR, signs, cache_path=cache, time_step_s=TIME_STEP
+            )
+            assert mock_build.call_count == 2
+            assert list(mock_build.call_args.args[1]) == ["exit_B"]
+            assert len(list((cache / "signs").iterdir())) == 3
+            for x in range(10):
+                assert model.node_is_visible(0.0, x, 0.0, "exit_A") is True
+                assert model.node_is_visible(0.0, x, 0.0, "exit_B") == (x == 7)
+                assert model.node_is_visible(0.0, x, 0.0, "exit_C") is True
+
+            # Everything is cached now.
+            VisibilityModel(FDS_DIR, signs, cache_path=cache, time_step_s=TIME_STEP)
+            assert mock_build.call_count == 2
+
+    @patch("pyfds_evac.core.visibility._build_vismap")
+    def test_unreadable_or_misshapen_signs_are_recomputed(self, mock_build):
+        mock_build.return_value = self._fake()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = Path(tmp) / "vis.vismap"
+            VisibilityModel(FDS_DIR, SIGNS, cache_path=cache, time_step_s=TIME_STEP)
+            corrupt, misshapen = sorted((cache / "signs").iterdir())
+            corrupt.write_bytes(b"not an npy file")
+            np.save(misshapen, np.zeros((2, 1, 5), dtype=np.uint8))
+
+            model = VisibilityModel(
+                FDS_DIR, SIGNS, cache_path=cache, time_step_s=TIME_STEP
+            )
+            assert mock_build.call_count == 2
+            assert sorted(mock_build.call_args.args[1]) == ["exit_A", "exit_B"]
+            assert all(isinstance(p, np.memmap) for p in model._vis._packed)
+            for x in range(10):
+                assert model.node_is_visible(0.0, x, 0.0, "exit_A") is True
+                assert model.node_is_visible(0.0, x, 0.0, "exit_B") == (x == 3)